@@ -0,0 +1,129 @@
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generator import DatasetParams, generate_csv
+from benchmarks.stages import run_stages
+
+_RESULTS_VERSION = 1
+
+def main(argv: list[str]) -> int:
+    parser = _create_argument_parser()
+    args = parser.parse_args(argv)
+
+    params = DatasetParams(
+        rows=args.rows,
+        columns=args.columns,
+        freq=args.freq,
+        gap_density=args.gap_density,
+        nan_density=args.nan_density,
+        duplicate_density=args.duplicate_density,
+        seed=args.seed)
+
+    if args.command == 'generate':
+        generate_csv(args.output, params)
+        return 0
+
+    # the graph window stages need Qt, but never a display
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = args.input
+        if filepath is None:
+            filepath = os.path.join(directory, 'dataset.csv')
+            generate_csv(filepath, params)
+
+        results = dict(
+            version=_RESULTS_VERSION,
+            environment=_get_environment(),
+            dataset=dict(
+                filepath=args.input,
+                size=os.path.getsize(filepath),
+                params=None if args.input is not None else dataclasses.asdict(params)),
+            repeat=args.repeat,
+            stages=run_stages(filepath, args.repeat, args.viewport_rows))
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            _print_comparison(json.load(f), results)
+
+    return 0
+
+def _create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='benchmarks',
+        description='Generates synthetic logger files and times each stage of importing and viewing them.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='write a synthetic CSV file')
+    generate_parser.add_argument('output', help='path of the generated file')
+
+    run_parser = subparsers.add_parser('run', help='time all stages and write the results as JSON')
+    run_parser.add_argument('-i', '--input', default=None, help='existing CSV file to use instead of a generated one')
+    run_parser.add_argument('-o', '--output', default=None, help='results file (printed to stdout by default)')
+    run_parser.add_argument('-c', '--compare', default=None, help='previous results file to compare with')
+    run_parser.add_argument('--repeat', type=int, default=5, help='runs of each stage')
+    run_parser.add_argument('--viewport-rows', type=int, default=50, help='rows of a table viewport')
+
+    # same dataset parameters for both commands, so a run can be reproduced with a generated file
+    defaults = DatasetParams()
+    for subparser in (generate_parser, run_parser):
+        subparser.add_argument('--rows', type=int, default=defaults.rows, help='rows of the time grid')
+        subparser.add_argument('--columns', type=int, default=defaults.columns, help='number of value columns')
+        subparser.add_argument('--freq', default=defaults.freq, help='time grid frequency')
+        subparser.add_argument('--gap-density', type=float, default=defaults.gap_density, help='fraction of absent grid slots')
+        subparser.add_argument('--nan-density', type=float, default=defaults.nan_density, help='fraction of empty cells')
+        subparser.add_argument('--duplicate-density', type=float, default=defaults.duplicate_density, help='fraction of duplicated timestamps')
+        subparser.add_argument('--seed', type=int, default=defaults.seed, help='random seed')
+
+    return parser
+
+def _get_environment() -> dict[str, t.Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return dict(
+        commit=commit,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        processor=platform.processor(),
+        cpu_count=os.cpu_count(),
+        numpy=np.__version__,
+        pandas=pd.__version__)
+
+def _print_comparison(previous: dict[str, t.Any], current: dict[str, t.Any]) -> None:
+    # compared on medians, the ratio is current / previous so values above 1 are regressions
+    print(f'{"stage":<24}{"previous":>12}{"current":>12}{"ratio":>8}', file=sys.stderr)
+    for name, stage in current['stages'].items():
+        previous_stage = previous['stages'].get(name)
+        if previous_stage is None:
+            print(f'{name:<24}{"-":>12}{stage["median"]:>12.4f}{"-":>8}', file=sys.stderr)
+            continue
+
+        ratio = stage['median'] / previous_stage['median'] if previous_stage['median'] > 0 else float('inf')
+        print(f'{name:<24}{previous_stage["median"]:>12.4f}{stage["median"]:>12.4f}{ratio:>8.2f}', file=sys.stderr)
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
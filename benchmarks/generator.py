@@ -0,0 +1,32 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+# Parameters of a synthetic logger file. Densities are fractions of rows (or cells for
+# `nan_density`) in range [0, 1], the same parameters and seed always produce the same file.
+@dataclasses.dataclass(frozen=True)
+class DatasetParams:
+    rows: int = 100_000
+    columns: int = 4
+    freq: str = '1min'
+    gap_density: float = 0.05
+    nan_density: float = 0.01
+    duplicate_density: float = 0.001
+    seed: int = 0
+
+def generate_csv(filepath: str, params: DatasetParams) -> None:
+    rng = np.random.default_rng(params.seed)
+
+    index = pd.date_range('2020-01-01', periods=params.rows, freq=params.freq, name='time')
+    # random walks resemble slowly drifting sensor readings
+    values = 20.0 + rng.normal(0.0, 0.1, (params.rows, params.columns)).cumsum(axis=0)
+    values[rng.random(values.shape) < params.nan_density] = np.nan
+    data = pd.DataFrame(values, index=index, columns=[f'series_{i}' for i in range(params.columns)])
+
+    # gaps are absent grid slots, duplicates repeat a timestamp right after its first occurrence
+    data = data.loc[rng.random(params.rows) >= params.gap_density]
+    duplicated = data.loc[rng.random(len(data)) < params.duplicate_density]
+    data = pd.concat([data, duplicated]).sort_index(kind='stable')
+
+    data.to_csv(filepath, float_format='%.4f', date_format='%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,186 @@
+import dataclasses
+import gc
+import os
+import statistics
+import tempfile
+import time
+import typing as t
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import QModelIndex, QSettings, Qt
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from data_visualizer.column_store import ImportedData
+from data_visualizer.csv_detection import detect_csv_config
+from data_visualizer.data_importer import (CSVEngine, CSVImporterConfig,
+                                           ImporterSettings, ImporterType,
+                                           is_pyarrow_available,
+                                           iter_csv_chunks, read_csv)
+from data_visualizer.import_cache import ImportCache
+from data_visualizer.memory_optimizer import optimize_memory
+from data_visualizer.models.column_stats import build_column_stats
+from data_visualizer.models.missing_ranges import find_missing_ranges
+from data_visualizer.models.pandas_model import PandasModel
+from data_visualizer.models.time_grid import align_to_grid
+from data_visualizer.parallel_csv import (DEFAULT_PARSE_PROCESSES,
+                                          shutdown_process_pools)
+from data_visualizer.pyramid import build_pyramid
+from data_visualizer.ui.graph_window import GraphToolWindow
+
+_T = t.TypeVar('_T')
+
+# number of evenly spread scroll positions at which a table viewport is formatted
+_VIEWPORT_POSITIONS = 20
+# rows appended to a followed file, in batches as a writer flushing its buffer would
+_APPENDED_ROWS = 100
+_APPEND_BATCHES = 10
+
+# Times every stage of opening `filepath` and viewing it, in the order the application runs them.
+# Each stage is run `repeat` times, results hold wall times of all runs in seconds.
+def run_stages(filepath: str, repeat: int, viewport_rows: int) -> dict[str, dict[str, t.Any]]:
+    results = dict[str, dict[str, t.Any]]()
+    config = CSVImporterConfig(True, 0)
+    importer_settings = ImporterSettings(ImporterType.CSV, filepath, config)
+
+    data = _measure(results, 'read_csv', repeat, lambda: read_csv(filepath, config))
+    if is_pyarrow_available():
+        arrow_config = dataclasses.replace(config, engine=CSVEngine.PYARROW)
+        _measure(results, 'read_csv_pyarrow', repeat, lambda: read_csv(filepath, arrow_config))
+
+    detected_config = _measure(results, 'detect_csv_config', repeat, lambda: detect_csv_config(filepath, config))
+    _measure(results, 'read_csv_detected', repeat, lambda: read_csv(filepath, detected_config))
+    # includes starting the worker processes in the first run, the median hides it
+    _measure(
+        results,
+        'read_csv_parallel',
+        repeat,
+        lambda: read_csv(filepath, config, processes=DEFAULT_PARSE_PROCESSES))
+    shutdown_process_pools()
+    data, grid, grid_positions = _measure(results, 'align_to_grid', repeat, lambda: align_to_grid(data))
+    missing_ranges = _measure(
+        results,
+        'find_missing_ranges',
+        repeat,
+        lambda: find_missing_ranges(data, grid, grid_positions))
+    pyramid = _measure(results, 'build_pyramid', repeat, lambda: build_pyramid(data, grid, grid_positions))
+    column_stats = _measure(results, 'build_column_stats', repeat, lambda: build_column_stats(data))
+    _measure(results, 'optimize_memory', repeat, lambda: optimize_memory(data))
+
+    imported = ImportedData(data, grid, grid_positions, missing_ranges)
+    with tempfile.TemporaryDirectory() as cache_directory:
+        cache = ImportCache(os.path.join(cache_directory, 'imports'))
+        _measure(results, 'import_cache_store', repeat, lambda: cache.store(importer_settings, imported))
+        _measure(results, 'import_cache_load', repeat, lambda: cache.load(importer_settings))
+
+        cache.clear()
+        _measure(
+            results,
+            'import_cache_build',
+            repeat,
+            lambda: cache.build(importer_settings, iter_csv_chunks(filepath, config)))
+
+    def create_model() -> PandasModel:
+        model = PandasModel(data, filepath, grid, grid_positions, missing_ranges)
+        model.pyramid = pyramid
+        model.column_stats = column_stats
+        return model
+
+    # models are prepared outside of the measurement, each run appends to a model which was
+    # already appended to, the first append copies imported columns into growable arrays
+    appended_rows = min(_APPENDED_ROWS * _APPEND_BATCHES, len(data) // 2)
+    following_models = [_create_following_model(data, filepath, appended_rows) for _ in range(repeat)]
+    _measure(
+        results,
+        'append_rows',
+        repeat,
+        lambda: _append_batches(following_models.pop(), data.iloc[len(data) - appended_rows:]))
+
+    # a new model for every run, so the formatted cell cache is always cold
+    _measure(results, 'table_viewport', repeat, lambda: _format_viewports(create_model(), viewport_rows))
+    if data.shape[1] > 0:
+        _measure(results, 'sort_filter', repeat, lambda: _sort_and_filter(create_model()))
+
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as settings_directory:
+        settings = QSettings(os.path.join(settings_directory, 'settings.ini'), QSettings.Format.IniFormat)
+        parent = QWidget()
+        _measure(
+            results,
+            'graph_window',
+            repeat,
+            lambda: _create_graph_window(app, create_model(), settings, parent, False))
+        _measure(
+            results,
+            'graph_window_plots',
+            repeat,
+            lambda: _create_graph_window(app, create_model(), settings, parent, True))
+
+    return results
+
+def _measure(results: dict[str, dict[str, t.Any]], name: str, repeat: int, fn: t.Callable[[], _T]) -> _T:
+    runs = list[float]()
+    for _ in range(repeat):
+        gc.collect()
+
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+
+    results[name] = dict(
+        min=min(runs),
+        median=statistics.median(runs),
+        mean=statistics.mean(runs),
+        max=max(runs),
+        runs=runs)
+
+    return result
+
+def _create_following_model(data: pd.DataFrame, filepath: str, appended_rows: int) -> PandasModel:
+    head = data.iloc[:len(data) - appended_rows - 1]
+    head, grid, grid_positions = align_to_grid(head)
+
+    model = PandasModel(head, filepath, grid, grid_positions)
+    model.pyramid = build_pyramid(head, grid, grid_positions)
+    model.append_rows(data.iloc[len(data) - appended_rows - 1:len(data) - appended_rows])
+
+    return model
+
+def _append_batches(model: PandasModel, rows: pd.DataFrame) -> None:
+    batch_size = max(len(rows) // _APPEND_BATCHES, 1)
+    for start in range(0, len(rows), batch_size):
+        model.append_rows(rows.iloc[start:start + batch_size])
+
+def _format_viewports(model: PandasModel, viewport_rows: int) -> None:
+    rows_count = len(model.grid)
+    columns_count = model.columnCount()
+    for first_row in np.linspace(0, max(rows_count - viewport_rows, 0), _VIEWPORT_POSITIONS, dtype=np.int64):
+        # the table fetches rows up to the viewport it jumps to
+        model.fetch_to(int(first_row) + viewport_rows - 1)
+        for row in range(int(first_row), min(int(first_row) + viewport_rows, rows_count)):
+            for column in range(columns_count):
+                model.data(model.index(row, column, QModelIndex()), Qt.ItemDataRole.DisplayRole)
+
+# sorts a table by its first column of values and filters its rows with a value of that column
+def _sort_and_filter(model: PandasModel) -> None:
+    model.sort(1, Qt.SortOrder.DescendingOrder)
+    model.set_filter(f'`{model.dataframe.columns[0]}` is not missing')
+
+def _create_graph_window(app: QApplication,
+                         model: PandasModel,
+                         settings: QSettings,
+                         parent: QWidget,
+                         show_plots: bool) -> None:
+    window = GraphToolWindow(model, settings, parent)
+    window.show()
+    app.processEvents()
+
+    if show_plots:
+        for widget in window.series_config_widgets.values():
+            widget.show_checkbox.click()
+
+        app.processEvents()
+
+    window.close()
+    window.deleteLater()
+    app.processEvents()
@@ -1,9 +1,10 @@
 import sys
 import typing as t
 
-from PyQt6.QtCore import QSettings
+from PyQt6.QtCore import QCoreApplication, QSettings
 from PyQt6.QtWidgets import QApplication
 
+from data_visualizer.batch import run_batch
 from data_visualizer.ui.main_window import MainWindow
 
 
@@ -19,7 +20,14 @@ def _load_stylesheet(theme: t.Literal['light'] | t.Literal['dark']) -> str:
 
 
 if __name__ == '__main__':
+    # the import cache is placed in the application specific cache directory
+    QCoreApplication.setOrganizationName('m4reQ')
+    QCoreApplication.setApplicationName('data_visualizer')
     settings = QSettings('m4reQ', 'data_visualizer')
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        sys.exit(run_batch(settings, sys.argv[2:]))
+
     stylesheet = _load_stylesheet(settings.value('theme', 'light'))
 
     app = QApplication(sys.argv)
@@ -0,0 +1,171 @@
+import argparse
+import concurrent.futures
+import dataclasses
+import datetime
+import json
+import os
+import re
+import sys
+import typing as t
+
+import pyqtgraph  # type: ignore[import-untyped]
+from PyQt6.QtCore import QSettings
+from PyQt6.QtWidgets import QApplication
+
+from data_visualizer.column_store import ImportedData
+from data_visualizer.data_importer import (DEFAULT_CSV_SEPARATOR, CSVEngine,
+                                           CSVImporterConfig, ImporterSettings,
+                                           ImporterType)
+from data_visualizer.import_cache import ImportCache
+from data_visualizer.import_pipeline import (create_import_cache,
+                                             get_optimize_memory,
+                                             get_out_of_core_size, import_data)
+from data_visualizer.models.column_stats import build_column_stats
+from data_visualizer.models.data_info import get_data_info
+from data_visualizer.models.pandas_model import PandasModel
+from data_visualizer.pyramid import load_or_build_pyramid
+from data_visualizer.ui.widgets.series_plot_item import (
+    SeriesPlotItem, create_series_plot_data)
+
+_DEFAULT_RENDER_WIDTH = 1280
+_DEFAULT_RENDER_HEIGHT = 480
+
+# Everything a worker process needs to handle a single file. QSettings can't be pickled,
+# workers open the settings of the application by their location instead.
+@dataclasses.dataclass(frozen=True)
+class BatchTask:
+    importer_settings: ImporterSettings
+    cache: ImportCache | None
+    out_of_core_size: int
+    should_optimize_memory: bool
+    render_columns: list[str]
+    output_dir: str
+    render_size: tuple[int, int]
+    settings_filename: str
+    settings_format: QSettings.Format
+
+def run_batch(settings: QSettings, argv: list[str]) -> int:
+    args = _create_argument_parser().parse_args(argv)
+
+    # the format is detected unless given, a given index column is still preferred
+    config = CSVImporterConfig(
+        auto_detect=args.separator is None and args.datetime_format is None,
+        index_column=args.index_column,
+        separator=DEFAULT_CSV_SEPARATOR if args.separator is None else args.separator,
+        datetime_format=args.datetime_format,
+        grid_frequency=args.grid_frequency,
+        engine=CSVEngine(args.engine))
+    tasks = [
+        BatchTask(
+            ImporterSettings(ImporterType.CSV, filepath, config),
+            None if args.no_cache else create_import_cache(settings),
+            get_out_of_core_size(settings),
+            args.optimize_memory or get_optimize_memory(settings),
+            args.render,
+            args.output_dir,
+            (args.width, args.height),
+            settings.fileName(),
+            settings.format())
+        for filepath in args.files]
+
+    if args.jobs == 1 or len(tasks) <= 1:
+        results = [process_file(x) for x in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            results = list(executor.map(process_file, tasks))
+
+    json.dump(results, sys.stdout, indent=2, default=_to_json)
+    sys.stdout.write('\n')
+
+    return 1 if any('error' in x for x in results) else 0
+
+# Imports a file, returns its info tab statistics and renders the requested columns. Errors are
+# returned instead of raised, so a single broken file doesn't stop the whole batch.
+def process_file(task: BatchTask) -> dict[str, t.Any]:
+    filepath = task.importer_settings.filepath
+    try:
+        imported = import_data(
+            task.importer_settings,
+            task.cache,
+            task.out_of_core_size,
+            should_optimize_memory=task.should_optimize_memory)
+        result = dataclasses.asdict(
+            get_data_info(filepath, imported.data, imported.grid, imported.missing_ranges, imported.memory_saved))
+
+        if len(task.render_columns) > 0:
+            result['renders'] = _render_columns(task, imported)
+    except Exception as e:
+        return {'filepath': filepath, 'error': f'{type(e).__name__}: {e}'}
+
+    return result
+
+def _create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='data_visualizer batch',
+        description='Imports files without the user interface, prints their statistics as JSON and renders selected series to PNG.')
+    parser.add_argument('files', nargs='+', help='CSV files to import')
+    parser.add_argument('-s', '--separator', default=None, help='column separator (detected by default)')
+    parser.add_argument('-i', '--index-column', type=int, default=0, help='index of the datetime column')
+    parser.add_argument('-d', '--datetime-format', default=None, help='strftime format of the datetime column')
+    parser.add_argument('-e', '--engine', choices=[x.value for x in CSVEngine], default=CSVEngine.C.value, help='CSV parser, pyarrow keeps columns Arrow-backed')
+    parser.add_argument('-f', '--grid-frequency', default=None, help='time grid frequency, e.g. 1min (inferred by default)')
+    parser.add_argument('-r', '--render', action='append', default=[], metavar='COLUMN', help='render a column to PNG, can be repeated')
+    parser.add_argument('-o', '--output-dir', default='.', help='directory of rendered images')
+    parser.add_argument('--width', type=int, default=_DEFAULT_RENDER_WIDTH, help='width of rendered images')
+    parser.add_argument('--height', type=int, default=_DEFAULT_RENDER_HEIGHT, help='height of rendered images')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of files processed in parallel')
+    parser.add_argument('--no-cache', action='store_true', help="don't use the import cache")
+    parser.add_argument('-m', '--optimize-memory', action='store_true', help='narrow column dtypes after import (on if enabled in the settings)')
+
+    return parser
+
+def _render_columns(task: BatchTask, imported: ImportedData) -> dict[str, str]:
+    # the offscreen platform doesn't need a display
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication.instance() or QApplication([])
+
+    filepath = task.importer_settings.filepath
+    model = PandasModel(imported.data, filepath, imported.grid, imported.grid_positions, imported.missing_ranges)
+    model.pyramid = load_or_build_pyramid(task.importer_settings, imported.data, imported.grid, imported.grid_positions)
+    stats = build_column_stats(imported.data).stats
+    settings = QSettings(task.settings_filename, task.settings_format)
+
+    os.makedirs(task.output_dir, exist_ok=True)
+    renders = dict[str, str]()
+    for column in task.render_columns:
+        y_min, y_max = stats.get_limits(model.dataframe.columns.get_loc(column))
+        plot_item = SeriesPlotItem(
+            settings,
+            model,
+            create_series_plot_data(model, column),
+            model.grid.start.to_pydatetime(),
+            model.grid.end.to_pydatetime(),
+            y_min,
+            y_max)
+        plot_widget = pyqtgraph.PlotWidget(plotItem=plot_item)
+        if settings.value('graph_theme', 'light', str) == 'light':
+            plot_widget.setBackground('white')
+
+        plot_widget.resize(*task.render_size)
+        app.processEvents()
+
+        output_path = os.path.join(task.output_dir, f'{_get_file_stem(filepath)}_{_get_safe_name(column)}.png')
+        if not plot_widget.grab().save(output_path):
+            raise OSError(f'Failed to save the image "{output_path}".')
+
+        plot_widget.deleteLater()
+        renders[column] = output_path
+
+    return renders
+
+def _get_file_stem(filepath: str) -> str:
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+def _get_safe_name(name: str) -> str:
+    return re.sub(r'[^\w.-]', '_', name)
+
+def _to_json(value: t.Any) -> t.Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
@@ -0,0 +1,300 @@
+import dataclasses
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from data_visualizer.models.missing_ranges import (MissingRanges,
+                                                   find_missing_ranges)
+from data_visualizer.models.time_grid import TimeGrid, align_index_to_grid
+
+# dtype kinds stored as raw binary columns, anything else but Arrow-backed columns (strings, categoricals,
+# extension types) is pickled
+_NUMPY_DTYPE_KINDS = 'biufcmM'
+# `column_dtypes` entry of a column stored as an Arrow IPC file, which is memory-mapped as well
+_ARROW_COLUMN = 'arrow'
+# rows gathered at once when a column has to be reordered on disk
+_REORDER_BATCH_ROWS = 1 << 20
+
+# Post-processed result of an import, everything needed to construct `PandasModel` without parsing.
+@dataclasses.dataclass(frozen=True)
+class ImportedData:
+    data: pd.DataFrame
+    grid: TimeGrid
+    grid_positions: np.ndarray
+    missing_ranges: MissingRanges
+    # bytes saved by `optimize_memory`, 0 if the data wasn't optimized
+    memory_saved: int = 0
+
+# A column store is a directory holding one raw binary file per numeric column, the index, grid
+# positions and the gap table. Functions below return the header describing the stored data,
+# which has to be passed back to `load_column_store`.
+
+def save_column_store(path: str, imported: ImportedData) -> dict[str, t.Any]:
+    data = imported.data
+    assert isinstance(data.index, pd.DatetimeIndex)
+
+    column_dtypes = list[str | None]()
+    for i in range(data.shape[1]):
+        column = data.iloc[:, i]
+        if _is_numpy_dtype(column.dtype):
+            column.to_numpy().tofile(os.path.join(path, f'column_{i}.bin'))
+            column_dtypes.append(column.dtype.str)
+        elif isinstance(column.dtype, pd.ArrowDtype):
+            _save_arrow_column(os.path.join(path, f'column_{i}.arrow'), column.array)
+            column_dtypes.append(_ARROW_COLUMN)
+        else:
+            column.to_pickle(os.path.join(path, f'column_{i}.pkl'))
+            column_dtypes.append(None)
+
+    _save_index(path, data.iloc[:0], data.index.as_unit('ns').asi8, imported.grid_positions)
+    _save_missing_ranges(path, imported.missing_ranges)
+
+    return _get_meta(imported.grid, len(data), column_dtypes) | dict(memory_saved=imported.memory_saved)
+
+# Writes chunks of parsed rows straight to disk, so the whole frame never has to fit in memory.
+# Only the index (8 bytes per row) and columns which can't be stored as raw binary are kept in memory.
+def write_column_store(path: str,
+                       chunks: t.Iterable[pd.DataFrame],
+                       grid_frequency: pd.Timedelta | None = None) -> dict[str, t.Any]:
+    schema: pd.DataFrame | None = None
+    writers = list[_ColumnWriter]()
+    index_parts = list[np.ndarray]()
+
+    try:
+        for chunk in chunks:
+            if not isinstance(chunk.index, pd.DatetimeIndex):
+                raise ValueError('Index column has to contain datetime values.')
+
+            if schema is None:
+                schema = chunk.iloc[:0]
+                writers = [_ColumnWriter(os.path.join(path, f'column_{i}')) for i in range(chunk.shape[1])]
+
+            index_parts.append(chunk.index.as_unit('ns').asi8)
+            for i, writer in enumerate(writers):
+                writer.append(chunk.iloc[:, i])
+    finally:
+        for writer in writers:
+            writer.close()
+
+    assert schema is not None
+    assert isinstance(schema.index, pd.DatetimeIndex)
+
+    index_values = np.concatenate(index_parts)
+    del index_parts
+
+    rows, grid, grid_positions = align_index_to_grid(
+        _to_datetimes(index_values, schema.index.tz),
+        grid_frequency)
+    if rows is not None:
+        index_values = index_values[rows]
+
+    column_dtypes = [x.finish(rows) for x in writers]
+    _save_index(path, schema, index_values, grid_positions)
+
+    # the gap table is searched through the mapped columns, a batch of columns at a time
+    meta = _get_meta(grid, len(index_values), column_dtypes)
+    data, grid, grid_positions = _load_data(path, meta)
+    _save_missing_ranges(path, find_missing_ranges(data, grid, grid_positions))
+
+    return meta
+
+# Numeric columns and grid positions are memory-mapped read-only, pages are loaded on first access.
+def load_column_store(path: str, meta: dict[str, t.Any]) -> ImportedData:
+    data, grid, grid_positions = _load_data(path, meta)
+    return ImportedData(
+        data,
+        grid,
+        grid_positions,
+        MissingRanges(
+            grid,
+            data.columns,
+            np.load(os.path.join(path, 'missing_offsets.npy')),
+            np.load(os.path.join(path, 'missing_starts.npy')),
+            np.load(os.path.join(path, 'missing_ends.npy'))),
+        meta.get('memory_saved', 0))
+
+# Appends chunks of a single column to a raw binary file. Once a chunk doesn't fit a numpy
+# dtype (strings, extension types), the whole column is kept in memory and pickled instead.
+class _ColumnWriter:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._file: t.BinaryIO | None = open(path + '.bin', 'wb')
+        self._dtypes = list[np.dtype]()
+        self._lengths = list[int]()
+        self._parts: list[pd.Series] | None = None
+
+    def append(self, column: pd.Series) -> None:
+        if self._parts is None and _is_numpy_dtype(column.dtype):
+            assert self._file is not None
+            column.to_numpy().tofile(self._file)
+            self._dtypes.append(column.dtype)
+            self._lengths.append(len(column))
+            return
+
+        if self._parts is None:
+            self._parts = self._read_parts()
+
+        self._parts.append(column.reset_index(drop=True))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Returns the final dtype of the column, None if it was pickled.
+    def finish(self, rows: np.ndarray | None) -> str | None:
+        self.close()
+
+        dtype: np.dtype | None = None
+        if self._parts is None:
+            try:
+                dtype = np.result_type(*self._dtypes)
+            except TypeError:
+                # e.g. a column parsed as datetimes in one chunk and as numbers in another
+                self._parts = self._read_parts()
+
+        if self._parts is not None:
+            column = pd.concat(self._parts, ignore_index=True)
+            if rows is not None:
+                column = column.iloc[rows].reset_index(drop=True)
+
+            column.to_pickle(self._path + '.pkl')
+            os.remove(self._path + '.bin')
+            return None
+
+        assert dtype is not None
+        if any(x != dtype for x in self._dtypes):
+            self._convert(dtype)
+
+        if rows is not None:
+            self._reorder(dtype, rows)
+
+        return dtype.str
+
+    def _read_parts(self) -> list[pd.Series]:
+        self.close()
+
+        parts = list[pd.Series]()
+        offset = 0
+        for dtype, length in zip(self._dtypes, self._lengths):
+            parts.append(pd.Series(np.fromfile(self._path + '.bin', dtype, length, offset=offset)))
+            offset += dtype.itemsize * length
+
+        self._dtypes.clear()
+        self._lengths.clear()
+        return parts
+
+    def _convert(self, dtype: np.dtype) -> None:
+        tmp_path = self._path + '.tmp'
+        converted = _map_column(tmp_path, dtype, sum(self._lengths), 'w+')
+
+        offset = 0
+        position = 0
+        for part_dtype, length in zip(self._dtypes, self._lengths):
+            converted[position:position + length] = _map_column(self._path + '.bin', part_dtype, length, 'r', offset)
+            offset += part_dtype.itemsize * length
+            position += length
+
+        _flush(converted)
+        del converted
+        os.replace(tmp_path, self._path + '.bin')
+
+    def _reorder(self, dtype: np.dtype, rows: np.ndarray) -> None:
+        tmp_path = self._path + '.tmp'
+        source = _map_column(self._path + '.bin', dtype, sum(self._lengths), 'r')
+        reordered = _map_column(tmp_path, dtype, len(rows), 'w+')
+
+        for start in range(0, len(rows), _REORDER_BATCH_ROWS):
+            stop = start + _REORDER_BATCH_ROWS
+            reordered[start:stop] = source[rows[start:stop]]
+
+        _flush(reordered)
+        del source, reordered
+        os.replace(tmp_path, self._path + '.bin')
+
+def _is_numpy_dtype(dtype: object) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in _NUMPY_DTYPE_KINDS
+
+def _save_arrow_column(path: str, values: pd.arrays.ArrowExtensionArray) -> None:
+    # pyarrow is optional, only Arrow-backed columns need it
+    import pyarrow as pa
+
+    table = pa.table({'values': values.__arrow_array__()})
+    with pa.OSFile(path, 'wb') as f, pa.ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+
+# Buffers of the column point into the mapped file, the mapping lives as long as they do.
+def _load_arrow_column(path: str) -> pd.arrays.ArrowExtensionArray:
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return pd.arrays.ArrowExtensionArray(table.column(0))
+
+def _map_column(path: str, dtype: np.dtype, length: int, mode: t.Literal['r', 'w+'], offset: int = 0) -> np.ndarray:
+    if length == 0:
+        # empty files can't be mapped
+        if mode == 'w+':
+            open(path, 'wb').close()
+
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype, mode, offset, (length,))
+
+def _flush(values: np.ndarray) -> None:
+    if isinstance(values, np.memmap):
+        values.flush()
+
+def _to_datetimes(values: np.ndarray, tz: t.Any) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(values.view('datetime64[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+
+    return index
+
+def _get_meta(grid: TimeGrid, rows_count: int, column_dtypes: list[str | None]) -> dict[str, t.Any]:
+    return dict(
+        rows_count=rows_count,
+        column_dtypes=column_dtypes,
+        grid_start=grid.start.value,
+        grid_freq=grid.freq.value,
+        grid_length=grid.length)
+
+def _save_index(path: str, schema: pd.DataFrame, index_values: np.ndarray, grid_positions: np.ndarray) -> None:
+    # an empty frame keeps column names and the index name and timezone
+    schema.to_pickle(os.path.join(path, 'schema.pkl'))
+    np.save(os.path.join(path, 'index.npy'), index_values)
+    np.save(os.path.join(path, 'grid_positions.npy'), grid_positions)
+
+def _save_missing_ranges(path: str, missing_ranges: MissingRanges) -> None:
+    np.save(os.path.join(path, 'missing_offsets.npy'), missing_ranges.offsets)
+    np.save(os.path.join(path, 'missing_starts.npy'), missing_ranges.starts)
+    np.save(os.path.join(path, 'missing_ends.npy'), missing_ranges.ends)
+
+def _load_data(path: str, meta: dict[str, t.Any]) -> tuple[pd.DataFrame, TimeGrid, np.ndarray]:
+    schema = pd.read_pickle(os.path.join(path, 'schema.pkl'))
+    assert isinstance(schema.index, pd.DatetimeIndex)
+    tz = schema.index.tz
+
+    index = _to_datetimes(np.load(os.path.join(path, 'index.npy')), tz)
+    index.name = schema.index.name
+
+    rows_count = meta['rows_count']
+    data = dict[int, t.Any]()
+    for i, dtype in enumerate(meta['column_dtypes']):
+        if dtype is None:
+            data[i] = pd.read_pickle(os.path.join(path, f'column_{i}.pkl')).array
+        elif dtype == _ARROW_COLUMN:
+            data[i] = _load_arrow_column(os.path.join(path, f'column_{i}.arrow'))
+        else:
+            data[i] = _map_column(os.path.join(path, f'column_{i}.bin'), np.dtype(dtype), rows_count, 'r')
+
+    # columns are keyed by position, names might repeat
+    frame = pd.DataFrame(data, index=index, copy=False)
+    frame.columns = schema.columns
+
+    grid_start = _to_datetimes(np.array([meta['grid_start']], dtype=np.int64), tz)[0]
+    grid = TimeGrid(grid_start, pd.Timedelta(meta['grid_freq'], unit='ns'), meta['grid_length'])
+
+    return frame, grid, np.load(os.path.join(path, 'grid_positions.npy'), mmap_mode='r')
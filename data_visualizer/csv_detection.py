@@ -0,0 +1,229 @@
+import csv
+import dataclasses
+import enum
+import os
+import re
+import typing as t
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from data_visualizer.data_importer import (DEFAULT_CSV_SEPARATOR,
+                                           CSVEngine, CSVImporterConfig,
+                                           get_csv_read_kwargs)
+
+_HEAD_SIZE = 64 * 1024
+_SAMPLE_SIZE = 16 * 1024
+_SAMPLE_COUNT = 8
+_SEPARATORS = (',', ';', '\t', '|')
+# values of a column given to the pandas format guesser, it fails on some dates of a valid format
+_FORMAT_GUESSES = 10
+_INTEGER_PATTERN = re.compile(r'[+-]?\d+')
+_BOOLEAN_VALUES = {'true', 'false'}
+# default missing value markers of pandas
+_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+class _ColumnKind(enum.Enum):
+    EMPTY = enum.auto()
+    INTEGER = enum.auto()
+    FLOAT = enum.auto()
+    BOOLEAN = enum.auto()
+    DATETIME = enum.auto()
+    TEXT = enum.auto()
+
+@dataclasses.dataclass(frozen=True)
+class _ColumnSample:
+    kind: _ColumnKind
+    has_missing: bool
+    datetime_format: str | None = None
+
+# Works out the separator, header, index column, its datetime format and dtypes of the other columns
+# from the head of the file and a few samples spread over it. The returned config is fully specified,
+# so pandas doesn't have to infer anything while parsing the whole file.
+def detect_csv_config(filepath: str, config: CSVImporterConfig) -> CSVImporterConfig:
+    lines = _read_sample_lines(filepath)
+    if len(lines) == 0:
+        raise ValueError(f'File "{filepath}" is empty.')
+
+    separator = _detect_separator(lines)
+    rows = list(csv.reader(lines, delimiter=separator))
+    widths = [len(x) for x in rows]
+    width = max(set(widths), key=widths.count)
+
+    # lines cut by a quoted line break or damaged ones are left out
+    data_rows = [x for x in rows[1:] if len(x) == width]
+    columns = [_sample_column([x[i] for x in data_rows]) for i in range(width)]
+
+    # a file of text columns only can't be told apart from its header, pandas assumes there is one
+    has_header = (
+        len(rows[0]) != width
+        or not all(_fits_column(x, y) for x, y in zip(rows[0], columns))
+        or all(x.kind in (_ColumnKind.EMPTY, _ColumnKind.TEXT) for x in columns))
+
+    # the configured index column is kept if it holds dates, otherwise the first one which does is taken
+    index_column = config.index_column
+    if index_column >= width or columns[index_column].kind != _ColumnKind.DATETIME:
+        index_column = next(
+            (i for i, x in enumerate(columns) if x.kind == _ColumnKind.DATETIME),
+            config.index_column)
+
+    datetime_format = columns[index_column].datetime_format if index_column < width else None
+
+    # pandas' own column names, with duplicates already renamed
+    names = pd.read_csv(filepath, sep=separator, header=0 if has_header else None, nrows=0).columns
+    column_dtypes = dict[t.Hashable, str]()
+    for i, (name, column) in enumerate(zip(names, columns)):
+        if i != index_column and (dtype := _get_dtype(column)) is not None:
+            column_dtypes[name] = dtype
+
+    return dataclasses.replace(
+        config,
+        auto_detect=False,
+        separator=separator,
+        has_header=has_header,
+        index_column=index_column,
+        datetime_format=datetime_format,
+        column_dtypes=column_dtypes)
+
+# The Arrow engine can't stop after a number of rows, the preview is always parsed by the C engine.
+def read_csv_preview(filepath: str, config: CSVImporterConfig, rows: int) -> pd.DataFrame:
+    return pd.read_csv(filepath, nrows=rows, **get_csv_read_kwargs(dataclasses.replace(config, engine=CSVEngine.C)))
+
+def _read_sample_lines(filepath: str) -> list[str]:
+    size = os.path.getsize(filepath)
+
+    with open(filepath, 'rb') as f:
+        head = f.read(_HEAD_SIZE)
+        lines = _split_lines(head, True, len(head) == size)
+        if size <= _HEAD_SIZE:
+            return lines
+
+        # the same offsets for the same file, so the detected config (and the import cache key) is stable
+        rng = np.random.default_rng(size)
+        for offset in np.sort(rng.integers(_HEAD_SIZE, size, _SAMPLE_COUNT)):
+            f.seek(int(offset))
+            lines.extend(_split_lines(f.read(_SAMPLE_SIZE), False, int(offset) + _SAMPLE_SIZE >= size))
+
+    return lines
+
+def _split_lines(data: bytes, is_start: bool, is_end: bool) -> list[str]:
+    lines = data.decode('utf-8-sig' if is_start else 'utf-8', errors='replace').splitlines()
+    # lines cut by the sample boundaries
+    if not is_start:
+        lines = lines[1:]
+
+    if not is_end:
+        lines = lines[:-1]
+
+    return [x for x in lines if x.strip()]
+
+# The separator splitting the most lines into the same number of fields wins, ties go to the one
+# producing more typed (not text) columns, then to more columns.
+def _detect_separator(lines: list[str]) -> str:
+    best_separator = DEFAULT_CSV_SEPARATOR
+    best_score = (0.0, 0, 0)
+
+    for separator in _SEPARATORS:
+        rows = list(csv.reader(lines, delimiter=separator))
+        widths = [len(x) for x in rows]
+        width = max(set(widths), key=widths.count)
+        if width < 2:
+            continue
+
+        data_rows = [x for x in rows[1:] if len(x) == width]
+        typed_columns = sum(
+            _sample_column([x[i] for x in data_rows]).kind not in (_ColumnKind.EMPTY, _ColumnKind.TEXT)
+            for i in range(width))
+
+        score = (widths.count(width) / len(widths), typed_columns, width)
+        if score > best_score:
+            best_separator = separator
+            best_score = score
+
+    return best_separator
+
+def _sample_column(values: list[str]) -> _ColumnSample:
+    present = [x.strip() for x in values if x.strip() not in _NA_VALUES]
+    has_missing = len(present) < len(values)
+
+    if len(present) == 0:
+        return _ColumnSample(_ColumnKind.EMPTY, has_missing)
+
+    if all(_is_integer(x) for x in present):
+        return _ColumnSample(_ColumnKind.INTEGER, has_missing)
+
+    if all(_is_float(x) for x in present):
+        return _ColumnSample(_ColumnKind.FLOAT, has_missing)
+
+    if all(x.lower() in _BOOLEAN_VALUES for x in present):
+        return _ColumnSample(_ColumnKind.BOOLEAN, has_missing)
+
+    if (datetime_format := _detect_datetime_format(present)) is not None:
+        return _ColumnSample(_ColumnKind.DATETIME, has_missing, datetime_format)
+
+    return _ColumnSample(_ColumnKind.TEXT, has_missing)
+
+def _detect_datetime_format(values: list[str]) -> str | None:
+    # day first formats are only tried when no month first one fits, as pandas does by default
+    for dayfirst in (False, True):
+        with warnings.catch_warnings():
+            # pandas warns whenever a guess contradicts `dayfirst`
+            warnings.simplefilter('ignore', UserWarning)
+            candidates = dict.fromkeys(
+                x for x in (guess_datetime_format(y, dayfirst=dayfirst) for y in values[:_FORMAT_GUESSES])
+                if x is not None)
+
+        # a format is only accepted if it parses every sampled value
+        for datetime_format in candidates:
+            parsed = pd.to_datetime(pd.Series(values), format=datetime_format, errors='coerce')
+            if not parsed.isna().any():
+                return datetime_format
+
+    return None
+
+def _fits_column(value: str, column: _ColumnSample) -> bool:
+    value = value.strip()
+    if value in _NA_VALUES:
+        return True
+
+    match column.kind:
+        case _ColumnKind.INTEGER:
+            return _is_integer(value)
+        case _ColumnKind.FLOAT:
+            return _is_float(value)
+        case _ColumnKind.BOOLEAN:
+            return value.lower() in _BOOLEAN_VALUES
+        case _ColumnKind.DATETIME:
+            return not pd.isna(pd.to_datetime(value, format=column.datetime_format, errors='coerce'))
+
+    return True
+
+# Integers are read as 64-bit and floats as double precision, narrower types can't be chosen safely
+# from a sample. Columns with missing values are read as floats, as pandas does.
+def _get_dtype(column: _ColumnSample) -> str | None:
+    match column.kind:
+        case _ColumnKind.INTEGER:
+            return 'float64' if column.has_missing else 'int64'
+        case _ColumnKind.FLOAT:
+            return 'float64'
+        case _ColumnKind.BOOLEAN:
+            return None if column.has_missing else 'bool'
+
+    return None
+
+def _is_integer(value: str) -> bool:
+    return _INTEGER_PATTERN.fullmatch(value) is not None and _INT64_MIN <= int(value) <= _INT64_MAX
+
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+
+    return True
@@ -1,11 +1,27 @@
 import dataclasses
 import enum
+import importlib.util
+import json
+import os
+import typing as t
+
+import pandas as pd
+
+from data_visualizer.parallel_csv import can_parse_in_parallel, iter_csv_ranges
+from data_visualizer.qt_job import JobContext
 
 DEFAULT_CSV_SEPARATOR = ','
+DEFAULT_CSV_CHUNK_SIZE = 100_000
 
 class ImporterType(enum.Enum):
     CSV = enum.auto()
 
+class CSVEngine(enum.Enum):
+    # pandas' own parser, columns are NumPy arrays
+    C = 'c'
+    # multithreaded Arrow parser, columns stay Arrow-backed, requires the optional pyarrow package
+    PYARROW = 'pyarrow'
+
 @dataclasses.dataclass
 class CSVImporterConfig:
     auto_detect: bool
@@ -13,9 +29,150 @@ class CSVImporterConfig:
     separator: str = DEFAULT_CSV_SEPARATOR
     datetime_format: str | None = None
     column_settings: list[tuple[str, type]] | None = None
+    # None lets pandas decide, the first line is the header unless column names are given
+    has_header: bool | None = None
+    # dtypes by column name, set by auto-detection so the parser doesn't have to infer them
+    column_dtypes: dict[t.Hashable, str] | None = None
+    # rows parsed at once, None reads the whole file in a single pass
+    chunk_size: int | None = DEFAULT_CSV_CHUNK_SIZE
+    # pandas frequency string of the time grid, None infers it from the data
+    grid_frequency: str | None = None
+    engine: CSVEngine = CSVEngine.C
 
 @dataclasses.dataclass
 class ImporterSettings:
     importer_type: ImporterType
     filepath: str
     config: CSVImporterConfig
+
+# Identifies settings importing a file into the same data, chunking only affects how the file is read.
+def get_settings_key(settings: ImporterSettings) -> str:
+    config = dataclasses.asdict(settings.config)
+    del config['chunk_size']
+
+    return json.dumps([settings.importer_type.name, config], default=str)
+
+def is_pyarrow_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+# With more than one process large files are split across worker processes, see `iter_csv_ranges`.
+# The Arrow engine parses the whole file at once in its own threads, so processes don't apply to it.
+def read_csv(filepath: str,
+             config: CSVImporterConfig,
+             context: JobContext | None = None,
+             processes: int = 1) -> pd.DataFrame:
+    read_kwargs = get_csv_read_kwargs(config)
+    if config.engine == CSVEngine.PYARROW:
+        return _read_csv_pyarrow(filepath, read_kwargs, context)
+
+    if processes > 1 and can_parse_in_parallel(filepath, read_kwargs):
+        # each column of a range is its own array in shared memory, they're concatenated without a copy
+        return _concat_chunks(iter_csv_ranges(filepath, read_kwargs, processes, context), copy_columns=False)
+
+    if config.chunk_size is None:
+        return pd.read_csv(filepath, **read_kwargs)
+
+    return _concat_chunks(iter_csv_chunks(filepath, config, context))
+
+# Parses the file in chunks of `config.chunk_size` rows (DEFAULT_CSV_CHUNK_SIZE if it's None),
+# reporting progress and checking for cancellation after each of them. With more than one process
+# chunks are byte ranges of the file parsed by worker processes instead. The Arrow engine can't
+# read in chunks, chunks are always parsed by the C engine into NumPy columns.
+def iter_csv_chunks(filepath: str,
+                    config: CSVImporterConfig,
+                    context: JobContext | None = None,
+                    processes: int = 1) -> t.Iterator[pd.DataFrame]:
+    read_kwargs = get_csv_read_kwargs(dataclasses.replace(config, engine=CSVEngine.C))
+    if processes > 1 and can_parse_in_parallel(filepath, read_kwargs):
+        yield from iter_csv_ranges(filepath, read_kwargs, processes, context)
+        return
+
+    chunk_size = DEFAULT_CSV_CHUNK_SIZE if config.chunk_size is None else config.chunk_size
+    total_bytes = os.path.getsize(filepath)
+    processed_rows = 0
+    is_empty = True
+
+    with open(filepath, 'rb') as f, pd.read_csv(f, chunksize=chunk_size, **read_kwargs) as reader:
+        for chunk in reader:
+            is_empty = False
+            processed_rows += chunk.shape[0]
+            yield chunk
+
+            if context is not None:
+                context.report_progress(f.tell(), total_bytes, processed_rows)
+                context.check_cancelled()
+
+    if is_empty:
+        # the chunked reader yields nothing for a header-only file, the plain reader still returns its columns
+        yield pd.read_csv(filepath, **read_kwargs)
+
+def get_csv_read_kwargs(config: CSVImporterConfig) -> dict[str, t.Any]:
+    dtype = None
+    names = None
+    if config.column_dtypes is not None:
+        dtype = dict(config.column_dtypes)
+        if config.engine == CSVEngine.PYARROW:
+            dtype = {k: f'{v}[pyarrow]' for k, v in dtype.items()}
+
+    if config.column_settings is not None:
+        dtype = (dtype or {}) | {k: v for k, v in config.column_settings}
+        names = [x[0] for x in config.column_settings]
+
+    header: int | str | None = 'infer'
+    if config.has_header is not None:
+        header = 0 if config.has_header else None
+
+    read_kwargs = dict[str, t.Any](
+        parse_dates=True,
+        index_col=config.index_column,
+        header=header,
+        sep=config.separator,
+        names=names,
+        dtype=dtype,
+        date_format=config.datetime_format)
+
+    if config.engine == CSVEngine.PYARROW:
+        return read_kwargs | dict(engine='pyarrow', dtype_backend='pyarrow')
+
+    return read_kwargs | dict(low_memory=False)
+
+def _read_csv_pyarrow(filepath: str, read_kwargs: dict[str, t.Any], context: JobContext | None) -> pd.DataFrame:
+    data = pd.read_csv(filepath, **read_kwargs)
+    if context is not None:
+        context.report_progress(os.path.getsize(filepath), os.path.getsize(filepath), data.shape[0])
+        context.check_cancelled()
+
+    # the time grid works on NumPy datetimes, only the index is converted
+    if isinstance(data.index.dtype, pd.ArrowDtype) and pd.api.types.is_datetime64_any_dtype(data.index.dtype):
+        data.index = pd.DatetimeIndex(data.index).as_unit('ns')
+
+    return data
+
+def _concat_chunks(chunks: t.Iterator[pd.DataFrame], copy_columns: bool = True) -> pd.DataFrame:
+    index_parts = list[pd.Index]()
+    column_parts = list[list[pd.Series]]()
+    columns: pd.Index | None = None
+
+    for chunk in chunks:
+        if columns is None:
+            columns = chunk.columns
+            column_parts = [[] for _ in columns]
+
+        # copy columns out of the chunk so its consolidated blocks can be released right away
+        index_parts.append(chunk.index)
+        for i, parts in enumerate(column_parts):
+            parts.append(chunk.iloc[:, i].copy() if copy_columns else chunk.iloc[:, i])
+
+        del chunk
+
+    assert columns is not None
+    index = index_parts[0].append(index_parts[1:])
+    del index_parts
+
+    # assemble column by column, so at most one column exists twice at any time
+    data = dict[t.Hashable, t.Any]()
+    for name, parts in zip(columns, column_parts):
+        data[name] = pd.concat(parts, ignore_index=True).array
+        parts.clear()
+
+    return pd.DataFrame(data, index=index, columns=columns, copy=False)
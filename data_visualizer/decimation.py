@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from data_visualizer.models.time_grid import TimeGrid
+
+# number of points per pixel above which visible data gets decimated
+LOD_POINTS_PER_PIXEL = 2
+
+def get_visible_slice(x: np.ndarray, x_min: float, x_max: float, margin: int = 1) -> slice:
+    # keep `margin` points outside of the range on both sides so lines continue past the edges
+    start = max(int(np.searchsorted(x, x_min, side='left')) - margin, 0)
+    stop = min(int(np.searchsorted(x, x_max, side='right')) + margin, len(x))
+
+    return slice(start, stop)
+
+# Reduces sorted data to a minimum and a maximum point per bucket of `x` between `x_min` and `x_max`,
+# one bucket per pixel. NaNs are ignored unless the whole bucket is NaN. Consecutive samples further
+# apart than a bucket are separated by a NaN, so holes at least a pixel wide still break `connect='finite'` lines.
+def decimate_min_max(x: np.ndarray,
+                     y: np.ndarray,
+                     x_min: float,
+                     x_max: float,
+                     buckets_count: int) -> tuple[np.ndarray, np.ndarray]:
+    if len(x) == 0 or buckets_count <= 0 or x_max <= x_min:
+        return x, y
+
+    bucket_width = (x_max - x_min) / buckets_count
+    bucket_ids = np.floor((x - x_min) / bucket_width).astype(np.int64)
+    is_first = np.ones(len(x), dtype=np.bool_)
+    is_first[1:] = bucket_ids[1:] != bucket_ids[:-1]
+    bucket_starts = np.flatnonzero(is_first)
+
+    x_out = np.repeat(x[bucket_starts], 2)
+    y_out = np.empty(len(x_out), dtype=np.float64)
+    y_out[0::2] = np.fmin.reduceat(y, bucket_starts)
+    y_out[1::2] = np.fmax.reduceat(y, bucket_starts)
+
+    # a hole between the last sample of a bucket and the first sample of the next one
+    hole_idx = np.flatnonzero(x[bucket_starts[1:]] - x[bucket_starts[1:] - 1] > bucket_width) + 1
+    return insert_breaks(x_out, y_out, 2 * hole_idx, x[bucket_starts[hole_idx] - 1])
+
+# Inserts NaN samples at `x_breaks` before samples at `indices`, breaking `connect='finite'` lines there.
+def insert_breaks(x: np.ndarray, y: np.ndarray, indices: np.ndarray, x_breaks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    if len(indices) == 0:
+        return x, y
+
+    return np.insert(x, indices, x_breaks), np.insert(y, indices, np.nan)
+
+# Visible part of rows placed on a time grid, decimated if there are too many points for `width_px`.
+# Only the visible rows are converted to timestamps and floats, so `values` can be a memory-mapped
+# or Arrow-backed column of any numeric dtype. Absent grid slots are drawn as a single NaN break placed right after
+# the preceding observed row, decimated data breaks at holes at least a pixel wide.
+def get_lod_data(grid: TimeGrid,
+                 positions: np.ndarray,
+                 values: np.ndarray | pd.arrays.ArrowExtensionArray,
+                 x_min: float,
+                 x_max: float,
+                 width_px: int) -> tuple[np.ndarray, np.ndarray]:
+    freq_s = grid.freq.total_seconds()
+    start_s = grid.start.value / 1e9
+    visible = get_visible_slice(positions, (x_min - start_s) / freq_s, (x_max - start_s) / freq_s)
+
+    visible_positions = np.asarray(positions[visible])
+    x = grid.get_unix_timestamps(visible_positions)
+    y = np.asarray(values[visible], dtype=np.float64)
+
+    if len(x) > LOD_POINTS_PER_PIXEL * width_px:
+        return decimate_min_max(x, y, x_min, x_max, width_px)
+
+    break_idx = np.flatnonzero(np.diff(visible_positions) > 1) + 1
+    return insert_breaks(x, y, break_idx, x[break_idx - 1] + freq_s)
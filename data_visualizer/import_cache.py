@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import typing as t
+
+import pandas as pd
+
+from data_visualizer.column_store import (ImportedData, load_column_store,
+                                          save_column_store,
+                                          write_column_store)
+from data_visualizer.data_importer import ImporterSettings, get_settings_key
+
+DEFAULT_IMPORT_CACHE_SIZE_MB = 2048
+DEFAULT_IMPORT_CACHE_SIZE = DEFAULT_IMPORT_CACHE_SIZE_MB * 1024 * 1024
+# files at least this large are streamed into the cache instead of being parsed into memory
+DEFAULT_OUT_OF_CORE_SIZE_MB = 1024
+_IMPORT_CACHE_VERSION = 3
+_META_FILENAME = 'meta.json'
+
+# On-disk cache of imported files. Each entry is a column store plus a json header, entries not
+# used recently are evicted once the directory grows over `max_size` bytes. Loaded entries are
+# memory-mapped, so opening a cached file costs about as much as reading its headers.
+class ImportCache:
+    def __init__(self, directory: str, max_size: int = DEFAULT_IMPORT_CACHE_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+
+    # `source` is the `get_source_info` of the file taken before it was parsed, the current one by default.
+    # Data of a file growing during the import is stored under its size from before, so it's never
+    # loaded for the grown file. Data narrowed by `optimize_memory` is stored apart from the parsed
+    # data, as an `optimized` entry.
+    def get_entry_path(self, settings: ImporterSettings, source: list | None = None, optimized: bool = False) -> str:
+        if source is None:
+            source = get_source_info(settings.filepath)
+
+        return os.path.join(self.directory, _get_key(settings, source, optimized))
+
+    def load(self, settings: ImporterSettings, source: list | None = None, optimized: bool = False) -> ImportedData | None:
+        if source is None:
+            source = get_source_info(settings.filepath)
+
+        entry_path = self.get_entry_path(settings, source, optimized)
+        meta_path = os.path.join(entry_path, _META_FILENAME)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+
+            if meta['source'] != source:
+                return None
+
+            imported = load_column_store(entry_path, meta)
+            # touching the header keeps the entry last in the eviction order
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # entry evicted by another import in the meantime, damaged or written by an incompatible
+            # version, it's removed so the file is parsed and stored again
+            _remove_entry(entry_path)
+            return None
+
+        return imported
+
+    def store(self,
+              settings: ImporterSettings,
+              imported: ImportedData,
+              source: list | None = None,
+              optimized: bool = False) -> None:
+        self._write_entry(settings, source, optimized, lambda path: save_column_store(path, imported))
+
+    # Streams parsed chunks into a new entry and returns it memory-mapped, so files larger than
+    # memory can be opened. The entry is never evicted right away, even if it's over `max_size` alone.
+    def build(self,
+              settings: ImporterSettings,
+              chunks: t.Iterable[pd.DataFrame],
+              grid_frequency: pd.Timedelta | None = None,
+              source: list | None = None) -> ImportedData:
+        if source is None:
+            source = get_source_info(settings.filepath)
+
+        self._write_entry(settings, source, False, lambda path: write_column_store(path, chunks, grid_frequency))
+
+        imported = self.load(settings, source)
+        if imported is None:
+            raise OSError(f'Failed to load the imported data from "{self.get_entry_path(settings, source)}".')
+
+        return imported
+
+    def evict(self, keep: str | None = None) -> None:
+        entries = list[tuple[float, int, str]]()
+        for name in os.listdir(self.directory):
+            entry_path = os.path.join(self.directory, name)
+            meta_path = os.path.join(entry_path, _META_FILENAME)
+            if name.startswith('.tmp_') or entry_path == keep:
+                continue
+
+            if not os.path.exists(meta_path):
+                # leftover of an entry which couldn't be fully removed while it was mapped
+                shutil.rmtree(entry_path, ignore_errors=True)
+                continue
+
+            entries.append((os.path.getmtime(meta_path), _get_directory_size(entry_path), entry_path))
+
+        entries.sort()
+        total_size = sum(x[1] for x in entries)
+        if keep is not None and os.path.exists(keep):
+            total_size += _get_directory_size(keep)
+
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+
+            if _remove_entry(entry_path):
+                total_size -= size
+
+    def _write_entry(self,
+                     settings: ImporterSettings,
+                     source: list | None,
+                     optimized: bool,
+                     write_fn: t.Callable[[str], dict[str, t.Any]]) -> None:
+        if source is None:
+            source = get_source_info(settings.filepath)
+
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self.get_entry_path(settings, source, optimized)
+
+        # write to a temporary directory first, so a crash never leaves a partial entry behind
+        tmp_path = tempfile.mkdtemp(prefix='.tmp_', dir=self.directory)
+        try:
+            meta = write_fn(tmp_path)
+            meta['source'] = source
+
+            # the header is written last, an entry without it is never loaded
+            with open(os.path.join(tmp_path, _META_FILENAME), 'w') as f:
+                json.dump(meta, f)
+
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            # the same file might have been stored concurrently
+            pass
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=entry_path)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def get_source_info(filepath: str) -> list:
+    stat = os.stat(filepath)
+    return [os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size]
+
+def _get_key(settings: ImporterSettings, source: list, optimized: bool) -> str:
+    key = json.dumps([_IMPORT_CACHE_VERSION, get_settings_key(settings), source, optimized])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+# Returns False if the entry couldn't be removed.
+def _remove_entry(entry_path: str) -> bool:
+    # the header goes first, so a partially removed entry is never loaded
+    try:
+        os.remove(os.path.join(entry_path, _META_FILENAME))
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+
+    shutil.rmtree(entry_path, ignore_errors=True)
+    return True
+
+def _get_directory_size(path: str) -> int:
+    return sum(x.stat().st_size for x in os.scandir(path) if x.is_file())
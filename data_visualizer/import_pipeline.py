@@ -0,0 +1,182 @@
+import contextlib
+import dataclasses
+import os
+import typing as t
+
+import pandas as pd
+from PyQt6.QtCore import QSettings, QStandardPaths
+
+from data_visualizer.column_store import ImportedData
+from data_visualizer.csv_detection import detect_csv_config
+from data_visualizer.data_importer import (ImporterSettings, ImporterType,
+                                           iter_csv_chunks, read_csv)
+from data_visualizer.import_cache import (DEFAULT_IMPORT_CACHE_SIZE_MB,
+                                          DEFAULT_OUT_OF_CORE_SIZE_MB,
+                                          ImportCache, get_source_info)
+from data_visualizer.memory_optimizer import optimize_memory
+from data_visualizer.models.missing_ranges import find_missing_ranges
+from data_visualizer.models.time_grid import align_to_grid, parse_grid_frequency
+from data_visualizer.parallel_csv import DEFAULT_PARSE_PROCESSES
+from data_visualizer.qt_job import JobContext
+
+# Import steps shared by the application and the batch mode. Nothing here touches widgets,
+# so it can run in worker threads and processes.
+
+def get_import_cache_directory() -> str:
+    directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+    return os.path.join(directory, 'imports')
+
+def create_import_cache(settings: QSettings) -> ImportCache | None:
+    size_mb = settings.value('import_cache_size', DEFAULT_IMPORT_CACHE_SIZE_MB, int)
+    if size_mb <= 0:
+        return None
+
+    return ImportCache(get_import_cache_directory(), size_mb * 1024 * 1024)
+
+def get_out_of_core_size(settings: QSettings) -> int:
+    return settings.value('out_of_core_size', DEFAULT_OUT_OF_CORE_SIZE_MB, int) * 1024 * 1024
+
+def get_parse_processes(settings: QSettings) -> int:
+    return max(settings.value('parse_processes', DEFAULT_PARSE_PROCESSES, int), 1)
+
+def get_optimize_memory(settings: QSettings) -> bool:
+    return settings.value('optimize_memory', False, bool)
+
+# Large files are parsed by `parse_processes` worker processes, 1 parses them in the calling thread.
+# With `should_optimize_memory` columns are narrowed by `optimize_memory` before they're cached, files
+# are cached apart with and without it. Files streamed into the cache are cached as parsed, only their
+# columns held in memory are narrowed.
+def import_data(settings: ImporterSettings,
+                cache: ImportCache | None,
+                out_of_core_size: int,
+                context: JobContext | None = None,
+                parse_processes: int = 1,
+                should_optimize_memory: bool = False) -> ImportedData:
+    if settings.config.auto_detect:
+        with _measure_stage(context, 'detect_format'):
+            settings = detect_settings(settings)
+
+    is_out_of_core = cache is not None and os.path.getsize(settings.filepath) >= out_of_core_size
+    is_optimized_entry = should_optimize_memory and not is_out_of_core
+
+    # the file might grow while it's parsed, the data is cached as of its state before that
+    imported = None
+    source = None
+    if cache is not None:
+        source = get_source_info(settings.filepath)
+        with _measure_stage(context, 'import_cache_load'):
+            imported = cache.load(settings, source, is_optimized_entry)
+
+    if imported is None and cache is not None and is_out_of_core:
+        imported = stream_data(settings, cache, context, parse_processes, source)
+
+    if imported is not None and should_optimize_memory and not is_optimized_entry:
+        # only columns held in memory are narrowed, memory-mapped ones stay on disk
+        imported = _optimize_memory(imported, context)
+
+    if imported is None:
+        imported = parse_data(settings, context, parse_processes)
+        if should_optimize_memory:
+            imported = _optimize_memory(imported, context)
+
+        if cache is not None:
+            try:
+                with _measure_stage(context, 'import_cache_store'):
+                    cache.store(settings, imported, source, is_optimized_entry)
+            except OSError:
+                # cache directory might be unavailable, the import itself succeeded
+                pass
+
+    return imported
+
+# Replaces an auto-detected config with a fully specified one.
+def detect_settings(settings: ImporterSettings) -> ImporterSettings:
+    match settings:
+        case ImporterSettings(ImporterType.CSV, filepath, config):
+            return dataclasses.replace(settings, config=detect_csv_config(filepath, config))
+
+# Detected dtypes and datetime format only hold for the sampled lines. When another line doesn't fit
+# them, the file is parsed again with everything inferred by pandas.
+def get_fallback_settings(settings: ImporterSettings) -> ImporterSettings | None:
+    if settings.config.column_dtypes is None:
+        return None
+
+    return dataclasses.replace(
+        settings,
+        config=dataclasses.replace(settings.config, column_dtypes=None, datetime_format=None))
+
+def parse_data(settings: ImporterSettings,
+               context: JobContext | None = None,
+               parse_processes: int = 1) -> ImportedData:
+    try:
+        return _parse_data(settings, context, parse_processes)
+    except (ValueError, OverflowError):
+        if (fallback_settings := get_fallback_settings(settings)) is None:
+            raise
+
+        return _parse_data(fallback_settings, context, parse_processes)
+
+# Parses the file into memory-mapped columns of the cache, without ever holding it in memory as a whole.
+def stream_data(settings: ImporterSettings,
+                cache: ImportCache,
+                context: JobContext | None = None,
+                parse_processes: int = 1,
+                source: list | None = None) -> ImportedData:
+    try:
+        return _stream_data(settings, settings, cache, context, parse_processes, source)
+    except (ValueError, OverflowError):
+        if (fallback_settings := get_fallback_settings(settings)) is None:
+            raise
+
+        # still stored under the detected settings, so the next import finds it without parsing twice
+        return _stream_data(settings, fallback_settings, cache, context, parse_processes, source)
+
+def _parse_data(settings: ImporterSettings, context: JobContext | None, parse_processes: int) -> ImportedData:
+    data: pd.DataFrame
+    grid_frequency: str | None
+    match settings:
+        case ImporterSettings(ImporterType.CSV, filepath, config):
+            with _measure_stage(context, 'read_csv'):
+                data = read_csv(filepath, config, context, parse_processes)
+
+            grid_frequency = config.grid_frequency
+
+    with _measure_stage(context, 'align_to_grid'):
+        data, grid, grid_positions = align_to_grid(
+            data,
+            None if grid_frequency is None else parse_grid_frequency(grid_frequency))
+
+    with _measure_stage(context, 'find_missing_ranges'):
+        missing_ranges = find_missing_ranges(data, grid, grid_positions)
+
+    return ImportedData(data, grid, grid_positions, missing_ranges)
+
+def _stream_data(key_settings: ImporterSettings,
+                 settings: ImporterSettings,
+                 cache: ImportCache,
+                 context: JobContext | None,
+                 parse_processes: int,
+                 source: list | None) -> ImportedData:
+    chunks: t.Iterator[pd.DataFrame]
+    grid_frequency: str | None
+    match settings:
+        case ImporterSettings(ImporterType.CSV, filepath, config):
+            chunks = iter_csv_chunks(filepath, config, context, parse_processes)
+            grid_frequency = config.grid_frequency
+
+    with _measure_stage(context, 'import_cache_build'):
+        return cache.build(
+            key_settings,
+            chunks,
+            None if grid_frequency is None else parse_grid_frequency(grid_frequency),
+            source)
+
+def _optimize_memory(imported: ImportedData, context: JobContext | None) -> ImportedData:
+    with _measure_stage(context, 'optimize_memory'):
+        data, memory_saved = optimize_memory(imported.data)
+
+    return dataclasses.replace(imported, data=data, memory_saved=imported.memory_saved + memory_saved)
+
+# Stages are only measured inside jobs, which report them to the diagnostics panel.
+def _measure_stage(context: JobContext | None, name: str) -> t.ContextManager[None]:
+    return contextlib.nullcontext() if context is None else context.stage(name)
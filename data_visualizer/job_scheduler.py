@@ -0,0 +1,93 @@
+import dataclasses
+import enum
+import functools
+
+from PyQt6.QtCore import QObject, QThreadPool, pyqtSignal
+
+from data_visualizer.qt_job import Job
+
+# Queued jobs of a higher priority are started first, so interactive requests never wait
+# behind background work. Running jobs are never interrupted.
+class JobPriority(enum.IntEnum):
+    BACKGROUND = 0
+    NORMAL = 50
+    INTERACTIVE = 100
+
+@dataclasses.dataclass(eq=False)
+class ScheduledJob:
+    job: Job
+    title: str
+    priority: JobPriority
+    # jobs submitted with an equal key while this one is pending are coalesced into it
+    key: object | None
+    is_running: bool = False
+    # fraction of the work done, None until the job reports progress
+    progress: float | None = None
+
+class JobScheduler(QObject):
+    jobs_changed = pyqtSignal()
+    # emitted right before a job is queued, its signals can still be connected
+    job_submitted = pyqtSignal(Job)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+
+        self._thread_pool = QThreadPool(self)
+        self._jobs = list[ScheduledJob]()
+
+    @property
+    def jobs(self) -> list[ScheduledJob]:
+        return list(self._jobs)
+
+    # Returns the job that will do the work. When a pending job has an equal key the new job is
+    # dropped and the pending one is returned instead, the caller should connect its signals
+    # before submitting, so they are only connected to a job that actually runs.
+    def submit(self,
+               job: Job,
+               title: str,
+               priority: JobPriority = JobPriority.NORMAL,
+               key: object | None = None) -> Job:
+        if key is not None:
+            for scheduled in self._jobs:
+                if scheduled.key == key and not scheduled.job.context.is_cancelled:
+                    return scheduled.job
+
+        # jobs are owned by their `ScheduledJob`, not the pool, so a queued job taken back from the pool
+        # can't be started or deleted by it in the meantime
+        job.setAutoDelete(False)
+        scheduled = ScheduledJob(job, title, priority, key)
+        job.started.connect(functools.partial(self._job_started_cb, scheduled))
+        job.progress.connect(functools.partial(self._job_progress_cb, scheduled))
+        job.finished.connect(functools.partial(self._job_done_cb, scheduled))
+        job.error.connect(functools.partial(self._job_done_cb, scheduled))
+        job.cancelled.connect(functools.partial(self._job_done_cb, scheduled))
+
+        self._jobs.append(scheduled)
+        self.job_submitted.emit(job)
+        self._thread_pool.start(job, priority)
+        self.jobs_changed.emit()
+
+        return job
+
+    def cancel(self, job: Job) -> None:
+        job.cancel()
+        if self._thread_pool.tryTake(job):
+            # never started, it's only reported as cancelled
+            job.context.report_cancelled()
+
+    def cancel_all(self) -> None:
+        for scheduled in self.jobs:
+            self.cancel(scheduled.job)
+
+    def _job_started_cb(self, scheduled: ScheduledJob) -> None:
+        scheduled.is_running = True
+        self.jobs_changed.emit()
+
+    def _job_progress_cb(self, scheduled: ScheduledJob, processed_bytes: int, total_bytes: int, _) -> None:
+        scheduled.progress = processed_bytes / total_bytes if total_bytes > 0 else None
+        self.jobs_changed.emit()
+
+    def _job_done_cb(self, scheduled: ScheduledJob, *_) -> None:
+        if scheduled in self._jobs:
+            self._jobs.remove(scheduled)
+            self.jobs_changed.emit()
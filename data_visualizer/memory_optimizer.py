@@ -0,0 +1,196 @@
+import mmap
+
+import numpy as np
+import pandas as pd
+
+# float32 holds any decimal of up to 6 significant digits exactly enough to be printed back unchanged
+_FLOAT32_DIGITS = 6
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+_FLOAT32_MIN_NORMAL = float(np.finfo(np.float32).smallest_normal)
+_INTEGER_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+_UNSIGNED_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+_NULLABLE_INTEGER_DTYPES = {
+    np.dtype(np.int8): pd.Int8Dtype(),
+    np.dtype(np.int16): pd.Int16Dtype(),
+    np.dtype(np.int32): pd.Int32Dtype(),
+    np.dtype(np.int64): pd.Int64Dtype()}
+# strings are stored as categoricals when at most this fraction of them is unique
+_MAX_CATEGORIES_RATIO = 0.5
+
+# Memory held by the frame, including strings and other python objects referenced by its columns.
+def get_memory_usage(data: pd.DataFrame) -> int:
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+# Stores each column in the smallest dtype holding all of its values exactly: integers in the narrowest
+# integer type, floats in float32 when precision allows, whole floats with missing values as nullable
+# integers and strings repeating often as categoricals. Memory-mapped columns are kept as they are,
+# they take no memory until read. Returns the optimized frame and the number of bytes saved.
+def optimize_memory(data: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    columns = dict[int, pd.Series]()
+    saved = 0
+
+    for i in range(data.shape[1]):
+        column = data.iloc[:, i]
+        optimized = _optimize_column(column)
+        if optimized is None:
+            columns[i] = column
+            continue
+
+        saved += column.memory_usage(index=False, deep=True) - optimized.memory_usage(index=False, deep=True)
+        columns[i] = optimized
+
+    # columns are keyed by position, names might repeat
+    frame = pd.DataFrame(columns, index=data.index, copy=False)
+    frame.columns = data.columns
+
+    return frame, int(saved)
+
+def _optimize_column(column: pd.Series) -> pd.Series | None:
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and _is_memory_mapped(column.to_numpy()):
+        return None
+
+    if isinstance(dtype, pd.ArrowDtype):
+        return _downcast_arrow(column)
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        return _downcast_integers(column)
+
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        return _downcast_floats(column)
+
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(dtype):
+        return _downcast_nullable_integers(column)
+
+    if dtype == object:
+        return _to_categorical(column)
+
+    return None
+
+def _downcast_integers(column: pd.Series) -> pd.Series | None:
+    if len(column) == 0:
+        return None
+
+    integer_dtype = _get_integer_dtype(column.min(), column.max(), column.dtype.kind == 'u')
+    if integer_dtype.itemsize >= column.dtype.itemsize:
+        return None
+
+    return column.astype(integer_dtype)
+
+def _downcast_nullable_integers(column: pd.Series) -> pd.Series | None:
+    present = column.dropna()
+    if len(present) == 0:
+        return None
+
+    integer_dtype = _get_integer_dtype(present.min(), present.max(), False)
+    if integer_dtype.itemsize >= column.dtype.itemsize:
+        return None
+
+    return column.astype(_NULLABLE_INTEGER_DTYPES[integer_dtype])
+
+# Whole numbers with missing values are parsed as floats, they are stored as nullable integers
+# if those are smaller (a byte of mask per row) than float32.
+def _downcast_floats(column: pd.Series) -> pd.Series | None:
+    values = column.to_numpy()
+    finite = values[np.isfinite(values)]
+    has_missing = len(finite) < len(values)
+
+    candidates = list[tuple[int, np.dtype | pd.api.extensions.ExtensionDtype]]()
+    if len(finite) > 0 and np.array_equal(finite, np.trunc(finite)) and not np.isinf(values).any():
+        integer_dtype = _get_integer_dtype(finite.min(), finite.max(), False)
+        if integer_dtype.itemsize < 8:
+            if has_missing:
+                candidates.append((integer_dtype.itemsize + 1, _NULLABLE_INTEGER_DTYPES[integer_dtype]))
+            else:
+                candidates.append((integer_dtype.itemsize, integer_dtype))
+
+    if values.dtype.itemsize > 4 and _fits_float32(finite):
+        candidates.append((4, np.dtype(np.float32)))
+
+    if len(candidates) == 0:
+        return None
+
+    itemsize, dtype = min(candidates, key=lambda x: x[0])
+    if itemsize >= values.dtype.itemsize:
+        return None
+
+    return column.astype(dtype)
+
+# Arrow columns stay Arrow-backed, only their numeric types are narrowed, strings are stored compactly
+# by Arrow already. Missing values are kept in a validity bitmap, so whole floats become integers.
+def _downcast_arrow(column: pd.Series) -> pd.Series | None:
+    if _is_arrow_memory_mapped(column.array):
+        return None
+
+    dtype = column.dtype
+    assert isinstance(dtype, pd.ArrowDtype)
+    if dtype.kind not in 'iuf':
+        return None
+
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return None
+
+    itemsize = dtype.itemsize
+    if dtype.kind in 'iu' or (np.array_equal(finite, np.trunc(finite)) and not np.isinf(values).any()):
+        # integers are read back from the column itself, large ones lose precision as floats
+        integers = column.dropna() if dtype.kind in 'iu' else finite
+        integer_dtype = _get_integer_dtype(integers.min(), integers.max(), dtype.kind == 'u')
+        if integer_dtype.itemsize < itemsize:
+            return column.astype(f'{integer_dtype.name}[pyarrow]')
+
+    if dtype.kind == 'f' and itemsize > 4 and _fits_float32(finite):
+        return column.astype('float[pyarrow]')
+
+    return None
+
+def _to_categorical(column: pd.Series) -> pd.Series | None:
+    if len(column) == 0 or pd.api.types.infer_dtype(column, skipna=True) != 'string':
+        return None
+
+    if column.nunique() > len(column) * _MAX_CATEGORIES_RATIO:
+        return None
+
+    return column.astype('category')
+
+def _get_integer_dtype(minimum: int, maximum: int, is_unsigned: bool) -> np.dtype:
+    for dtype in _UNSIGNED_DTYPES if is_unsigned else _INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= minimum and maximum <= info.max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.uint64 if is_unsigned else np.int64)
+
+# Values rounded to `_FLOAT32_DIGITS` significant digits have to be the values themselves, so
+# nothing parsed from the file is lost by the narrower type.
+def _fits_float32(values: np.ndarray) -> bool:
+    magnitudes = np.abs(values)
+    non_zero = magnitudes[magnitudes != 0]
+    if len(non_zero) == 0:
+        return True
+
+    if non_zero.max() > _FLOAT32_MAX or non_zero.min() < _FLOAT32_MIN_NORMAL:
+        return False
+
+    values = values[magnitudes != 0]
+    scales = 10.0 ** (_FLOAT32_DIGITS - 1 - np.floor(np.log10(non_zero)))
+    with np.errstate(over='ignore', invalid='ignore'):
+        return bool(np.array_equal(np.round(values * scales) / scales, values))
+
+# Buffers of read-only memory mapped Arrow files (the import cache) are the only immutable ones.
+def _is_arrow_memory_mapped(array: pd.arrays.ArrowExtensionArray) -> bool:
+    return any(
+        x is not None and not x.is_mutable
+        for chunk in array.__arrow_array__().chunks
+        for x in chunk.buffers())
+
+def _is_memory_mapped(values: np.ndarray) -> bool:
+    base: object = values
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+
+        base = base.base
+
+    return isinstance(base, mmap.mmap)
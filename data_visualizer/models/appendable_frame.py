@@ -0,0 +1,224 @@
+import mmap
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+_GROWTH_FACTOR = 1.5
+_MIN_CAPACITY = 1024
+
+# Array with spare capacity at its end, grown along the first axis. Appending copies only the appended
+# values until the capacity runs out, then the storage is reallocated `_GROWTH_FACTOR` times larger, so
+# appending costs time proportional to the appended values (amortized). The wrapped array is never
+# written to, it's copied on the first append. Arrays mapping a whole file (columns streamed into the
+# import cache) are grown on disk instead, the file is remapped after every append.
+class GrowableArray:
+    def __init__(self, values: np.ndarray) -> None:
+        self._storage = values
+        self._length = len(values)
+        self._is_owned = False
+        # file the values are appended to and the offset of the values in it, None once they're in RAM
+        self._mapped_file = _claim_mapped_file(values)
+
+    def __len__(self) -> int:
+        return self._length
+
+    # Filled part of the array. Views returned earlier stay valid, but don't see later appends.
+    @property
+    def values(self) -> np.ndarray:
+        return self._storage[:self._length]
+
+    def append(self, values: np.ndarray) -> None:
+        dtype = self._get_dtype(values)
+        if self._mapped_file is not None:
+            if dtype == self._storage.dtype and self._append_to_file(values):
+                return
+
+            self._mapped_file = None
+
+        length = self._length + len(values)
+        if not self._is_owned or length > len(self._storage) or dtype != self._storage.dtype:
+            self._reallocate(max(length, int(len(self._storage) * _GROWTH_FACTOR), _MIN_CAPACITY), dtype)
+
+        self._storage[self._length:length] = values
+        self._length = length
+
+    # Drops values from the end, the capacity is kept for the following appends.
+    def truncate(self, length: int) -> None:
+        self._length = min(length, self._length)
+
+    def _append_to_file(self, values: np.ndarray) -> bool:
+        path, offset = self._mapped_file
+        dtype = self._storage.dtype
+        length = self._length + len(values)
+        try:
+            with open(path, 'r+b') as f:
+                f.seek(offset + self._length * dtype.itemsize)
+                np.ascontiguousarray(values, dtype=dtype).tofile(f)
+
+            self._storage = np.memmap(path, dtype, 'r', offset, (length,))
+        except (OSError, ValueError):
+            return False
+
+        self._length = length
+        return True
+
+    def _reallocate(self, capacity: int, dtype: np.dtype) -> None:
+        storage = np.empty((capacity,) + self._storage.shape[1:], dtype=dtype)
+        storage[:self._length] = self._storage[:self._length]
+
+        self._storage = storage
+        self._is_owned = True
+
+    # Values are stored in the current dtype unless it would change them (e.g. floats appended to
+    # integers), then the common dtype of both is used.
+    def _get_dtype(self, values: np.ndarray) -> np.dtype:
+        dtype = self._storage.dtype
+        if np.can_cast(values.dtype, dtype, 'safe'):
+            return dtype
+
+        try:
+            with np.errstate(all='ignore'):
+                if np.array_equal(values.astype(dtype).astype(values.dtype), values, equal_nan=values.dtype.kind in 'fcmM'):
+                    return dtype
+
+            return np.result_type(dtype, values.dtype)
+        except (TypeError, ValueError):
+            return np.dtype(object)
+
+# Arrow-backed column appended to in chunks, the chunks it was created with are never copied. Appended
+# chunks are merged while the last one is at least as long as the one before, so there are only
+# logarithmically many of them.
+class _ArrowColumn:
+    def __init__(self, values: pd.arrays.ArrowExtensionArray) -> None:
+        chunked = values.__arrow_array__()
+        self._type = chunked.type
+        self._chunks = chunked.chunks
+        self._appended = list[t.Any]()
+
+    @property
+    def values(self) -> pd.arrays.ArrowExtensionArray:
+        import pyarrow as pa
+
+        return pd.arrays.ArrowExtensionArray(pa.chunked_array(self._chunks + self._appended, self._type))
+
+    def append(self, values: np.ndarray) -> None:
+        # only reached for Arrow-backed columns, pyarrow is installed then
+        import pyarrow as pa
+
+        chunk = pa.array(values, from_pandas=True)
+        try:
+            chunk = chunk.cast(self._type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # values that don't fit the type (e.g. floats appended to integers) change it for the whole column
+            self._promote(chunk.type)
+            chunk = chunk.cast(self._type)
+
+        self._appended.append(chunk)
+        while len(self._appended) > 1 and len(self._appended[-2]) <= len(self._appended[-1]):
+            last = self._appended.pop()
+            self._appended[-1] = pa.concat_arrays([self._appended[-1], last])
+
+    def _promote(self, arrow_type: t.Any) -> None:
+        import pyarrow as pa
+
+        chunks = self._chunks + self._appended
+        try:
+            chunks = [x.cast(arrow_type) for x in chunks]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            arrow_type = pa.string()
+            chunks = [x.cast(arrow_type) for x in chunks]
+
+        self._type = arrow_type
+        self._chunks = chunks
+        self._appended = list[t.Any]()
+
+# Observed rows of a model in growable arrays, so rows read from the end of a growing file are appended
+# in time proportional to their count. Arrow-backed columns stay Arrow-backed, other extension arrays
+# (nullable integers, categoricals) are converted to NumPy dtypes the C parser would give, appended rows
+# are parsed by it.
+class AppendableFrame:
+    def __init__(self, data: pd.DataFrame, grid_positions: np.ndarray) -> None:
+        assert isinstance(data.index, pd.DatetimeIndex)
+
+        self._columns = data.columns
+        self._index_name = data.index.name
+        self._tz = data.index.tz
+        self._index = GrowableArray(data.index.as_unit('ns').asi8)
+        self._data = [_create_column(data.iloc[:, i]) for i in range(data.shape[1])]
+        self._grid_positions = GrowableArray(np.asarray(grid_positions, dtype=np.int64))
+
+    @property
+    def data(self) -> pd.DataFrame:
+        index = pd.DatetimeIndex(self._index.values.view('datetime64[ns]'), name=self._index_name)
+        if self._tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self._tz)
+
+        # columns are keyed by position, names might repeat
+        frame = pd.DataFrame({i: x.values for i, x in enumerate(self._data)}, index=index, copy=False)
+        frame.columns = self._columns
+
+        return frame
+
+    @property
+    def grid_positions(self) -> np.ndarray:
+        return self._grid_positions.values
+
+    # `rows` have to be placed after the already stored ones, `grid_positions` are their grid slots.
+    def append(self, rows: pd.DataFrame, grid_positions: np.ndarray) -> None:
+        assert isinstance(rows.index, pd.DatetimeIndex)
+        assert rows.shape[1] == len(self._data)
+
+        self._index.append(rows.index.as_unit('ns').asi8)
+        for i, column in enumerate(self._data):
+            column.append(_to_numpy(rows.iloc[:, i]))
+
+        self._grid_positions.append(grid_positions)
+
+def _create_column(column: pd.Series) -> GrowableArray | _ArrowColumn:
+    if isinstance(column.dtype, pd.ArrowDtype):
+        return _ArrowColumn(column.array)
+
+    return GrowableArray(_to_numpy(column))
+
+# Only a read-only array mapping a whole file up to its end can be grown on disk. The file is claimed by
+# a marker next to it, so models following the same import cache entry don't append to it both.
+def _claim_mapped_file(values: np.ndarray) -> tuple[str, int] | None:
+    root = values
+    while not isinstance(root.base, mmap.mmap):
+        if not isinstance(root.base, np.ndarray):
+            return None
+
+        root = root.base
+
+    if not isinstance(root, np.memmap) or root.mode != 'r' or root.filename is None:
+        return None
+
+    if values.ndim != 1 or not values.flags.c_contiguous or values.dtype != root.dtype or values.nbytes != root.nbytes:
+        return None
+
+    if values.__array_interface__['data'][0] != root.__array_interface__['data'][0]:
+        return None
+
+    try:
+        if os.path.getsize(root.filename) != root.offset + root.nbytes:
+            return None
+
+        os.close(os.open(root.filename + '.append', os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except OSError:
+        return None
+
+    return root.filename, root.offset
+
+def _to_numpy(column: pd.Series) -> np.ndarray:
+    if isinstance(column.dtype, np.dtype):
+        return column.to_numpy()
+
+    if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if pd.api.types.is_datetime64_dtype(column.dtype):
+        return column.to_numpy(dtype='datetime64[ns]', na_value=np.datetime64('NaT'))
+
+    return column.to_numpy(dtype=object)
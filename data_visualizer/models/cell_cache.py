@@ -0,0 +1,89 @@
+import collections
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BLOCK_SIZE = 128
+DEFAULT_MAX_BLOCKS = 2048
+MISSING_VALUE_TEXT = str(np.nan)
+
+# Returns formatted cells of a single column for rows in range [start, stop)
+FormatFn: t.TypeAlias = t.Callable[[int, int, int], list[str]]
+
+# LRU cache of formatted cell strings. Cells are formatted in blocks of `block_size` rows of
+# a single column, so each block scrolled into view is formatted once in a single vectorized call.
+class FormattedCellCache:
+    def __init__(self,
+                 format_fn: FormatFn,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_blocks: int = DEFAULT_MAX_BLOCKS) -> None:
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+
+        self._format_fn = format_fn
+        self._blocks = collections.OrderedDict[tuple[int, int], list[str]]()
+
+    def get(self, row: int, column: int) -> str:
+        block_idx, block_row = divmod(row, self.block_size)
+        key = (block_idx, column)
+
+        block = self._blocks.get(key)
+        if block is None:
+            block = self._fill_block(key)
+        else:
+            self._blocks.move_to_end(key)
+
+        return block[block_row]
+
+    def invalidate(self, column: int | None = None) -> None:
+        if column is None:
+            self._blocks.clear()
+            return
+
+        for key in [x for x in self._blocks if x[1] == column]:
+            del self._blocks[key]
+
+    # Drops blocks of rows starting at `first_row` and after it, e.g. when rows are appended.
+    def invalidate_rows(self, first_row: int) -> None:
+        first_block = first_row // self.block_size
+        for key in [x for x in self._blocks if x[0] >= first_block]:
+            del self._blocks[key]
+
+    def _fill_block(self, key: tuple[int, int]) -> list[str]:
+        block_idx, column = key
+        start = block_idx * self.block_size
+
+        block = self._format_fn(column, start, start + self.block_size)
+        self._blocks[key] = block
+
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+        return block
+
+def format_datetimes(values: pd.DatetimeIndex, fmt: str | None = None) -> list[str]:
+    if fmt is None:
+        return values.astype(str).tolist()
+
+    return values.strftime(fmt).tolist()
+
+# Formats numbers with printf-style `fmt` (e.g. '%.2f') and datetimes with strftime-style `fmt`.
+def format_values(values: t.Any, fmt: str | None = None) -> list[str]:
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return format_datetimes(pd.DatetimeIndex(values), fmt)
+
+    series = pd.Series(values, copy=False)
+    if fmt is not None and pd.api.types.is_numeric_dtype(values.dtype):
+        try:
+            return np.char.mod(fmt, series.to_numpy(dtype=np.float64, na_value=np.nan)).tolist()
+        except (TypeError, ValueError):
+            pass
+
+    if isinstance(values.dtype, np.dtype):
+        return series.astype(str).tolist()
+
+    # extension arrays (Arrow, nullable) print missing values as <NA>
+    cells = series.astype(str).to_numpy(dtype=object)
+    cells[series.isna().to_numpy()] = MISSING_VALUE_TEXT
+    return cells.tolist()
@@ -0,0 +1,174 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+# rows summarized by a single block, ranges are answered from blocks plus at most two partial blocks of rows
+DEFAULT_BLOCK_ROWS = 1024
+
+# Statistics of every column over a range of rows, arrays are indexed by column. Values which can't be
+# converted to numbers count as missing, `minimum`, `maximum` and `mean` are NaN for columns without values.
+@dataclasses.dataclass(frozen=True)
+class ColumnStats:
+    minimum: np.ndarray
+    maximum: np.ndarray
+    total: np.ndarray
+    count: np.ndarray
+    rows_count: int
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total / self.count
+
+    @property
+    def nan_count(self) -> np.ndarray:
+        return self.rows_count - self.count
+
+    # Minimum and maximum of a column as axis limits, columns without values get the unit range.
+    def get_limits(self, column_idx: int) -> tuple[float, float]:
+        minimum, maximum = float(self.minimum[column_idx]), float(self.maximum[column_idx])
+        if np.isnan(minimum) or np.isnan(maximum):
+            return 0.0, 1.0
+
+        return minimum, maximum
+
+# Statistics of all columns computed in a single pass over the rows, from which statistics of any range
+# of rows are answered in constant time. Rows are summarized in blocks of `block_rows`, minima and
+# maxima of consecutive blocks come from sparse tables and sums and counts from prefix sums of blocks,
+# only the partial blocks at both ends of a range are read from the data.
+@dataclasses.dataclass(frozen=True)
+class ColumnStatsIndex:
+    block_rows: int
+    rows_count: int
+    # (blocks, columns) aggregates of each block
+    block_minimum: np.ndarray
+    block_maximum: np.ndarray
+    block_total: np.ndarray
+    block_count: np.ndarray
+    # (blocks + 1, columns) sums of all blocks before each block
+    total_prefix: np.ndarray
+    count_prefix: np.ndarray
+    # level k holds aggregates of 2 ** k consecutive blocks starting at each block
+    minimum_table: list[np.ndarray]
+    maximum_table: list[np.ndarray]
+
+    @property
+    def stats(self) -> ColumnStats:
+        return ColumnStats(
+            np.fmin.reduce(self.block_minimum, axis=0, initial=np.nan),
+            np.fmax.reduce(self.block_maximum, axis=0, initial=np.nan),
+            self.total_prefix[-1],
+            self.count_prefix[-1],
+            self.rows_count)
+
+    # Statistics of rows in [`start`, `stop`), `data` has to be the frame the index was built from.
+    def get_stats(self, data: pd.DataFrame, start: int, stop: int) -> ColumnStats:
+        start, stop = max(start, 0), min(stop, self.rows_count)
+        first_block = -(-start // self.block_rows)
+        last_block = stop // self.block_rows
+        if first_block >= last_block:
+            return _aggregate_rows(data, start, max(stop, start))
+
+        head = _aggregate_rows(data, start, first_block * self.block_rows)
+        tail = _aggregate_rows(data, last_block * self.block_rows, stop)
+
+        # two overlapping runs of 2 ** level blocks cover the whole range of blocks
+        level = int(np.log2(last_block - first_block))
+        last_run = last_block - (1 << level)
+        minimum_table = self.minimum_table[level]
+        maximum_table = self.maximum_table[level]
+
+        return ColumnStats(
+            np.fmin.reduce([head.minimum, tail.minimum, minimum_table[first_block], minimum_table[last_run]]),
+            np.fmax.reduce([head.maximum, tail.maximum, maximum_table[first_block], maximum_table[last_run]]),
+            head.total + tail.total + self.total_prefix[last_block] - self.total_prefix[first_block],
+            head.count + tail.count + self.count_prefix[last_block] - self.count_prefix[first_block],
+            stop - start)
+
+def build_column_stats(data: pd.DataFrame, block_rows: int = DEFAULT_BLOCK_ROWS) -> ColumnStatsIndex:
+    blocks = _aggregate_blocks(data, 0, block_rows)
+    return _create_index(block_rows, data.shape[0], *blocks)
+
+# Extends the index by rows appended to `data` after it was built. Only the last (partial) block and
+# appended rows are aggregated, the sparse tables are rebuilt from blocks, a thousandth of the rows.
+def append_column_stats(index: ColumnStatsIndex, data: pd.DataFrame) -> ColumnStatsIndex:
+    kept_blocks = index.rows_count // index.block_rows
+    blocks = _aggregate_blocks(data, kept_blocks * index.block_rows, index.block_rows)
+
+    return _create_index(
+        index.block_rows,
+        data.shape[0],
+        *(np.concatenate((x[:kept_blocks], y)) for x, y in zip(
+            (index.block_minimum, index.block_maximum, index.block_total, index.block_count),
+            blocks)))
+
+def _create_index(block_rows: int,
+                  rows_count: int,
+                  block_minimum: np.ndarray,
+                  block_maximum: np.ndarray,
+                  block_total: np.ndarray,
+                  block_count: np.ndarray) -> ColumnStatsIndex:
+    minimum_table = [block_minimum]
+    maximum_table = [block_maximum]
+    while (1 << len(minimum_table)) <= len(block_minimum):
+        half = 1 << (len(minimum_table) - 1)
+        minimum_table.append(np.fmin(minimum_table[-1][:-half], minimum_table[-1][half:]))
+        maximum_table.append(np.fmax(maximum_table[-1][:-half], maximum_table[-1][half:]))
+
+    return ColumnStatsIndex(
+        block_rows,
+        rows_count,
+        block_minimum,
+        block_maximum,
+        block_total,
+        block_count,
+        _get_prefix_sums(block_total),
+        _get_prefix_sums(block_count),
+        minimum_table,
+        maximum_table)
+
+def _aggregate_blocks(data: pd.DataFrame,
+                      start: int,
+                      block_rows: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    block_starts = np.arange(0, data.shape[0] - start, block_rows)
+    aggregates = np.empty((4, len(block_starts), data.shape[1]), dtype=np.float64)
+    if len(block_starts) == 0:
+        return aggregates[0], aggregates[1], aggregates[2], aggregates[3].astype(np.int64)
+
+    # columns are converted one at a time, so a memory-mapped frame is never loaded as a whole
+    for i in range(data.shape[1]):
+        values = _to_float_values(data.iloc[start:, i])
+        is_present = ~np.isnan(values)
+
+        aggregates[0, :, i] = np.fmin.reduceat(values, block_starts)
+        aggregates[1, :, i] = np.fmax.reduceat(values, block_starts)
+        aggregates[2, :, i] = np.add.reduceat(np.where(is_present, values, 0.0), block_starts)
+        aggregates[3, :, i] = np.add.reduceat(is_present, block_starts, dtype=np.int64)
+
+    return aggregates[0], aggregates[1], aggregates[2], aggregates[3].astype(np.int64)
+
+def _aggregate_rows(data: pd.DataFrame, start: int, stop: int) -> ColumnStats:
+    aggregates = np.full((4, data.shape[1]), np.nan)
+    aggregates[2:] = 0.0
+
+    if stop > start:
+        for i in range(data.shape[1]):
+            values = _to_float_values(data.iloc[start:stop, i])
+            is_present = ~np.isnan(values)
+
+            aggregates[0, i] = np.fmin.reduce(values)
+            aggregates[1, i] = np.fmax.reduce(values)
+            aggregates[2, i] = values[is_present].sum()
+            aggregates[3, i] = is_present.sum()
+
+    return ColumnStats(aggregates[0], aggregates[1], aggregates[2], aggregates[3].astype(np.int64), stop - start)
+
+def _get_prefix_sums(values: np.ndarray) -> np.ndarray:
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+    np.cumsum(values, axis=0, out=prefix[1:])
+
+    return prefix
+
+def _to_float_values(column: pd.Series) -> np.ndarray:
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
@@ -0,0 +1,57 @@
+import dataclasses
+import datetime
+import os
+
+import pandas as pd
+
+from data_visualizer.memory_optimizer import get_memory_usage
+from data_visualizer.models.missing_ranges import MissingRanges
+from data_visualizer.models.time_grid import TimeGrid
+
+
+# Summary of an imported file, as shown in the info tab. Missing rows are counted in the first column,
+# `size` is the memory held by the data including strings, `memory_saved` what `optimize_memory` saved.
+@dataclasses.dataclass(frozen=True)
+class DataInfo:
+    filepath: str
+    last_modified: datetime.datetime
+    size: int
+    memory_saved: int
+    rows: int
+    columns: int
+    missing_rows: int
+    longest_missing_period: int
+    longest_missing_start: datetime.datetime | None
+    longest_missing_end: datetime.datetime | None
+
+def get_data_info(filepath: str,
+                  data: pd.DataFrame,
+                  grid: TimeGrid,
+                  missing_ranges: MissingRanges,
+                  memory_saved: int = 0) -> DataInfo:
+    longest_start: datetime.datetime | None = None
+    longest_end: datetime.datetime | None = None
+    longest_length = 0
+    missing_rows = 0
+
+    if data.shape[1] > 0:
+        checked_ranges = missing_ranges.get_column_ranges(0)
+        missing_rows = checked_ranges.get_missing_rows_count()
+
+        longest = checked_ranges.get_longest()
+        if longest is not None:
+            longest_start = checked_ranges.start_times[longest].to_pydatetime()
+            longest_end = checked_ranges.end_times[longest].to_pydatetime()
+            longest_length = int(checked_ranges.lengths[longest])
+
+    return DataInfo(
+        filepath,
+        datetime.datetime.fromtimestamp(os.path.getmtime(filepath)),
+        get_memory_usage(data),
+        memory_saved,
+        len(grid),
+        data.shape[1],
+        missing_rows,
+        longest_length,
+        longest_start,
+        longest_end)
@@ -0,0 +1,198 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from data_visualizer.models.time_grid import TimeGrid
+
+
+@dataclasses.dataclass(frozen=True)
+class ColumnMissingRanges:
+    grid: TimeGrid
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.ends - self.starts + 1
+
+    @property
+    def start_times(self) -> pd.DatetimeIndex:
+        return self.grid.get_timestamps(self.starts)
+
+    @property
+    def end_times(self) -> pd.DatetimeIndex:
+        return self.grid.get_timestamps(self.ends)
+
+    def get_missing_rows_count(self) -> int:
+        return int(self.lengths.sum())
+
+    def get_longest(self) -> int | None:
+        if len(self) == 0:
+            return None
+
+        return int(self.lengths.argmax())
+
+# Gap table of all columns of a dataframe. Ranges are stored as inclusive grid positions,
+# sorted by column and then by start. Ranges of column `i` occupy `starts[offsets[i]:offsets[i + 1]]`.
+@dataclasses.dataclass(frozen=True)
+class MissingRanges:
+    grid: TimeGrid
+    columns: pd.Index
+    offsets: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def __getitem__(self, column: str) -> ColumnMissingRanges:
+        column_idx = self.columns.get_loc(column)
+        assert isinstance(column_idx, int)
+
+        return self.get_column_ranges(column_idx)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.ends - self.starts + 1
+
+    def get_column_ranges(self, column_idx: int) -> ColumnMissingRanges:
+        start, end = self.offsets[column_idx], self.offsets[column_idx + 1]
+        return ColumnMissingRanges(
+            self.grid,
+            self.starts[start:end],
+            self.ends[start:end])
+
+# Upper bound of mask cells searched at once, wide frames of many rows are searched in batches of columns
+_MAX_BATCH_CELLS = 1 << 26
+
+# Grid slots without an observed row count as missing in every column.
+def find_missing_ranges(data: pd.DataFrame, grid: TimeGrid, positions: np.ndarray) -> MissingRanges:
+    segment_starts, segment_ends, row_segments = _get_grid_segments(positions)
+    batch_size = max(_MAX_BATCH_CELLS // max(len(segment_starts), 1), 1)
+
+    column_indices = [np.empty(0, dtype=np.int64)]
+    starts = [np.empty(0, dtype=np.int64)]
+    ends = [np.empty(0, dtype=np.int64)]
+    for first_column in range(0, data.shape[1], batch_size):
+        missing = data.iloc[:, first_column:first_column + batch_size].isnull().to_numpy()
+        batch_column_indices, batch_starts, batch_ends = find_runs(
+            _get_segments_missing(missing, row_segments, len(segment_starts)))
+
+        column_indices.append(batch_column_indices + first_column)
+        starts.append(segment_starts[batch_starts])
+        ends.append(segment_ends[batch_ends])
+
+    return MissingRanges(
+        grid,
+        data.columns,
+        np.searchsorted(np.concatenate(column_indices), np.arange(data.shape[1] + 1)),
+        np.concatenate(starts),
+        np.concatenate(ends))
+
+# Extends the gap table by rows appended after the end of its grid. `grid` is the extended grid and
+# `positions` are slots of the appended rows. Only the appended rows are searched, merging them into
+# the table is linear in the number of ranges, not rows.
+def append_missing_ranges(missing_ranges: MissingRanges,
+                          data: pd.DataFrame,
+                          grid: TimeGrid,
+                          positions: np.ndarray) -> MissingRanges:
+    columns_count = len(missing_ranges.columns)
+    appended = find_missing_ranges(data, grid, positions)
+
+    column_indices = [
+        np.repeat(np.arange(columns_count), np.diff(missing_ranges.offsets)),
+        np.repeat(np.arange(columns_count), np.diff(appended.offsets))]
+    starts = [missing_ranges.starts, appended.starts]
+    ends = [missing_ranges.ends, appended.ends]
+
+    # slots between the old end of the grid and the first appended row are missing in every column
+    old_length = missing_ranges.grid.length
+    if len(positions) > 0 and positions[0] > old_length:
+        column_indices.insert(1, np.arange(columns_count))
+        starts.insert(1, np.full(columns_count, old_length, dtype=np.int64))
+        ends.insert(1, np.full(columns_count, positions[0] - 1, dtype=np.int64))
+
+    # ranges of a column are already ordered by start, a stable sort by column keeps them so
+    all_column_indices = np.concatenate(column_indices)
+    order = np.argsort(all_column_indices, kind='stable')
+    all_column_indices = all_column_indices[order]
+    all_starts = np.concatenate(starts)[order]
+    all_ends = np.concatenate(ends)[order]
+
+    # a range reaching the old end of the grid is joined with the range continuing it
+    is_first = np.ones(len(all_starts), dtype=np.bool_)
+    is_first[1:] = (all_column_indices[1:] != all_column_indices[:-1]) | (all_starts[1:] != all_ends[:-1] + 1)
+    is_last = np.ones(len(all_starts), dtype=np.bool_)
+    is_last[:-1] = is_first[1:]
+
+    return MissingRanges(
+        grid,
+        missing_ranges.columns,
+        np.searchsorted(all_column_indices[is_first], np.arange(columns_count + 1)),
+        all_starts[is_first],
+        all_ends[is_last])
+
+# Cuts the gap table to the shorter `grid`, ranges reaching past its end are shortened.
+def truncate_missing_ranges(missing_ranges: MissingRanges, grid: TimeGrid) -> MissingRanges:
+    columns_count = len(missing_ranges.columns)
+    column_indices = np.repeat(np.arange(columns_count), np.diff(missing_ranges.offsets))
+    is_kept = missing_ranges.starts < grid.length
+
+    return MissingRanges(
+        grid,
+        missing_ranges.columns,
+        np.searchsorted(column_indices[is_kept], np.arange(columns_count + 1)),
+        missing_ranges.starts[is_kept],
+        np.minimum(missing_ranges.ends[is_kept], grid.length - 1))
+
+# Splits the grid into segments, one per observed row and one per hole between observed rows,
+# so runs can be searched for without allocating the absent grid slots. Returns bounds of the
+# segments and the segment of each observed row, None if there are no holes.
+def _get_grid_segments(positions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    has_hole = np.diff(positions) > 1
+    if not has_hole.any():
+        return positions, positions, None
+
+    rows_count = len(positions)
+    row_segments = np.arange(rows_count)
+    row_segments[1:] += np.cumsum(has_hole)
+    hole_segments = row_segments[:-1][has_hole] + 1
+    segments_count = rows_count + len(hole_segments)
+
+    segment_starts = np.empty(segments_count, dtype=np.int64)
+    segment_starts[row_segments] = positions
+    segment_starts[hole_segments] = positions[:-1][has_hole] + 1
+
+    segment_ends = np.empty(segments_count, dtype=np.int64)
+    segment_ends[row_segments] = positions
+    segment_ends[hole_segments] = positions[1:][has_hole] - 1
+
+    return segment_starts, segment_ends, row_segments
+
+def _get_segments_missing(missing: np.ndarray, row_segments: np.ndarray | None, segments_count: int) -> np.ndarray:
+    if row_segments is None:
+        return missing
+
+    segment_missing = np.ones((segments_count, missing.shape[1]), dtype=np.bool_)
+    segment_missing[row_segments] = missing
+
+    return segment_missing
+
+# Run-length encodes True values of a 2D (rows, columns) mask in a single pass. Returns column
+# indices, start rows and inclusive end rows of all runs, ordered by column and then by start row.
+def find_runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, columns = mask.shape
+
+    # pad with a False row on both sides so every run has a rising and a falling edge
+    padded = np.zeros((columns, rows + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask.T
+    edges = np.diff(padded, axis=1)
+
+    column_indices, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    return column_indices, starts, ends - 1
@@ -1,40 +1,308 @@
 import dataclasses
-import datetime
-import itertools
 from typing import Any
 
+import numpy as np
 import pandas as pd
-from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
 
+from data_visualizer.data_importer import ImporterSettings
+from data_visualizer.models.appendable_frame import AppendableFrame
+from data_visualizer.models.cell_cache import (MISSING_VALUE_TEXT,
+                                               FormattedCellCache,
+                                               format_datetimes, format_values)
+from data_visualizer.models.column_stats import (ColumnStatsIndex,
+                                                 append_column_stats)
+from data_visualizer.models.missing_ranges import (MissingRanges,
+                                                   append_missing_ranges,
+                                                   find_missing_ranges)
+from data_visualizer.models.row_order import (RowFilter, RowOrderCache,
+                                              filter_slots, get_observed_rows,
+                                              match_slots, parse_filter,
+                                              sort_slots)
+from data_visualizer.models.time_grid import TimeGrid, align_appended_index
+from data_visualizer.pyramid import AppendablePyramid, Pyramid
 
-@dataclasses.dataclass
-class MissingRange:
-    start: datetime.datetime
-    end: datetime.datetime
-    length: int
+# grid slots shown by views at once, more are fetched as views scroll to the end of the shown ones
+FETCH_ROWS = 65_536
+# rows searched at once by `find_row`, chunks grow up to the maximum while nothing is found
+_SEARCH_CHUNK_ROWS = 4096
+_MAX_SEARCH_CHUNK_ROWS = 1 << 20
 
+# Table of `dataframe` viewed through a regular time grid. `dataframe` holds only the observed
+# rows and `grid_positions` maps each of them to its grid slot. Rows of the table are grid slots,
+# slots without an observed row are shown as missing values.
+# Views are given the rows incrementally (`canFetchMore`/`fetchMore`), so a tab of millions of rows
+# is shown without building header sections for all of them up front.
+# Rows can be filtered and sorted, the table then shows grid slots in the order of `_row_order`,
+# computed by vectorized operations over whole columns and cached per filter and sort.
 class PandasModel(QAbstractTableModel):
-    def __init__(self, df: pd.DataFrame, filepath: str) -> None:
+    # number of grid slots appended by `append_rows`, unlike `rowsInserted` not emitted for fetched rows
+    rows_appended = pyqtSignal(int)
+    # errors of sorting requested by views, which can't be raised to them
+    error = pyqtSignal(Exception)
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 filepath: str,
+                 grid: TimeGrid,
+                 grid_positions: np.ndarray,
+                 missing_ranges: MissingRanges | None = None) -> None:
         super().__init__()
 
         self.dataframe = df
-        self.missing_ranges = _get_missing_ranges(df)
+        self.grid = grid
+        self.grid_positions = grid_positions
+        self.missing_ranges = find_missing_ranges(df, grid, grid_positions) if missing_ranges is None else missing_ranges
         self.filepath = filepath
+        self.pyramid: Pyramid | None = None
+        self.column_stats: ColumnStatsIndex | None = None
+        # bytes saved by `optimize_memory` on import
+        self.memory_saved = 0
+        # settings the data was imported with and the size of the file at that time, rows written
+        # after it are appended by `TailFollower`
+        self.importer_settings: ImporterSettings | None = None
+        self.source_size = 0
+        self.default_number_format: str | None = None
+        self.default_datetime_format: str | None = None
+
+        self.row_filter: RowFilter | None = None
+        self.sort_column: int | None = None
+        self.sort_descending = False
+
+        self._row_order: np.ndarray | None = None
+        self._row_orders = RowOrderCache()
+        self._fetched_rows = min(FETCH_ROWS, len(grid))
+        self._column_formats = dict[int, str]()
+        self._cell_cache = FormattedCellCache(self._format_cells)
+        # created on the first append, imported data is stored as it is until then
+        self._appendable_frame: AppendableFrame | None = None
+        self._appendable_pyramid: AppendablePyramid | None = None
+
+    def set_default_formats(self, number_format: str | None, datetime_format: str | None) -> None:
+        self.default_number_format = number_format
+        self.default_datetime_format = datetime_format
+
+        self._cell_cache.invalidate()
+        self._emit_columns_changed(0, self.columnCount() - 1)
+
+    def get_column_format(self, column: int) -> str | None:
+        if (fmt := self._column_formats.get(column)) is not None:
+            return fmt
+
+        if column == 0 or pd.api.types.is_datetime64_any_dtype(self.dataframe.dtypes.iloc[column - 1]):
+            return self.default_datetime_format
+
+        return self.default_number_format
+
+    def set_column_format(self, column: int, fmt: str | None) -> None:
+        if fmt is None:
+            self._column_formats.pop(column, None)
+        else:
+            self._column_formats[column] = fmt
+
+        self._cell_cache.invalidate(column)
+        self._emit_columns_changed(column, column)
+
+    # Appends rows read from the end of a growing file. Only the appended rows are aligned, searched for
+    # missing values and aggregated into the pyramid, views are notified of the inserted grid slots.
+    # Rows at or before the last grid slot are dropped. Returns the number of inserted grid slots.
+    def append_rows(self, rows: pd.DataFrame) -> int:
+        if not isinstance(rows.index, pd.DatetimeIndex):
+            raise ValueError('Index column has to contain datetime values.')
+
+        if rows.shape[1] != self.dataframe.shape[1]:
+            raise ValueError(f'Appended rows have {rows.shape[1]} columns, {self.dataframe.shape[1]} expected.')
+
+        grid = self.grid
+        if grid.length == 0 and rows.index.notna().any():
+            grid = TimeGrid(rows.index.min(), grid.freq, 0)
+
+        kept_rows, positions = align_appended_index(rows.index, grid)
+        if len(positions) == 0:
+            return 0
+
+        rows = rows.iloc[kept_rows]
+        old_length = grid.length
+        grid = dataclasses.replace(grid, length=int(positions[-1]) + 1)
+
+        if self._appendable_frame is None:
+            self._appendable_frame = AppendableFrame(self.dataframe, self.grid_positions)
+            if self.pyramid is not None:
+                self._appendable_pyramid = AppendablePyramid(self.pyramid)
+
+        old_rows_count = self._get_rows_count()
+        self._appendable_frame.append(rows, positions)
+        self.dataframe = self._appendable_frame.data
+        self.grid_positions = self._appendable_frame.grid_positions
+        self.missing_ranges = append_missing_ranges(self.missing_ranges, rows, grid, positions)
+        if self._appendable_pyramid is not None:
+            self._appendable_pyramid.append(rows, grid, positions)
+            self.pyramid = self._appendable_pyramid.pyramid
+
+        if self.column_stats is not None:
+            self.column_stats = append_column_stats(self.column_stats, self.dataframe)
+
+        self.grid = grid
+        self._row_orders.invalidate()
+
+        try:
+            row_order = self._get_appended_row_order(old_length)
+        except ValueError as e:
+            # e.g. values of another type appended to the filtered or sorted column
+            self.row_filter, self.sort_column = None, None
+            row_order = None
+            self.error.emit(e)
+
+        # appended rows might be placed anywhere in a sorted table
+        if self.sort_column is not None or (row_order is None) != (self._row_order is None):
+            self._reset_row_order(row_order)
+        else:
+            self._insert_rows(row_order, old_rows_count)
+
+        self.rows_appended.emit(grid.length - old_length)
+
+        return grid.length - old_length
+
+    # Shows only rows passing the filter `expression` (see `parse_filter`), all rows if it's None or
+    # empty. Raises ValueError for invalid expressions, the previous filter is kept then.
+    def set_filter(self, expression: str | None) -> None:
+        previous_filter = self.row_filter
+        if expression is None or len(expression.strip()) == 0:
+            self.row_filter = None
+        else:
+            self.row_filter = parse_filter(expression, self.dataframe, self.grid)
+
+        try:
+            row_order = self._get_row_order()
+        except ValueError:
+            self.row_filter = previous_filter
+            raise
+
+        self._reset_row_order(row_order)
+
+    # Sorts rows by a column of the table, `column` -1 restores the time order.
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        previous_sort = (self.sort_column, self.sort_descending)
+        self.sort_column = None if column < 0 else column
+        self.sort_descending = order == Qt.SortOrder.DescendingOrder
+
+        try:
+            row_order = self._get_row_order()
+        except ValueError as e:
+            self.sort_column, self.sort_descending = previous_sort
+            self.error.emit(e)
+            return
+
+        self._reset_row_order(row_order)
+
+    # Grid slot shown in a row of the table.
+    def get_grid_position(self, row: int) -> int:
+        return row if self._row_order is None else int(self._row_order[row])
+
+    # Row of the table showing a grid slot, None if it's filtered out.
+    def get_table_row(self, grid_position: int) -> int | None:
+        if self._row_order is None:
+            return grid_position if 0 <= grid_position < len(self.grid) else None
+
+        # filtered slots are kept in time order unless they're sorted
+        if self.sort_column is None:
+            row = int(np.searchsorted(self._row_order, grid_position))
+            is_shown = row < len(self._row_order) and self._row_order[row] == grid_position
+            return row if is_shown else None
+
+        rows = np.flatnonzero(self._row_order == grid_position)
+        return int(rows[0]) if len(rows) > 0 else None
+
+    # Row of the table showing the first grid slot at or after `timestamp`, the slot is found by
+    # arithmetic on the grid and its row by a binary search of the shown slots. Rows of sorted tables
+    # aren't ordered by time, the row of the slot itself is returned then, None if it's filtered out.
+    def find_timestamp_row(self, timestamp: pd.Timestamp) -> int | None:
+        if self._get_rows_count() == 0:
+            return None
+
+        if timestamp.tz is None and self.grid.start.tz is not None:
+            timestamp = timestamp.tz_localize(self.grid.start.tz)
+
+        position = min(max(-((self.grid.start.value - timestamp.value) // self.grid.freq.value), 0), len(self.grid) - 1)
+        if self._row_order is None:
+            return position
+
+        if self.sort_column is not None:
+            return self.get_table_row(position)
+
+        return min(int(np.searchsorted(self._row_order, position)), len(self._row_order) - 1)
+
+    # Next (previous if `backward`) row of the table after (before) `row` matching the filter
+    # `expression` (see `parse_filter`), None if there's none. Rows are scanned in vectorized chunks
+    # outward from `row`, growing while nothing is found, so close matches are found without scanning
+    # the whole table. Raises ValueError for invalid expressions.
+    def find_row(self, expression: str, row: int, backward: bool = False) -> int | None:
+        row_filter = parse_filter(expression, self.dataframe, self.grid)
+        rows_count = self._get_rows_count()
+        row = min(max(row, -1), rows_count)
+
+        chunk_rows = _SEARCH_CHUNK_ROWS
+        start, stop = (row, row) if backward else (row + 1, row + 1)
+        while (start > 0) if backward else (stop < rows_count):
+            if backward:
+                start, stop = max(start - chunk_rows, 0), start
+            else:
+                start, stop = stop, min(stop + chunk_rows, rows_count)
+
+            slots = np.arange(start, stop) if self._row_order is None else self._row_order[start:stop]
+            matches = np.flatnonzero(match_slots(row_filter, self.dataframe, self.grid, self.grid_positions, slots))
+            if len(matches) > 0:
+                return start + int(matches[-1] if backward else matches[0])
+
+            chunk_rows = min(chunk_rows * 2, _MAX_SEARCH_CHUNK_ROWS)
+
+        return None
+
+    # Rows with timestamps in [`start`, `end`], found by a binary search of grid positions.
+    def get_row_range(self, start: pd.Timestamp, end: pd.Timestamp) -> tuple[int, int]:
+        first_position = -((self.grid.start.value - start.value) // self.grid.freq.value)
+        last_position = (end.value - self.grid.start.value) // self.grid.freq.value
+
+        return (
+            int(np.searchsorted(self.grid_positions, first_position, side='left')),
+            int(np.searchsorted(self.grid_positions, last_position, side='right')))
+
+    def get_row_index(self, grid_position: int) -> int | None:
+        row = int(np.searchsorted(self.grid_positions, grid_position))
+        if row < len(self.grid_positions) and self.grid_positions[row] == grid_position:
+            return row
+
+        return None
 
     def data(self, index: QModelIndex, role: int = 0) -> Any:
         if role == Qt.ItemDataRole.DisplayRole:
-            if index.column() == 0:
-                return str(self.dataframe.index[index.row()])
+            return self._cell_cache.get(index.row(), index.column())
+
+    # Makes rows up to `row` (inclusive) available to views, e.g. before one of them jumps to it.
+    def fetch_to(self, row: int) -> None:
+        stop = min(max(row + 1, self._fetched_rows + FETCH_ROWS), self._get_rows_count())
+        if stop <= self._fetched_rows:
+            return
 
-            return str(self.dataframe.iat[index.row(), index.column() - 1])
+        self.beginInsertRows(QModelIndex(), self._fetched_rows, stop - 1)
+        self._fetched_rows = stop
+        self.endInsertRows()
 
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._fetched_rows < self._get_rows_count()
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if not parent.isValid():
+            self.fetch_to(self._fetched_rows)
+
+    # Rows fetched by views, `len(grid)` is the number of all rows.
     def rowCount(self, _: QModelIndex = QModelIndex()) -> int:
-        return self.dataframe.shape[0]
+        return self._fetched_rows
 
     def columnCount(self, _: QModelIndex = QModelIndex()) -> int:
         return self.dataframe.shape[1] + 1
 
-    def headerData(self, section: int, orientation: Qt.Orientation, role: int = 0) -> str:
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = 0) -> Any:
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
                 if section == 0:
@@ -42,23 +310,112 @@ class PandasModel(QAbstractTableModel):
 
                 return self.dataframe.columns[section - 1]
 
+            # the header converts numbers to text itself, without a Python string per row
             if orientation == Qt.Orientation.Vertical:
-                return str(section)
+                return self.get_grid_position(section)
 
         return super().headerData(section, orientation, role)
 
-def _get_series_missing_ranges(series: pd.Series) -> pd.DataFrame:
-    missing = series.isnull()
-    consecutive_missing = (
-        list(map(lambda x: x[0], list(g)))
-        for k, g in itertools.groupby(enumerate(missing), lambda x: x[1])
-        if k)
-
-    return pd.DataFrame(
-        ((series.index[x[0]], series.index[x[-1]], len(x)) for x in consecutive_missing),
-        columns=['start', 'end', 'length'])
-
-def _get_missing_ranges(data: pd.DataFrame) -> dict[str, pd.DataFrame]:
-    return {
-        column: _get_series_missing_ranges(data[column])
-        for column in data.columns}
+    def _get_rows_count(self) -> int:
+        return len(self.grid) if self._row_order is None else len(self._row_order)
+
+    def _get_row_order(self) -> np.ndarray | None:
+        if self.row_filter is None and self.sort_column is None:
+            return None
+
+        if self.row_filter is None:
+            slots = np.arange(len(self.grid))
+        else:
+            row_filter = self.row_filter
+            slots = self._row_orders.get(
+                row_filter.expression,
+                lambda: filter_slots(row_filter, self.dataframe, self.grid, self.grid_positions))
+
+        if self.sort_column is None:
+            return slots
+
+        sort_column, sort_descending = self.sort_column, self.sort_descending
+        return self._row_orders.get(
+            (None if self.row_filter is None else self.row_filter.expression, sort_column, sort_descending),
+            lambda: sort_slots(slots, sort_column, sort_descending, self.dataframe, self.grid_positions))
+
+    # Row order after rows were appended after grid slot `old_length`, only the appended rows are
+    # filtered unless the table is sorted.
+    def _get_appended_row_order(self, old_length: int) -> np.ndarray | None:
+        if self._row_order is None or self.row_filter is None or self.sort_column is not None:
+            return self._get_row_order()
+
+        appended_slots = filter_slots(
+            self.row_filter,
+            self.dataframe,
+            self.grid,
+            self.grid_positions,
+            old_length)
+
+        return np.concatenate((self._row_order, appended_slots))
+
+    def _reset_row_order(self, row_order: np.ndarray | None) -> None:
+        self.beginResetModel()
+
+        self._row_order = row_order
+        self._fetched_rows = min(FETCH_ROWS, self._get_rows_count())
+        self._cell_cache.invalidate()
+
+        self.endResetModel()
+
+    # Shows rows added to the end of the table, views see them once they fetch them, unless they
+    # were shown all rows already.
+    def _insert_rows(self, row_order: np.ndarray | None, old_rows_count: int) -> None:
+        # the last block might have been formatted while the table ended inside of it
+        self._cell_cache.invalidate_rows(old_rows_count)
+
+        rows_count = len(self.grid) if row_order is None else len(row_order)
+        if self._fetched_rows != old_rows_count or rows_count == old_rows_count:
+            self._row_order = row_order
+            return
+
+        self.beginInsertRows(QModelIndex(), old_rows_count, rows_count - 1)
+
+        self._row_order = row_order
+        self._fetched_rows = rows_count
+
+        self.endInsertRows()
+
+    def _emit_columns_changed(self, first_column: int, last_column: int) -> None:
+        if self.rowCount() == 0:
+            return
+
+        self.dataChanged.emit(
+            self.index(0, first_column),
+            self.index(self.rowCount() - 1, last_column),
+            [Qt.ItemDataRole.DisplayRole])
+
+    def _format_cells(self, column: int, start: int, stop: int) -> list[str]:
+        if self._row_order is not None:
+            return self._format_ordered_cells(column, self._row_order[start:stop])
+
+        stop = min(stop, len(self.grid))
+        fmt = self.get_column_format(column)
+        if column == 0:
+            return format_datetimes(self.grid.to_index(start, stop), fmt)
+
+        first_row, last_row = np.searchsorted(self.grid_positions, (start, stop))
+        values = self.dataframe.iloc[first_row:last_row, column - 1].array
+
+        cells = np.full(stop - start, MISSING_VALUE_TEXT, dtype=object)
+        cells[self.grid_positions[first_row:last_row] - start] = format_values(values, fmt)
+
+        return cells.tolist()
+
+    def _format_ordered_cells(self, column: int, slots: np.ndarray) -> list[str]:
+        fmt = self.get_column_format(column)
+        if column == 0:
+            return format_datetimes(self.grid.get_timestamps(slots), fmt)
+
+        rows, is_observed = get_observed_rows(slots, self.grid_positions)
+        values = self.dataframe.iloc[rows[is_observed], column - 1].array
+
+        cells = np.full(len(slots), MISSING_VALUE_TEXT, dtype=object)
+        cells[is_observed] = format_values(values, fmt)
+
+        return cells.tolist()
@@ -0,0 +1,241 @@
+import collections
+import dataclasses
+import operator
+import re
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from data_visualizer.models.time_grid import TimeGrid
+
+# Rows are selected by conditions on values of columns, `None` is a condition on all columns.
+# Columns are numbered as columns of the table, 0 is the index.
+@dataclasses.dataclass(frozen=True)
+class Condition:
+    column: int | None
+    operator: str
+    value: t.Any = None
+
+@dataclasses.dataclass(frozen=True)
+class RowFilter:
+    expression: str
+    conditions: tuple[Condition, ...]
+
+_COMPARISONS: dict[str, t.Callable[[t.Any, t.Any], t.Any]] = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '>': operator.gt,
+}
+_MISSING = 'missing'
+_PRESENT = 'present'
+
+_AND_PATTERN = re.compile(r'\s+and\s+', re.IGNORECASE)
+_MISSING_PATTERN = re.compile(r'^(?P<column>.+?)\s+is\s+(?P<negation>not\s+)?missing$', re.IGNORECASE)
+_COMPARISON_PATTERN = re.compile(r'^(?P<column>.+?)\s*(?P<operator>==|!=|<=|>=|<|>)\s*(?P<value>.+)$')
+_ANY_MISSING_EXPRESSIONS = ('missing', 'any missing', 'any is missing')
+
+# filters and orders kept for switching between them without evaluating them again
+_MAX_CACHED_ORDERS = 8
+
+# Parses filters of conditions joined by `and`, each condition is one of:
+#   `temp > 80`, `time >= 2024-01-01 12:00` - comparison of a column with a value (==, !=, <, <=, >, >=)
+#   `temp is missing`, `temp is not missing` - rows with (without) a missing value of a column
+#   `missing` - rows with a missing value in any column
+# Column names may be quoted with backticks. Raises ValueError for invalid expressions.
+def parse_filter(expression: str, data: pd.DataFrame, grid: TimeGrid) -> RowFilter:
+    expression = ' '.join(expression.split())
+    if len(expression) == 0:
+        raise ValueError('Filter is empty.')
+
+    return RowFilter(
+        expression,
+        tuple(_parse_condition(x, data, grid) for x in _AND_PATTERN.split(expression)))
+
+# Grid slots in [`start`, `stop`) passing all conditions of `row_filter`, in time order. Missing slots
+# fail comparisons and pass conditions on missing values.
+def filter_slots(row_filter: RowFilter,
+                 data: pd.DataFrame,
+                 grid: TimeGrid,
+                 grid_positions: np.ndarray,
+                 start: int = 0,
+                 stop: int | None = None) -> np.ndarray:
+    stop = len(grid) if stop is None else stop
+    first_row, last_row = np.searchsorted(grid_positions, (start, stop))
+    slots = np.arange(start, stop)
+
+    row_offsets = grid_positions[first_row:last_row] - start
+
+    return slots[_evaluate_filter(row_filter, data.iloc[first_row:last_row], grid, slots, row_offsets)]
+
+# Mask of grid `slots` in any order passing all conditions of `row_filter`.
+def match_slots(row_filter: RowFilter,
+                data: pd.DataFrame,
+                grid: TimeGrid,
+                grid_positions: np.ndarray,
+                slots: np.ndarray) -> np.ndarray:
+    rows, is_observed = get_observed_rows(slots, grid_positions)
+    return _evaluate_filter(row_filter, data.iloc[rows[is_observed]], grid, slots, np.flatnonzero(is_observed))
+
+# Orders grid `slots` by values of a table column, slots without a value are placed last in time order.
+# Raises ValueError if values of the column can't be compared.
+def sort_slots(slots: np.ndarray,
+               column: int,
+               descending: bool,
+               data: pd.DataFrame,
+               grid_positions: np.ndarray) -> np.ndarray:
+    # grid slots are ordered by time already
+    if column == 0:
+        return slots[::-1].copy() if descending else slots
+
+    rows, is_observed = get_observed_rows(slots, grid_positions)
+    values = data.iloc[rows[is_observed], column - 1].reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+    except TypeError as e:
+        raise ValueError(f'Values of column "{data.columns[column - 1]}" can\'t be sorted: {e}') from e
+
+    return np.concatenate((slots[is_observed][order], slots[~is_observed]))
+
+# Rows of observed `slots` and a mask of them, rows of slots without an observed row are arbitrary.
+def get_observed_rows(slots: np.ndarray, grid_positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    if len(grid_positions) == 0:
+        return np.zeros(len(slots), dtype=np.int64), np.zeros(len(slots), dtype=np.bool_)
+
+    # binary searches of sorted keys walk the positions in order, random ones (slots of a sorted
+    # table) miss the cache on every step, sorting them first is several times faster
+    if len(slots) > 1 and np.any(slots[1:] < slots[:-1]):
+        order = np.argsort(slots)
+        rows = np.empty(len(slots), dtype=np.int64)
+        rows[order] = np.searchsorted(grid_positions, slots[order])
+    else:
+        rows = np.searchsorted(grid_positions, slots)
+
+    rows = np.minimum(rows, len(grid_positions) - 1)
+    return rows, grid_positions[rows] == slots
+
+# LRU cache of row orders (arrays of grid slots), keyed by the filter expression and sort of each.
+class RowOrderCache:
+    def __init__(self, max_orders: int = _MAX_CACHED_ORDERS) -> None:
+        self.max_orders = max_orders
+
+        self._orders = collections.OrderedDict[t.Hashable, np.ndarray]()
+
+    def get(self, key: t.Hashable, create_fn: t.Callable[[], np.ndarray]) -> np.ndarray:
+        order = self._orders.get(key)
+        if order is not None:
+            self._orders.move_to_end(key)
+            return order
+
+        order = create_fn()
+        self._orders[key] = order
+        while len(self._orders) > self.max_orders:
+            self._orders.popitem(last=False)
+
+        return order
+
+    def invalidate(self) -> None:
+        self._orders.clear()
+
+def _parse_condition(text: str, data: pd.DataFrame, grid: TimeGrid) -> Condition:
+    if text.lower() in _ANY_MISSING_EXPRESSIONS:
+        return Condition(None, _MISSING)
+
+    if (match := _MISSING_PATTERN.match(text)) is not None:
+        return Condition(
+            _get_column(match['column'], data),
+            _PRESENT if match['negation'] is not None else _MISSING)
+
+    if (match := _COMPARISON_PATTERN.match(text)) is not None:
+        column = _get_column(match['column'], data)
+        dtype = data.index.dtype if column == 0 else data.dtypes.iloc[column - 1]
+        tz = grid.start.tz if column == 0 else getattr(dtype, 'tz', None)
+
+        return Condition(column, match['operator'], _parse_value(match['value'], dtype, tz))
+
+    raise ValueError(f'Invalid filter condition "{text}", e.g. "temp > 80" or "temp is missing" expected.')
+
+def _get_column(name: str, data: pd.DataFrame) -> int:
+    name = name.strip().strip('`')
+    if name == (data.index.name or 'index'):
+        return 0
+
+    columns = np.flatnonzero(data.columns.astype(str) == name)
+    if len(columns) == 0:
+        raise ValueError(f'Unknown column "{name}".')
+
+    return int(columns[0]) + 1
+
+def _parse_value(text: str, dtype: t.Any, tz: t.Any) -> t.Any:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '\'"':
+        text = text[1:-1]
+
+    try:
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            timestamp = pd.Timestamp(text)
+            if tz is not None and timestamp.tz is None:
+                return timestamp.tz_localize(tz)
+
+            return timestamp
+
+        if pd.api.types.is_bool_dtype(dtype):
+            return {'true': True, 'false': False}[text.lower()]
+
+        if pd.api.types.is_numeric_dtype(dtype):
+            return float(text)
+    except (KeyError, ValueError) as e:
+        raise ValueError(f'Invalid value "{text}" for a column of type {dtype}.') from e
+
+    return text
+
+# `rows` are the observed rows of `slots`, `row_offsets` are their indices in `slots`.
+def _evaluate_filter(row_filter: RowFilter,
+                     rows: pd.DataFrame,
+                     grid: TimeGrid,
+                     slots: np.ndarray,
+                     row_offsets: np.ndarray) -> np.ndarray:
+    mask = np.ones(len(slots), dtype=np.bool_)
+    for condition in row_filter.conditions:
+        mask &= _evaluate_condition(condition, rows, grid, slots, row_offsets)
+
+    return mask
+
+def _evaluate_condition(condition: Condition,
+                        rows: pd.DataFrame,
+                        grid: TimeGrid,
+                        slots: np.ndarray,
+                        row_offsets: np.ndarray) -> np.ndarray:
+    # every slot has a timestamp, observed or not
+    if condition.column == 0:
+        if condition.operator in (_MISSING, _PRESENT):
+            return np.full(len(slots), condition.operator == _PRESENT)
+
+        timestamps = grid.start.value + slots.astype(np.int64) * grid.freq.value
+        return _COMPARISONS[condition.operator](timestamps, condition.value.value)
+
+    if condition.column is None:
+        is_missing = rows.isnull().any(axis=1).to_numpy()
+    else:
+        is_missing = rows.iloc[:, condition.column - 1].isnull().to_numpy()
+
+    if condition.operator in (_MISSING, _PRESENT):
+        mask = np.ones(len(slots), dtype=np.bool_)
+        mask[row_offsets] = is_missing
+        return mask if condition.operator == _MISSING else ~mask
+
+    assert condition.column is not None
+
+    values = rows.iloc[:, condition.column - 1]
+    try:
+        result = _COMPARISONS[condition.operator](values, condition.value)
+    except TypeError as e:
+        raise ValueError(f'Values of column "{values.name}" can\'t be compared with "{condition.value}": {e}') from e
+
+    mask = np.zeros(len(slots), dtype=np.bool_)
+    mask[row_offsets] = result.to_numpy(dtype=np.bool_, na_value=False) & ~is_missing
+
+    return mask
@@ -0,0 +1,120 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_GRID_FREQUENCY = pd.Timedelta(minutes=1)
+
+# Describes a regular datetime grid without materializing its index. Positions are
+# zero-based slot numbers counted from `start` in steps of `freq`.
+@dataclasses.dataclass(frozen=True)
+class TimeGrid:
+    start: pd.Timestamp
+    freq: pd.Timedelta
+    length: int
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def end(self) -> pd.Timestamp:
+        return self.start + self.freq * max(self.length - 1, 0)
+
+    def get_positions(self, timestamps: pd.DatetimeIndex) -> np.ndarray:
+        return (timestamps.as_unit('ns').asi8 - self.start.value) // self.freq.value
+
+    def get_position(self, timestamp: pd.Timestamp) -> int:
+        return (timestamp.value - self.start.value) // self.freq.value
+
+    def get_timestamp(self, position: int) -> pd.Timestamp:
+        return self.start + self.freq * position
+
+    def get_timestamps(self, positions: np.ndarray) -> pd.DatetimeIndex:
+        values = self.start.value + np.asarray(positions, dtype=np.int64) * self.freq.value
+        index = pd.DatetimeIndex(values.astype('datetime64[ns]'))
+        if self.start.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.start.tz)
+
+        return index
+
+    def get_unix_timestamps(self, positions: np.ndarray) -> np.ndarray:
+        return (self.start.value + np.asarray(positions, dtype=np.int64) * self.freq.value) / 1e9
+
+    def to_index(self, start: int = 0, stop: int | None = None) -> pd.DatetimeIndex:
+        stop = self.length if stop is None else min(stop, self.length)
+        return self.get_timestamps(np.arange(start, stop))
+
+def parse_grid_frequency(value: str) -> pd.Timedelta:
+    return pd.Timedelta(pd.tseries.frequencies.to_offset(value))
+
+def infer_grid_frequency(index: pd.DatetimeIndex) -> pd.Timedelta:
+    # the most common step between consecutive timestamps is robust to gaps and jitter
+    steps = np.diff(index.as_unit('ns').asi8)
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return DEFAULT_GRID_FREQUENCY
+
+    values, counts = np.unique(steps, return_counts=True)
+    return pd.Timedelta(int(values[counts.argmax()]), unit='ns')
+
+# Returns the observed rows (sorted, one row per grid slot), the grid spanning them and grid
+# positions of the rows. Timestamps between grid slots are assigned to the preceding slot.
+def align_to_grid(data: pd.DataFrame, freq: pd.Timedelta | None = None) -> tuple[pd.DataFrame, TimeGrid, np.ndarray]:
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError('Index column has to contain datetime values.')
+
+    rows, grid, positions = align_index_to_grid(data.index, freq)
+    if rows is not None:
+        data = data.iloc[rows]
+
+    return data, grid, positions
+
+# Same as `align_to_grid`, but only for the index. Returns the rows to keep in their new order,
+# or None when the index is already aligned, so large frames can be reordered outside of memory.
+def align_index_to_grid(index: pd.DatetimeIndex,
+                        freq: pd.Timedelta | None = None) -> tuple[np.ndarray | None, TimeGrid, np.ndarray]:
+    rows: np.ndarray | None = None
+    if index.hasnans:
+        rows = np.flatnonzero(index.notna())
+        index = index[rows]
+
+    if not index.is_monotonic_increasing:
+        order = index.argsort(kind='stable')
+        rows = order if rows is None else rows[order]
+        index = index[order]
+
+    if freq is None:
+        freq = infer_grid_frequency(index)
+
+    if len(index) == 0:
+        return rows, TimeGrid(pd.Timestamp(0), freq, 0), np.empty(0, dtype=np.int64)
+
+    grid_start = index[0]
+    positions = (index.as_unit('ns').asi8 - grid_start.value) // freq.value
+
+    is_duplicated = np.zeros(len(positions), dtype=np.bool_)
+    is_duplicated[1:] = positions[1:] == positions[:-1]
+    if is_duplicated.any():
+        rows = np.flatnonzero(~is_duplicated) if rows is None else rows[~is_duplicated]
+        positions = positions[~is_duplicated]
+
+    return rows, TimeGrid(grid_start, freq, int(positions[-1]) + 1), positions
+
+# Same as `align_index_to_grid`, but for rows appended after the end of an existing grid. Returns the
+# rows to keep in their new order and their positions, rows at or before the last slot of the grid
+# are dropped, so rows read twice are harmless.
+def align_appended_index(index: pd.DatetimeIndex, grid: TimeGrid) -> tuple[np.ndarray, np.ndarray]:
+    rows = np.flatnonzero(index.notna())
+    index = index[rows]
+
+    if not index.is_monotonic_increasing:
+        order = index.argsort(kind='stable')
+        rows = rows[order]
+        index = index[order]
+
+    positions = grid.get_positions(index)
+
+    is_kept = positions >= grid.length
+    is_kept[1:] &= positions[1:] != positions[:-1]
+
+    return rows[is_kept], positions[is_kept]
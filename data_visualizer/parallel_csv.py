@@ -0,0 +1,236 @@
+import collections
+import concurrent.futures
+import dataclasses
+import io
+import mmap
+import multiprocessing
+import os
+import threading
+import typing as t
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from data_visualizer.qt_job import JobContext
+
+DEFAULT_PARSE_PROCESSES = os.cpu_count() or 1
+
+# smaller files are parsed faster than the worker processes get the work
+_MIN_PARALLEL_SIZE = 16 * 1024 * 1024
+_MIN_RANGE_SIZE = 4 * 1024 * 1024
+# bounds memory of out-of-core imports, which hold at most two ranges per process
+_MAX_RANGE_SIZE = 64 * 1024 * 1024
+_RANGES_PER_PROCESS = 4
+_QUOTE_CHAR = b'"'
+_FORMAT_SAMPLE_ROWS = 100
+
+# Workers are spawned instead of forked, forking a process running Qt threads isn't safe.
+# Pools are shared by all imports, so several files are parsed at once by the same processes.
+_process_pools = dict[int, concurrent.futures.ProcessPoolExecutor]()
+_process_pools_lock = threading.Lock()
+
+# Column buffer placed in shared memory by a worker. The receiving process unlinks it and keeps it
+# mapped as the column's array, so parsed values are never copied out of it.
+@dataclasses.dataclass(frozen=True)
+class _SharedArray:
+    name: str
+    dtype: str
+    length: int
+
+# Numeric, boolean and naive datetime buffers are shared, other values (strings, timezone
+# aware datetimes, non-datetime index) are pickled.
+@dataclasses.dataclass(frozen=True)
+class _ParsedRange:
+    columns: pd.Index
+    index: _SharedArray | pd.Index
+    index_name: t.Hashable
+    values: list[_SharedArray | pd.Series]
+
+# Ranges are split on line ends, a quoted value might contain a line end, so such files are
+# parsed sequentially.
+def can_parse_in_parallel(filepath: str, read_kwargs: dict[str, t.Any]) -> bool:
+    if os.path.getsize(filepath) < _MIN_PARALLEL_SIZE:
+        return False
+
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(b'\n') != -1 and mm.find(_QUOTE_CHAR) == -1
+
+# Parses byte ranges of the file in worker processes, yielding them as frames in file order.
+# The same dtype inference applies as to chunks of `iter_csv_chunks`.
+def iter_csv_ranges(filepath: str,
+                    read_kwargs: dict[str, t.Any],
+                    processes: int,
+                    context: JobContext | None = None) -> t.Iterator[pd.DataFrame]:
+    if read_kwargs['date_format'] is None:
+        # a single pass guesses the format from the first date, ranges would guess it from their own
+        # first dates, which sometimes fails and falls back to parsing each date separately
+        read_kwargs = read_kwargs | dict(date_format=_guess_index_format(filepath, read_kwargs))
+
+    has_header = read_kwargs['header'] == 0 or (read_kwargs['header'] == 'infer' and read_kwargs['names'] is None)
+    header_end, ranges = _split_byte_ranges(filepath, has_header, processes)
+    total_bytes = os.path.getsize(filepath)
+    pool = _get_process_pool(processes)
+    pending = collections.deque[tuple[concurrent.futures.Future[_ParsedRange], int]]()
+    next_range = 0
+    processed_rows = 0
+    is_empty = True
+
+    try:
+        while next_range < len(ranges) or len(pending) > 0:
+            while next_range < len(ranges) and len(pending) < 2 * processes:
+                start, end = ranges[next_range]
+                pending.append((pool.submit(_parse_range, filepath, header_end, start, end, read_kwargs), end))
+                next_range += 1
+
+            future, end = pending.popleft()
+            chunk = _receive_range(_get_result(processes, future))
+            if chunk.shape[0] > 0:
+                is_empty = False
+                processed_rows += chunk.shape[0]
+                yield chunk
+
+            del chunk
+            if context is not None:
+                context.report_progress(end, total_bytes, processed_rows)
+                context.check_cancelled()
+    finally:
+        # buffers of ranges nobody will receive are released as soon as they're parsed
+        for future, _ in pending:
+            if not future.cancel():
+                future.add_done_callback(_release_future)
+
+    if is_empty:
+        yield pd.read_csv(filepath, **read_kwargs)
+
+def shutdown_process_pools() -> None:
+    with _process_pools_lock:
+        for pool in _process_pools.values():
+            pool.shutdown(cancel_futures=True)
+
+        _process_pools.clear()
+
+def _get_process_pool(processes: int) -> concurrent.futures.ProcessPoolExecutor:
+    with _process_pools_lock:
+        if (pool := _process_pools.get(processes)) is None:
+            pool = concurrent.futures.ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+            _process_pools[processes] = pool
+
+        return pool
+
+def _get_result(processes: int, future: concurrent.futures.Future[_ParsedRange]) -> _ParsedRange:
+    try:
+        return future.result()
+    except concurrent.futures.process.BrokenProcessPool:
+        # a worker died (e.g. killed when out of memory), the next import starts a new pool
+        with _process_pools_lock:
+            _process_pools.pop(processes, None)
+
+        raise
+
+def _guess_index_format(filepath: str, read_kwargs: dict[str, t.Any]) -> str | None:
+    sample = pd.read_csv(filepath, nrows=_FORMAT_SAMPLE_ROWS, **(read_kwargs | dict(parse_dates=False)))
+    values = sample.index.dropna()
+    if len(values) == 0 or not isinstance(values[0], str):
+        return None
+
+    return guess_datetime_format(values[0])
+
+def _split_byte_ranges(filepath: str, has_header: bool, processes: int) -> tuple[int, list[tuple[int, int]]]:
+    size = os.path.getsize(filepath)
+    ranges = list[tuple[int, int]]()
+
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = mm.find(b'\n') + 1 if has_header else 0
+        range_size = min(max((size - header_end) // (processes * _RANGES_PER_PROCESS), _MIN_RANGE_SIZE), _MAX_RANGE_SIZE)
+
+        start = header_end
+        while start < size:
+            end = mm.find(b'\n', min(start + range_size, size))
+            end = size if end == -1 else end + 1
+            ranges.append((start, end))
+            start = end
+
+    return header_end, ranges
+
+def _parse_range(filepath: str, header_end: int, start: int, end: int, read_kwargs: dict[str, t.Any]) -> _ParsedRange:
+    with open(filepath, 'rb') as f:
+        header = f.read(header_end)
+        f.seek(start)
+        body = f.read(end - start)
+
+    chunk = pd.read_csv(io.BytesIO(header + body), **read_kwargs)
+    del body
+
+    index: _SharedArray | pd.Index = chunk.index
+    if isinstance(chunk.index, pd.DatetimeIndex) and chunk.index.tz is None:
+        index = _share_array(chunk.index.to_numpy())
+
+    return _ParsedRange(
+        chunk.columns,
+        index,
+        chunk.index.name,
+        [_share_column(chunk.iloc[:, i]) for i in range(chunk.shape[1])])
+
+def _share_column(column: pd.Series) -> _SharedArray | pd.Series:
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'biufcM':
+        return _share_array(column.to_numpy())
+
+    return column
+
+def _share_array(values: np.ndarray) -> _SharedArray:
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        view = np.ndarray(values.shape, values.dtype, buffer=shm.buf)
+        view[:] = values
+        del view
+    finally:
+        shm.close()
+
+    return _SharedArray(shm.name, values.dtype.str, len(values))
+
+def _receive_range(parsed: _ParsedRange) -> pd.DataFrame:
+    try:
+        index = parsed.index
+        if isinstance(index, _SharedArray):
+            index = pd.DatetimeIndex(_receive_array(index), name=parsed.index_name)
+
+        data = {
+            i: _receive_array(x) if isinstance(x, _SharedArray) else x.array
+            for i, x in enumerate(parsed.values)}
+    finally:
+        # buffers not received because of an error are released as well
+        _release_range(parsed)
+
+    chunk = pd.DataFrame(data, index=index, copy=False)
+    chunk.columns = parsed.columns
+    return chunk
+
+def _receive_array(shared: _SharedArray) -> np.ndarray:
+    shm = shared_memory.SharedMemory(shared.name)
+    # the name goes right away, the memory itself is released once the array is unmapped
+    shm.unlink()
+
+    values = np.ndarray((shared.length,), np.dtype(shared.dtype), buffer=shm.buf)
+    weakref.finalize(values, shm.close)
+    return values
+
+def _release_range(parsed: _ParsedRange) -> None:
+    for shared in (parsed.index, *parsed.values):
+        if not isinstance(shared, _SharedArray):
+            continue
+
+        try:
+            shm = shared_memory.SharedMemory(shared.name)
+        except FileNotFoundError:
+            # already received
+            continue
+
+        shm.close()
+        shm.unlink()
+
+def _release_future(future: concurrent.futures.Future[_ParsedRange]) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _release_range(future.result())
@@ -0,0 +1,102 @@
+import contextlib
+import cProfile
+import dataclasses
+import datetime
+import os
+import re
+import sys
+import time
+import typing as t
+
+from PyQt6.QtCore import QSettings, QStandardPaths
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, peak memory is reported as unknown there
+    resource = None # type: ignore[assignment]
+
+_T = t.TypeVar('_T')
+
+# Measurements of a single named stage. CPU time is the time of the thread that ran the stage,
+# peak memory delta is how much the stage raised the peak resident memory of the process.
+@dataclasses.dataclass(frozen=True)
+class StageTiming:
+    name: str
+    finished_at: datetime.datetime
+    wall_time: float
+    cpu_time: float
+    peak_memory_delta: int | None
+
+def get_peak_memory() -> int | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in kilobytes everywhere except macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@contextlib.contextmanager
+def measure_stage(name: str, on_measured: t.Callable[[StageTiming], None]) -> t.Iterator[None]:
+    peak_memory_start = get_peak_memory()
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.thread_time() - cpu_start
+        peak_memory_end = get_peak_memory()
+
+        on_measured(StageTiming(
+            name,
+            datetime.datetime.now(),
+            wall_time,
+            cpu_time,
+            None if peak_memory_start is None or peak_memory_end is None else peak_memory_end - peak_memory_start))
+
+# Runs `fn` under cProfile and writes the statistics to `filepath`, they can be inspected with
+# `python -m pstats` or snakeviz.
+def run_profiled(fn: t.Callable[[], _T], filepath: str) -> _T:
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # since Python 3.12 only a single profiler can be active at a time, the job runs unprofiled
+        return fn()
+
+    try:
+        return fn()
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        profile.dump_stats(filepath)
+
+def get_profile_directory() -> str:
+    directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+    return os.path.join(directory, 'profiles')
+
+# Returns where a profile of the job should be written, None when profiling is disabled.
+def get_job_profile_path(settings: QSettings, job_name: str) -> str | None:
+    if not settings.value('profile_jobs', False, bool):
+        return None
+
+    safe_name = re.sub(r'[^\w.-]', '_', job_name)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return os.path.join(get_profile_directory(), f'{safe_name}_{timestamp}.prof')
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1.0:
+        return f'{seconds * 1_000:.1f} ms'
+
+    return f'{seconds:.2f} s'
+
+def format_memory_delta(size: int | None) -> str:
+    if size is None:
+        return '-'
+
+    return f'+{size / 1_000_000:.1f} MB'
+
+def format_timing(timing: StageTiming) -> str:
+    return (f'{timing.name}: {format_duration(timing.wall_time)}'
+            f' (CPU {format_duration(timing.cpu_time)}, peak memory {format_memory_delta(timing.peak_memory_delta)})')
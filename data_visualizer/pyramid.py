@@ -0,0 +1,250 @@
+import dataclasses
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from data_visualizer.data_importer import ImporterSettings, get_settings_key
+from data_visualizer.decimation import (LOD_POINTS_PER_PIXEL,
+                                        decimate_min_max, get_visible_slice,
+                                        insert_breaks)
+from data_visualizer.models.appendable_frame import GrowableArray
+from data_visualizer.models.time_grid import TimeGrid
+
+PYRAMID_BUCKETS = (
+    pd.Timedelta(minutes=1),
+    pd.Timedelta(minutes=10),
+    pd.Timedelta(hours=1),
+    pd.Timedelta(days=1))
+PYRAMID_FILE_SUFFIX = '.pyramid.npz'
+_PYRAMID_VERSION = 2
+
+# Aggregates of all columns over buckets of equal length. Only buckets containing at least one
+# observed row are stored, `starts` holds their unix timestamps (the same for all columns).
+@dataclasses.dataclass(frozen=True)
+class PyramidLevel:
+    bucket: pd.Timedelta
+    starts: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    total: np.ndarray
+    count: np.ndarray
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total / self.count
+
+    def get_lod_data(self, column_idx: int, x_min: float, x_max: float, width_px: int) -> tuple[np.ndarray, np.ndarray]:
+        visible = get_visible_slice(self.starts, x_min, x_max)
+        starts = self.starts[visible]
+
+        x = np.repeat(starts, 2)
+        y = np.empty(len(x), dtype=np.float64)
+        y[0::2] = self.minimum[visible, column_idx]
+        y[1::2] = self.maximum[visible, column_idx]
+
+        if len(x) > LOD_POINTS_PER_PIXEL * width_px:
+            return decimate_min_max(x, y, x_min, x_max, width_px)
+
+        # buckets without any observed rows are not stored, mark them as breaks in the line
+        break_idx = np.flatnonzero(np.diff(starts) > self.bucket.total_seconds()) + 1
+        return insert_breaks(x, y, 2 * break_idx, starts[break_idx - 1] + self.bucket.total_seconds())
+
+@dataclasses.dataclass(frozen=True)
+class Pyramid:
+    columns: list[str]
+    levels: list[PyramidLevel]
+
+    def get_level(self, seconds_per_pixel: float) -> PyramidLevel | None:
+        # the coarsest level which still has at least one bucket per pixel
+        matching = [x for x in self.levels if x.bucket.total_seconds() <= seconds_per_pixel]
+        if len(matching) == 0:
+            return None
+
+        return matching[-1]
+
+# Pyramid extended by rows appended after its last bucket. Levels are kept in growable arrays and
+# only appended rows are aggregated, the last stored bucket of a level is merged with the first
+# bucket of appended rows if they share it.
+class AppendablePyramid:
+    def __init__(self, pyramid: Pyramid) -> None:
+        self._columns = pyramid.columns
+        self._buckets = [x.bucket for x in pyramid.levels]
+        self._levels = [
+            [GrowableArray(x.starts), GrowableArray(x.minimum), GrowableArray(x.maximum), GrowableArray(x.total), GrowableArray(x.count)]
+            for x in pyramid.levels]
+
+    @property
+    def pyramid(self) -> Pyramid:
+        return Pyramid(
+            self._columns,
+            [PyramidLevel(bucket, *(x.values for x in arrays)) for bucket, arrays in zip(self._buckets, self._levels)])
+
+    def append(self, data: pd.DataFrame, grid: TimeGrid, grid_positions: np.ndarray) -> None:
+        timestamps = grid.start.value + grid_positions * grid.freq.value
+        for bucket, arrays in zip(self._buckets, self._levels):
+            appended = _aggregate_rows(bucket, timestamps, data)
+            if len(appended.starts) == 0:
+                continue
+
+            starts, minimum, maximum, total, count = arrays
+            aggregates = [appended.starts, appended.minimum, appended.maximum, appended.total, appended.count]
+            if len(starts) > 0 and starts.values[-1] == appended.starts[0]:
+                last = len(starts) - 1
+                aggregates[1][0] = np.fmin(aggregates[1][0], minimum.values[last])
+                aggregates[2][0] = np.fmax(aggregates[2][0], maximum.values[last])
+                aggregates[3][0] += total.values[last]
+                aggregates[4][0] += count.values[last]
+
+                for x in arrays:
+                    x.truncate(last)
+
+            for x, values in zip(arrays, aggregates):
+                x.append(values)
+
+def get_pyramid_filepath(filepath: str) -> str:
+    return filepath + PYRAMID_FILE_SUFFIX
+
+def build_pyramid(data: pd.DataFrame, grid: TimeGrid, grid_positions: np.ndarray) -> Pyramid:
+    timestamps = grid.start.value + grid_positions * grid.freq.value
+
+    levels = list[PyramidLevel]()
+    level = _aggregate_rows(PYRAMID_BUCKETS[0], timestamps, data)
+    levels.append(level)
+
+    # coarser levels are aggregated from the previous level instead of raw rows
+    for bucket in PYRAMID_BUCKETS[1:]:
+        level = _aggregate_level(bucket, level)
+        levels.append(level)
+
+    return Pyramid([str(x) for x in data.columns], levels)
+
+# The pyramid file is only loaded back for the same file, import settings and grid frequency.
+def save_pyramid(pyramid: Pyramid, settings: ImporterSettings, grid: TimeGrid) -> None:
+    filepath = settings.filepath
+    stat = os.stat(filepath)
+    arrays = dict[str, np.ndarray]()
+    for i, level in enumerate(pyramid.levels):
+        arrays[f'bucket_{i}'] = np.array(level.bucket.value)
+        arrays[f'starts_{i}'] = level.starts
+        arrays[f'minimum_{i}'] = level.minimum
+        arrays[f'maximum_{i}'] = level.maximum
+        arrays[f'total_{i}'] = level.total
+        arrays[f'count_{i}'] = level.count
+
+    # write to a temporary file first, so a crash never leaves a partial pyramid behind
+    pyramid_filepath = get_pyramid_filepath(filepath)
+    tmp_filepath = pyramid_filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        np.savez(
+            f,
+            version=np.array(_PYRAMID_VERSION),
+            source_path=np.array(os.path.abspath(filepath)),
+            source_mtime=np.array(stat.st_mtime_ns),
+            source_size=np.array(stat.st_size),
+            settings_key=np.array(get_settings_key(settings)),
+            grid_freq=np.array(grid.freq.value),
+            columns=np.array(pyramid.columns, dtype=np.str_),
+            levels_count=np.array(len(pyramid.levels)),
+            **arrays)
+
+    os.replace(tmp_filepath, pyramid_filepath)
+
+def load_pyramid(settings: ImporterSettings, grid: TimeGrid) -> Pyramid | None:
+    filepath = settings.filepath
+    pyramid_filepath = get_pyramid_filepath(filepath)
+    if not os.path.exists(pyramid_filepath):
+        return None
+
+    try:
+        stat = os.stat(filepath)
+        with np.load(pyramid_filepath) as f:
+            if (int(f['version']) != _PYRAMID_VERSION
+                or str(f['source_path']) != os.path.abspath(filepath)
+                or int(f['source_mtime']) != stat.st_mtime_ns
+                or int(f['source_size']) != stat.st_size
+                or str(f['settings_key']) != get_settings_key(settings)
+                or int(f['grid_freq']) != grid.freq.value):
+                return None
+
+            return Pyramid(
+                f['columns'].tolist(),
+                [
+                    PyramidLevel(
+                        pd.Timedelta(int(f[f'bucket_{i}']), unit='ns'),
+                        f[f'starts_{i}'],
+                        f[f'minimum_{i}'],
+                        f[f'maximum_{i}'],
+                        f[f'total_{i}'],
+                        f[f'count_{i}'])
+                    for i in range(int(f['levels_count']))])
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # damaged pyramid file, it's removed and built again
+        try:
+            os.remove(pyramid_filepath)
+        except OSError:
+            pass
+
+        return None
+
+def load_or_build_pyramid(settings: ImporterSettings, data: pd.DataFrame, grid: TimeGrid, grid_positions: np.ndarray) -> Pyramid:
+    pyramid = load_pyramid(settings, grid)
+    if pyramid is not None and pyramid.columns == [str(x) for x in data.columns]:
+        return pyramid
+
+    pyramid = build_pyramid(data, grid, grid_positions)
+    try:
+        save_pyramid(pyramid, settings, grid)
+    except OSError:
+        # source directory might be read-only, the pyramid is still usable for this session
+        pass
+
+    return pyramid
+
+def _get_bucket_starts(bucket: pd.Timedelta, timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    bucket_ids = timestamps // bucket.value
+    is_first = np.ones(len(bucket_ids), dtype=np.bool_)
+    is_first[1:] = bucket_ids[1:] != bucket_ids[:-1]
+
+    first_rows = np.flatnonzero(is_first)
+    return first_rows, bucket_ids[first_rows] * bucket.value
+
+def _aggregate_rows(bucket: pd.Timedelta, timestamps: np.ndarray, data: pd.DataFrame) -> PyramidLevel:
+    first_rows, starts = _get_bucket_starts(bucket, timestamps)
+    aggregates = np.empty((4, len(first_rows), data.shape[1]), dtype=np.float64)
+    if len(first_rows) == 0:
+        return PyramidLevel(bucket, np.empty(0), *aggregates[:3], aggregates[3].astype(np.int64))
+
+    # columns are converted one at a time, so a memory-mapped frame is never loaded as a whole
+    for i in range(data.shape[1]):
+        values = pd.to_numeric(data.iloc[:, i], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        is_finite = ~np.isnan(values)
+
+        aggregates[0, :, i] = np.fmin.reduceat(values, first_rows)
+        aggregates[1, :, i] = np.fmax.reduceat(values, first_rows)
+        aggregates[2, :, i] = np.add.reduceat(np.where(is_finite, values, 0.0), first_rows)
+        aggregates[3, :, i] = np.add.reduceat(is_finite, first_rows, dtype=np.int64)
+
+    return PyramidLevel(
+        bucket,
+        starts / 1e9,
+        aggregates[0],
+        aggregates[1],
+        aggregates[2],
+        aggregates[3].astype(np.int64))
+
+def _aggregate_level(bucket: pd.Timedelta, level: PyramidLevel) -> PyramidLevel:
+    timestamps = np.round(level.starts * 1e9).astype(np.int64)
+    first_rows, starts = _get_bucket_starts(bucket, timestamps)
+    if len(first_rows) == 0:
+        return dataclasses.replace(level, bucket=bucket)
+
+    return PyramidLevel(
+        bucket,
+        starts / 1e9,
+        np.fmin.reduceat(level.minimum, first_rows, axis=0),
+        np.fmax.reduceat(level.maximum, first_rows, axis=0),
+        np.add.reduceat(level.total, first_rows, axis=0),
+        np.add.reduceat(level.count, first_rows, axis=0))
@@ -1,13 +1,68 @@
+import threading
 import typing as t
 
 from PyQt6.QtCore import QObject, QRunnable, pyqtBoundSignal, pyqtSignal
 
+from data_visualizer.profiling import StageTiming, measure_stage, run_profiled
+
 TReturn = t.TypeVar('TReturn')
 TParams = t.ParamSpec('TParams')
 
+class JobCancelledError(Exception):
+    pass
+
 class JobSignals(QObject):
+    started = pyqtSignal()
     error = pyqtSignal(Exception)
     finished = pyqtSignal(object)
+    # processed bytes, total bytes, processed rows
+    progress = pyqtSignal(int, int, int)
+    cancelled = pyqtSignal()
+    # StageTiming of a named stage inside the job
+    stage_finished = pyqtSignal(object)
+    # StageTiming of the whole job, emitted before its result
+    timed = pyqtSignal(object)
+
+class JobContext:
+    def __init__(self, signals: JobSignals) -> None:
+        self._signals = signals
+        self._cancel_event = threading.Event()
+        self._is_done = False
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    # True once the job finished, failed or was cancelled
+    @property
+    def is_done(self) -> bool:
+        return self._is_done
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise JobCancelledError()
+
+    def report_progress(self, processed_bytes: int, total_bytes: int, processed_rows: int) -> None:
+        self._signals.progress.emit(processed_bytes, total_bytes, processed_rows)
+
+    def report_finished(self, result: t.Any) -> None:
+        self._is_done = True
+        self._signals.finished.emit(result)
+
+    def report_error(self, exc: Exception) -> None:
+        self._is_done = True
+        self._signals.error.emit(exc)
+
+    # Also reports jobs taken off the queue before they started, those never run.
+    def report_cancelled(self) -> None:
+        self._is_done = True
+        self._signals.cancelled.emit()
+
+    def stage(self, name: str) -> t.ContextManager[None]:
+        return measure_stage(name, self._signals.stage_finished.emit)
 
 class Job(QRunnable):
     def __init__(self,
@@ -18,9 +73,18 @@ class Job(QRunnable):
 
         self._signals = JobSignals()
 
+        self.context = JobContext(self._signals)
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
+        self.name = getattr(fn, '__name__', type(fn).__name__).lstrip('_')
+        # cProfile statistics of the job are written here when set
+        self.profile_path: str | None = None
+        self.timing: StageTiming | None = None
+
+    @property
+    def started(self) -> pyqtBoundSignal:
+        return self._signals.started
 
     @property
     def error(self) -> pyqtBoundSignal:
@@ -30,10 +94,64 @@ class Job(QRunnable):
     def finished(self) -> pyqtBoundSignal:
         return self._signals.finished
 
+    @property
+    def progress(self) -> pyqtBoundSignal:
+        return self._signals.progress
+
+    @property
+    def cancelled(self) -> pyqtBoundSignal:
+        return self._signals.cancelled
+
+    @property
+    def stage_finished(self) -> pyqtBoundSignal:
+        return self._signals.stage_finished
+
+    @property
+    def timed(self) -> pyqtBoundSignal:
+        return self._signals.timed
+
+    @property
+    def is_done(self) -> bool:
+        return self.context.is_done
+
+    def cancel(self) -> None:
+        self.context.cancel()
+
     def run(self) -> None:
+        # cancelled while still queued
+        if self.context.is_cancelled:
+            self.context.report_cancelled()
+            return
+
+        self.started.emit()
         try:
-            result = self.fn(*self.args, **self.kwargs)
+            with measure_stage(self.name, self._set_timing):
+                if self.profile_path is None:
+                    result = self._call()
+                else:
+                    result = run_profiled(self._call, self.profile_path)
+        except JobCancelledError:
+            self.context.report_cancelled()
         except Exception as exc:
-            self.error.emit(exc)
+            self.context.report_error(exc)
         else:
-            self.finished.emit(result)
+            self.context.report_finished(result)
+
+    def _call(self) -> t.Any:
+        return self.fn(*self.args, **self.kwargs)
+
+    def _set_timing(self, timing: StageTiming) -> None:
+        self.timing = timing
+        self.timed.emit(timing)
+
+# Passes the job's context as the first argument of the called function, so it can
+# report progress and stop early when cancelled.
+class ContextJob(Job):
+    def __init__(self,
+                 fn: t.Callable[t.Concatenate[JobContext, TParams], TReturn],
+                 *args: TParams.args,
+                 **kwargs: TParams.kwargs) -> None:
+        super().__init__(fn, *args, **kwargs) # type: ignore[arg-type]
+
+    def _call(self) -> t.Any:
+        return self.fn(self.context, *self.args, **self.kwargs)
@@ -0,0 +1,68 @@
+import os
+
+from PyQt6.QtCore import (QFileSystemWatcher, QObject, QTimer, pyqtSignal,
+                          pyqtSlot)
+
+from data_visualizer.models.pandas_model import PandasModel
+from data_visualizer.tail_reader import TailReader
+
+# writes following each other closer than this are read at once
+_READ_INTERVAL_MS = 100
+
+# Follows a file growing at its end, e.g. a log written by a running measurement, and appends rows
+# written to it to the model, which notifies table views and plots. Appended lines are few, so they're
+# parsed in the GUI thread, appends can't race with views reading the model.
+class TailFollower(QObject):
+    # number of grid slots appended to the model
+    rows_appended = pyqtSignal(int)
+    # following stops on errors, e.g. when the file is truncated
+    error = pyqtSignal(Exception)
+
+    def __init__(self, model: PandasModel, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+
+        assert model.importer_settings is not None
+
+        self.model = model
+        self.is_following = True
+
+        self._reader = TailReader(model.importer_settings, model.source_size)
+
+        self._read_timer = QTimer(self)
+        self._read_timer.setSingleShot(True)
+        self._read_timer.setInterval(_READ_INTERVAL_MS)
+        self._read_timer.timeout.connect(self._read)
+
+        self._watcher = QFileSystemWatcher([model.filepath], self)
+        self._watcher.fileChanged.connect(self._file_changed_cb)
+
+        # rows might have been written since the import
+        self._read_timer.start()
+
+    def stop(self) -> None:
+        self.is_following = False
+        self._read_timer.stop()
+        self._watcher.fileChanged.disconnect(self._file_changed_cb)
+
+    @pyqtSlot(str)
+    def _file_changed_cb(self, path: str) -> None:
+        # writers replacing the file (e.g. by renaming a new one over it) remove it from the watcher
+        if path not in self._watcher.files() and os.path.exists(path):
+            self._watcher.addPath(path)
+
+        # not restarted, so a file written continuously is still read every `_READ_INTERVAL_MS`
+        if not self._read_timer.isActive():
+            self._read_timer.start()
+
+    @pyqtSlot()
+    def _read(self) -> None:
+        try:
+            rows = self._reader.read()
+            appended = 0 if rows is None else self.model.append_rows(rows)
+        except (OSError, ValueError, OverflowError) as e:
+            self.stop()
+            self.error.emit(e)
+            return
+
+        if appended > 0:
+            self.rows_appended.emit(appended)
@@ -0,0 +1,136 @@
+import dataclasses
+import io
+import math
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from data_visualizer.column_store import ImportedData
+from data_visualizer.data_importer import (CSVEngine, ImporterSettings,
+                                           ImporterType, get_csv_read_kwargs)
+from data_visualizer.import_pipeline import (detect_settings,
+                                             get_fallback_settings)
+from data_visualizer.models.missing_ranges import truncate_missing_ranges
+
+# bytes searched backwards for the start of the line the reader starts in
+_MAX_LINE_SIZE = 64 * 1024
+# relative difference of numbers parsed from the same text, data optimized to float32 is rounded
+_VALUE_TOLERANCE = 1e-6
+
+# Reads rows appended to a file after it was imported, `offset` is the size of the file at the time.
+# Each read parses only the bytes written since the previous one, up to the last finished line, a line
+# still being written is parsed once it's finished. Rows are parsed by the C parser with the settings
+# of the import, the header line is parsed along with them, so columns are named the same way.
+class TailReader:
+    def __init__(self, settings: ImporterSettings, offset: int) -> None:
+        if settings.config.auto_detect:
+            settings = detect_settings(settings)
+
+        self.settings = dataclasses.replace(settings, config=dataclasses.replace(settings.config, engine=CSVEngine.C))
+        self.offset = offset
+
+        self._header: bytes | None = None
+
+    # Returns rows of lines finished since the previous read, None if there are none.
+    def read(self) -> pd.DataFrame | None:
+        filepath = self.settings.filepath
+        with open(filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.offset:
+                raise ValueError(f'File "{filepath}" was truncated, it can\'t be followed anymore.')
+
+            if self._header is None:
+                self._header = self._read_header(f)
+                self.offset = max(_get_line_start(f, self.offset), len(self._header))
+
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return None
+
+        self.offset += end
+        if len(data[:end].strip()) == 0:
+            return None
+
+        return self._parse(self._header + data[:end])
+
+    def _read_header(self, f: t.BinaryIO) -> bytes:
+        match self.settings:
+            case ImporterSettings(ImporterType.CSV, _, config):
+                # pandas takes the first line as the header unless column names are given
+                has_header = config.has_header if config.has_header is not None else config.column_settings is None
+                if not has_header:
+                    return b''
+
+        f.seek(0)
+        return f.readline()
+
+    def _parse(self, data: bytes) -> pd.DataFrame:
+        try:
+            return _read_csv(data, self.settings)
+        except (ValueError, OverflowError):
+            if (fallback_settings := get_fallback_settings(self.settings)) is None:
+                raise
+
+            return _read_csv(data, fallback_settings)
+
+# The file grew while it was imported, so its last line might have been imported half-written. That line
+# is read again up to the current end of the file, the last imported row is dropped unless the finished
+# line has the same values, `TailReader` started at `offset` (the size before the import) appends it then.
+def drop_unfinished_row(imported: ImportedData, settings: ImporterSettings, offset: int) -> ImportedData:
+    if len(imported.grid_positions) == 0:
+        return imported
+
+    last_row = imported.data.iloc[-1]
+    try:
+        rows = TailReader(settings, offset).read()
+    except (OSError, ValueError, OverflowError):
+        rows = None
+
+    if rows is not None and isinstance(rows.index, pd.DatetimeIndex) and rows.shape[1] == len(last_row):
+        rows = rows[rows.index.notna()]
+        matching = np.flatnonzero(imported.grid.get_positions(rows.index) == imported.grid_positions[-1])
+        if len(matching) > 0 and _is_same_row(last_row.tolist(), rows.iloc[matching[0]].tolist()):
+            return imported
+
+    grid_positions = imported.grid_positions[:-1]
+    grid = dataclasses.replace(imported.grid, length=int(grid_positions[-1]) + 1 if len(grid_positions) > 0 else 0)
+
+    return dataclasses.replace(
+        imported,
+        data=imported.data.iloc[:-1],
+        grid=grid,
+        grid_positions=grid_positions,
+        missing_ranges=truncate_missing_ranges(imported.missing_ranges, grid))
+
+def _is_same_row(values: list[t.Any], other_values: list[t.Any]) -> bool:
+    for value, other_value in zip(values, other_values):
+        if pd.isna(value) or pd.isna(other_value):
+            if not (pd.isna(value) and pd.isna(other_value)):
+                return False
+        elif isinstance(value, (int, float)) and isinstance(other_value, (int, float)):
+            if not math.isclose(value, other_value, rel_tol=_VALUE_TOLERANCE):
+                return False
+        elif value != other_value:
+            return False
+
+    return True
+
+def _read_csv(data: bytes, settings: ImporterSettings) -> pd.DataFrame:
+    match settings:
+        case ImporterSettings(ImporterType.CSV, _, config):
+            return pd.read_csv(io.BytesIO(data), **get_csv_read_kwargs(config))
+
+# The file might have been imported while its last line was being written, that line is read again.
+# Its row is dropped by `PandasModel.append_rows` if it was imported whole, a row imported half-written
+# is dropped from the import by `drop_unfinished_row`.
+def _get_line_start(f: t.BinaryIO, offset: int) -> int:
+    start = max(offset - _MAX_LINE_SIZE, 0)
+    f.seek(start)
+    data = f.read(offset - start)
+
+    return start + data.rstrip(b'\r\n').rfind(b'\n') + 1
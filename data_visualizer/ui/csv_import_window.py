@@ -4,14 +4,16 @@ import typing as t
 import pandas as pd
 from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
 from PyQt6.QtWidgets import (QAbstractButton, QButtonGroup, QComboBox,
-                             QFileDialog, QFrame, QLineEdit, QMainWindow,
-                             QPushButton, QRadioButton, QSpinBox, QTableView,
-                             QToolButton, QWidget)
+                             QFileDialog, QFrame, QLabel, QLineEdit,
+                             QMainWindow, QPushButton, QRadioButton, QSpinBox,
+                             QTableView, QToolButton, QWidget)
 
-from data_visualizer.data_importer import (DEFAULT_CSV_SEPARATOR,
+from data_visualizer.csv_detection import detect_csv_config, read_csv_preview
+from data_visualizer.data_importer import (DEFAULT_CSV_SEPARATOR, CSVEngine,
                                            CSVImporterConfig, ImporterSettings,
-                                           ImporterType)
+                                           ImporterType, is_pyarrow_available)
 from data_visualizer.models.column_settings_model import ColumnSettingsModel
 
 _AUTO_SETTINGS_BUTTON_IDX = 1 # FIXME Changing layout changes buttons indices get this another way
@@ -28,6 +30,10 @@ _PD_DATATYPES: list[tuple[str, type]] = sorted([
     ('Boolean', pd.BooleanDtype),
     ('Arrow', pd.ArrowDtype)],
     key=lambda x: x[0])
+_PREVIEW_ROWS = 20
+_ENGINES = [
+    ('pandas', CSVEngine.C),
+    ('PyArrow (multithreaded, Arrow-backed columns)', CSVEngine.PYARROW)]
 
 CSVImportWindowClass: t.TypeAlias = uic.load_ui.loadUiType('./assets/uis/import_csv.ui')[0] # type: ignore
 
@@ -52,7 +58,13 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
         self.add_column: QPushButton
         self.import_button: QPushButton
         self.datetime_format: QLineEdit
+        self.grid_frequency: QLineEdit
         self.index_column: QSpinBox
+        self.detected_settings: QLabel
+        self.preview_table: QTableView
+        self.csv_engine: QComboBox
+
+        self._detected_config: CSVImporterConfig | None = None
 
         self.setWindowModality(Qt.WindowModality.ApplicationModal)
 
@@ -62,10 +74,15 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
         self.add_column.clicked.connect(self._add_column_cb)
         self.columns_settings.setModel(ColumnSettingsModel())
         self.import_button.clicked.connect(self._import_clicked_cb)
+        self.filepath_edit.editingFinished.connect(self._detect_config)
+        self.index_column.editingFinished.connect(self._detect_config)
+        self.preview_table.setModel(QStandardItemModel(self))
 
         self._select_default_import_type_button()
         self._configure_default_manual_settings()
         self._configure_column_datatype_combo_box()
+        self._configure_engine_combo_box()
+        self._detect_config()
 
     def _configure_column_datatype_combo_box(self) -> None:
         for name, pd_type in _PD_DATATYPES:
@@ -73,6 +90,21 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
 
         self.column_data_type.setCurrentIndex(0)
 
+    def _configure_engine_combo_box(self) -> None:
+        for name, engine in _ENGINES:
+            self.csv_engine.addItem(name, engine)
+
+        if not is_pyarrow_available():
+            model = self.csv_engine.model()
+            assert isinstance(model, QStandardItemModel)
+
+            item = model.item(self.csv_engine.findData(CSVEngine.PYARROW))
+            assert item is not None
+            item.setEnabled(False)
+            item.setToolTip('Requires the pyarrow package.')
+
+        self.csv_engine.setCurrentIndex(0)
+
     def _select_default_import_type_button(self) -> None:
         self.csv_settings_select_group.buttons()[_AUTO_SETTINGS_BUTTON_IDX].setChecked(True)
 
@@ -86,6 +118,7 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
         self.column_name.setEnabled(enabled)
         self.column_data_type.setEnabled(enabled)
         self.datetime_format.setEnabled(enabled)
+        self.grid_frequency.setEnabled(enabled)
         self.add_column.setEnabled(enabled)
 
     def _get_column_settings(self) -> list[tuple[str, type]] | None:
@@ -105,16 +138,75 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
 
         return datetime_format
 
+    def _get_grid_frequency(self) -> str | None:
+        grid_frequency = self.grid_frequency.text()
+        if not grid_frequency:
+            return None
+
+        return grid_frequency
+
+    def _show_preview(self, preview: pd.DataFrame, config: CSVImporterConfig) -> None:
+        model = self.preview_table.model()
+        assert isinstance(model, QStandardItemModel)
+
+        model.clear()
+        model.setHorizontalHeaderLabels(
+            [str(preview.index.name)] + [f'{x}\n{y}' for x, y in zip(preview.columns, preview.dtypes)])
+        for timestamp, row in zip(preview.index, preview.itertuples(index=False)):
+            model.appendRow([QStandardItem(str(x)) for x in (timestamp, *row)])
+
+        datetime_format = config.datetime_format or 'not detected'
+        self.detected_settings.setText(
+            f'Detected separator "{config.separator}", '
+            f'{"a header line" if config.has_header else "no header line"}, '
+            f'index column {config.index_column}, datetime format "{datetime_format}".')
+
+    def _clear_preview(self, message: str) -> None:
+        model = self.preview_table.model()
+        assert isinstance(model, QStandardItemModel)
+
+        model.clear()
+        self.detected_settings.setText(message)
+
+    # Shows the settings auto-detection would import the file with and fills the manual settings
+    # with them, so they can be adjusted from there.
+    @pyqtSlot()
+    def _detect_config(self) -> None:
+        filepath = self.filepath_edit.text()
+        self._detected_config = None
+        if not os.path.isfile(filepath):
+            self._clear_preview('')
+            return
+
+        try:
+            config = detect_csv_config(filepath, CSVImporterConfig(True, self.index_column.value()))
+            preview = read_csv_preview(filepath, config, _PREVIEW_ROWS)
+        except (OSError, ValueError) as e:
+            self._clear_preview(f'Data format could not be detected: {e}')
+            return
+
+        self.column_separator.setText(config.separator)
+        self.datetime_format.setText(config.datetime_format or '')
+        self.index_column.setValue(config.index_column)
+        self._detected_config = config
+        self._show_preview(preview, config)
+
     @pyqtSlot()
     def _import_clicked_cb(self) -> None:
         filepath = self.filepath_edit.text()
 
-        config = CSVImporterConfig(True, self.index_column.value())
+        # auto-detection runs again as a part of the import, the file might have changed since the preview
+        config = CSVImporterConfig(True, self.index_column.value(), engine=self.csv_engine.currentData())
         if self.csv_settings_select_group.checkedButton() == self.settings_manual:
+            config.auto_detect = False
+            # there is no manual setting of the header line, the detected one is used
+            if self._detected_config is not None:
+                config.has_header = self._detected_config.has_header
             # FIXME This won't work if user deletes default separator and leaves field empty
             config.separator = self.column_separator.text()
             config.datetime_format = self._get_datetime_format()
             config.column_settings = self._get_column_settings()
+            config.grid_frequency = self._get_grid_frequency()
 
         self.import_requested.emit(
             ImporterSettings(
@@ -151,6 +243,7 @@ class CSVImportWindow(QMainWindow, CSVImportWindowClass):
             return
 
         self.filepath_edit.setText(open_result[0])
+        self._detect_config()
 
     @pyqtSlot(QAbstractButton, bool)
     def _import_button_toggled_cb(self, button: QAbstractButton, is_checked: bool) -> None:
@@ -1,41 +1,75 @@
 import datetime
+import functools
 import io
+import time
 
 import pandas as pd
 import pyqtgraph  # type: ignore[import-untyped]
 from dateutil import relativedelta
 from PyQt6 import uic
-from PyQt6.QtCore import QSettings, Qt, pyqtSlot
+from PyQt6.QtCore import QSettings, Qt, QTimer, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QCloseEvent
 from PyQt6.QtWidgets import (QLabel, QMainWindow, QScrollArea, QToolButton,
                              QVBoxLayout, QWidget)
 
+from data_visualizer.job_scheduler import JobPriority, JobScheduler
+from data_visualizer.models.column_stats import (ColumnStats,
+                                                 build_column_stats)
 from data_visualizer.models.pandas_model import PandasModel
+from data_visualizer.profiling import measure_stage
+from data_visualizer.qt_job import Job
 from data_visualizer.ui.widgets.calendar_dialog import CalendarDialog
 from data_visualizer.ui.widgets.plot_dock_widget import PlotDockWidget
+from data_visualizer.ui.widgets.plot_stack_widget import PlotStackWidget
 from data_visualizer.ui.widgets.series_config_widget import SeriesConfigWidget
-
-# TODO Use single GraphicsLayoutWidget (possibly with ScrollArea) to display mutliple plots and gain some performance
+from data_visualizer.ui.widgets.series_plot_item import (
+    SeriesPlotData, SeriesPlotItem, create_series_plot_data)
 
 _DATE_FORMAT = '%d.%m.%Y'
 _UI_FILEPATH = './assets/uis/graph_ex_window.ui'
 _SETTINGS_GEOMETRY_NAME = 'geometry_graph'
 _SETTINGS_STATE_NAME = 'state_graph'
+_DEFAULT_LAYOUT_MODE = 'combined'
+# plots hidden for longer than this are destroyed and recreated when shown again
+_PLOT_RELEASE_TIMEOUT_S = 60.0
+_PLOT_RELEASE_CHECK_INTERVAL_MS = 10_000
 
 class GraphToolWindow(QMainWindow):
-    def __init__(self, data: PandasModel, settings: QSettings, parent: QWidget) -> None:
+    # StageTiming of plot construction
+    stage_finished = pyqtSignal(object)
+
+    def __init__(self,
+                 data: PandasModel,
+                 settings: QSettings,
+                 parent: QWidget,
+                 job_scheduler: JobScheduler | None = None) -> None:
         super().__init__(parent)
 
         df = data.dataframe
 
         self.settings = settings
         self.data = data
-        self.min_date: datetime.date = df.index.min().date()
-        self.max_date: datetime.date = df.index.max().date()
+        self.min_date: datetime.date = data.grid.start.date()
+        self.max_date: datetime.date = data.grid.end.date()
         self.start_date = self.min_date
         self.end_date = self.max_date
         self.series = dict[str, pyqtgraph.PlotDataItem]()
-        self.plot_widgets = self._create_plot_widgets()
+        self.is_combined_layout = settings.value('graph_layout_mode', _DEFAULT_LAYOUT_MODE, str) == 'combined'
+        # plots are created when their series is shown for the first time
+        self.plot_items = dict[str, SeriesPlotItem]()
+        self.plot_widgets = dict[str, PlotDockWidget]()
+        self.plot_stack: PlotStackWidget | None = None
+        self.series_config_widgets = dict[str, SeriesConfigWidget]()
+
+        self._job_scheduler = job_scheduler or JobScheduler(self)
+        self._prefetched_plot_data = dict[str, SeriesPlotData]()
+        # prefetched data not shown for as long as hidden plots are kept is freed with them
+        self._prefetched_since = dict[str, float]()
+        self._prefetching = set[str]()
+        self._hidden_since = dict[str, float]()
+        self._release_timer = QTimer(self)
+        self._release_timer.timeout.connect(self._release_hidden_plots)
+        self._release_timer.start(_PLOT_RELEASE_CHECK_INTERVAL_MS)
 
         self.period_label: QLabel
         self.period_end_button: QToolButton
@@ -46,6 +80,10 @@ class GraphToolWindow(QMainWindow):
 
         uic.load_ui.loadUi(_UI_FILEPATH, self)
 
+        if self.is_combined_layout:
+            self.plot_stack = PlotStackWidget(settings, list(df.columns), self)
+            self.centralWidget().layout().addWidget(self.plot_stack) # type: ignore[union-attr]
+
         self._restore_geometry()
 
         self.period_label.setText(_build_period_length_str(self.start_date, self.end_date))
@@ -54,20 +92,25 @@ class GraphToolWindow(QMainWindow):
         self.period_start_button.clicked.connect(self._start_date_changed_cb)
         self.period_end_button.clicked.connect(self._end_date_changed_cb)
 
+        # models created outside of an import job (e.g. by benchmarks) come without statistics
+        if data.column_stats is None:
+            data.column_stats = build_column_stats(df)
+
+        # the whole data is selected at first
+        stats = data.column_stats.stats
         layout = QVBoxLayout()
 
-        for column_name in df.columns:
-            column = df[column_name]
+        for i, column_name in enumerate(df.columns):
             widget = SeriesConfigWidget(
                 column_name,
-                column.min(),
-                column.max())
+                *stats.get_limits(i))
             widget.setContentsMargins(0, 0, 0, 0)
             widget.min_value_changed.connect(self._change_y_axis_min)
             widget.max_value_changed.connect(self._change_y_axis_max)
             widget.show_checked.connect(self._set_plot_visible)
 
             layout.addWidget(widget)
+            self.series_config_widgets[column_name] = widget
 
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
@@ -75,6 +118,8 @@ class GraphToolWindow(QMainWindow):
 
         self.y_axis_controls.setLayout(layout)
 
+        data.rows_appended.connect(self._rows_appended_cb)
+
     def closeEvent(self, a0: QCloseEvent | None) -> None:
         self.settings.setValue(_SETTINGS_GEOMETRY_NAME, self.saveGeometry())
         self.settings.setValue(_SETTINGS_STATE_NAME, self.saveState())
@@ -109,11 +154,23 @@ class GraphToolWindow(QMainWindow):
 
         self._reconfigure_plots()
 
+    # Rows appended to a followed file are pushed into the existing plots.
+    @pyqtSlot(int)
+    def _rows_appended_cb(self, _: int) -> None:
+        self.max_date = self.data.grid.end.date()
+        self._prefetched_plot_data.clear()
+        self._prefetched_since.clear()
+
+        for series_name, plot_item in self.plot_items.items():
+            plot_item.set_data(self.data, create_series_plot_data(self.data, series_name))
+
     def _change_y_axis_min(self, series_name: str, value: float) -> None:
-        self.plot_widgets[series_name].set_y_min(value)
+        if (plot_item := self.plot_items.get(series_name)) is not None:
+            plot_item.set_y_min(value)
 
     def _change_y_axis_max(self, series_name: str, value: float) -> None:
-        self.plot_widgets[series_name].set_y_max(value)
+        if (plot_item := self.plot_items.get(series_name)) is not None:
+            plot_item.set_y_max(value)
 
     def _restore_geometry(self) -> None:
         geometry = self.settings.value(_SETTINGS_GEOMETRY_NAME)
@@ -124,37 +181,157 @@ class GraphToolWindow(QMainWindow):
         if state is not None:
             self.restoreState(state)
 
+    # Statistics of rows in the selected period, answered by the statistics index without a scan.
+    # The period includes the whole end date.
+    def _get_period_stats(self) -> ColumnStats:
+        assert self.data.column_stats is not None
+
+        tz = self.data.grid.start.tz
+        start, stop = self.data.get_row_range(
+            _to_timestamp(self.start_date, tz),
+            _to_timestamp(self.end_date + datetime.timedelta(days=1), tz) - pd.Timedelta(1, 'ns'))
+
+        return self.data.column_stats.get_stats(self.data.dataframe, start, stop)
+
     def _reconfigure_plots(self) -> None:
-        for plot_widget in self.plot_widgets.values():
-            plot_widget.set_x_range(self.start_date, self.end_date)
+        # y-limits follow the selected period
+        stats = self._get_period_stats()
+        for i, column_name in enumerate(self.data.dataframe.columns):
+            limits = stats.get_limits(i)
+            self.series_config_widgets[column_name].set_limits(*limits)
+            if (plot_item := self.plot_items.get(column_name)) is not None:
+                plot_item.set_y_range(*limits)
 
-    def _set_plot_visible(self, series_name: str, is_shown: bool) -> None:
-        widget = self.plot_widgets[series_name]
-        max_left_axis_width = max(
-            x._plot_widget.plotItem.getAxis('left').width()
-            for x in self.plot_widgets.values())
+        if self.plot_stack is not None:
+            self.plot_stack.set_x_range(self.start_date, self.end_date)
+            return
 
-        for _widget in self.plot_widgets.values():
-            _widget._plot_widget.plotItem.getAxis('left').setWidth(max_left_axis_width)
+        for plot_item in self.plot_items.values():
+            plot_item.set_x_range(self.start_date, self.end_date)
 
+    def _set_plot_visible(self, series_name: str, is_shown: bool) -> None:
         if is_shown:
-            widget.setVisible(True)
-            self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, widget)
+            self._hidden_since.pop(series_name, None)
         else:
-            self.removeDockWidget(widget)
+            self._hidden_since[series_name] = time.monotonic()
+
+        if self.plot_stack is not None:
+            self._set_stacked_plot_visible(series_name, is_shown)
+        else:
+            self._set_plot_dock_visible(series_name, is_shown)
+
+        if is_shown:
+            self._prefetch_next_plot_data(series_name)
 
-    def _create_plot_widgets(self) -> dict[str, PlotDockWidget]:
-        # precompute timestamps here to save plot creation time
-        x_axis_values = self.data.dataframe.index.map(pd.Timestamp.timestamp)
-        return {
-            k: PlotDockWidget(
+    def _set_stacked_plot_visible(self, series_name: str, is_shown: bool) -> None:
+        assert self.plot_stack is not None
+
+        if is_shown:
+            plot_item = self._get_plot_item(series_name)
+            plot_item.set_x_range(self.start_date, self.end_date)
+            self.plot_stack.add_plot(plot_item)
+        elif (plot_item := self.plot_items.get(series_name)) is not None:
+            self.plot_stack.remove_plot(plot_item)
+
+    def _set_plot_dock_visible(self, series_name: str, is_shown: bool) -> None:
+        if not is_shown:
+            if (widget := self.plot_widgets.get(series_name)) is not None:
+                self.removeDockWidget(widget)
+
+            return
+
+        widget = self._get_plot_dock_widget(series_name)
+        max_left_axis_width = max(x.get_left_axis_width() for x in self.plot_items.values())
+
+        for plot_item in self.plot_items.values():
+            plot_item.set_left_axis_width(max_left_axis_width)
+
+        widget.setVisible(True)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, widget)
+
+    def _get_plot_dock_widget(self, series_name: str) -> PlotDockWidget:
+        if (widget := self.plot_widgets.get(series_name)) is None:
+            widget = PlotDockWidget(self.settings, self._get_plot_item(series_name))
+            self.plot_widgets[series_name] = widget
+
+        return widget
+
+    def _get_plot_item(self, series_name: str) -> SeriesPlotItem:
+        if (plot_item := self.plot_items.get(series_name)) is not None:
+            return plot_item
+
+        plot_data = self._prefetched_plot_data.pop(series_name, None)
+        self._prefetched_since.pop(series_name, None)
+        if plot_data is None:
+            with measure_stage('plot_data', self.stage_finished.emit):
+                plot_data = self._create_plot_data(series_name)
+
+        config_widget = self.series_config_widgets[series_name]
+        with measure_stage('plot_item', self.stage_finished.emit):
+            plot_item = SeriesPlotItem(
                 self.settings,
                 self.data,
-                k,
-                x_axis_values,
+                plot_data,
                 self.start_date,
-                self.end_date)
-            for k in self.data.dataframe.columns}
+                self.end_date,
+                config_widget.y_min,
+                config_widget.y_max)
+
+        self.plot_items[series_name] = plot_item
+
+        return plot_item
+
+    def _create_plot_data(self, series_name: str) -> SeriesPlotData:
+        return create_series_plot_data(self.data, series_name)
+
+    def _prefetch_next_plot_data(self, series_name: str) -> None:
+        columns = list(self.data.dataframe.columns)
+        for next_series_name in columns[columns.index(series_name) + 1:]:
+            if (next_series_name in self.plot_items
+                or next_series_name in self._prefetched_plot_data
+                or next_series_name in self._prefetching):
+                continue
+
+            job = Job(create_series_plot_data, self.data, next_series_name)
+            job.finished.connect(self._plot_data_prefetched_cb)
+            # a failed or cancelled prefetch is tried again when the previous series is shown
+            job.error.connect(functools.partial(self._prefetch_failed_cb, next_series_name))
+            job.cancelled.connect(functools.partial(self._prefetch_failed_cb, next_series_name))
+            self._prefetching.add(next_series_name)
+            self._job_scheduler.submit(job, f'Prefetch plot "{next_series_name}"', JobPriority.BACKGROUND)
+
+            return
+
+    @pyqtSlot(object)
+    def _plot_data_prefetched_cb(self, plot_data: SeriesPlotData) -> None:
+        self._prefetching.discard(plot_data.series_name)
+        # rows might have been appended while the data was prepared
+        is_outdated = len(plot_data.y_axis_values) != len(self.data.dataframe)
+        if plot_data.series_name not in self.plot_items and not is_outdated:
+            self._prefetched_plot_data[plot_data.series_name] = plot_data
+            self._prefetched_since[plot_data.series_name] = time.monotonic()
+
+    def _prefetch_failed_cb(self, series_name: str, *_) -> None:
+        self._prefetching.discard(series_name)
+
+    @pyqtSlot()
+    def _release_hidden_plots(self) -> None:
+        now = time.monotonic()
+        for series_name, hidden_since in list(self._hidden_since.items()):
+            if now - hidden_since < _PLOT_RELEASE_TIMEOUT_S:
+                continue
+
+            del self._hidden_since[series_name]
+            plot_item = self.plot_items.pop(series_name, None)
+            if (widget := self.plot_widgets.pop(series_name, None)) is not None:
+                widget.deleteLater()
+            elif plot_item is not None:
+                plot_item.deleteLater()
+
+        for series_name, prefetched_since in list(self._prefetched_since.items()):
+            if now - prefetched_since >= _PLOT_RELEASE_TIMEOUT_S:
+                del self._prefetched_since[series_name]
+                self._prefetched_plot_data.pop(series_name, None)
 
 def _build_period_length_str(start: datetime.date, end: datetime.date) -> str:
     string_builder = io.StringIO()
@@ -179,3 +356,7 @@ def _build_period_length_str(start: datetime.date, end: datetime.date) -> str:
 
 def _format_date(date: datetime.date) -> str:
     return date.strftime(_DATE_FORMAT)
+
+def _to_timestamp(date: datetime.date, tz: datetime.tzinfo | None) -> pd.Timestamp:
+    timestamp = pd.Timestamp(date)
+    return timestamp if tz is None else timestamp.tz_localize(tz)
@@ -1,28 +1,46 @@
-import datetime
+import functools
 import os
 import typing as t
 
-import numpy as np
 import pandas as pd
 from PyQt6 import uic
-from PyQt6.QtCore import (QItemSelection, QModelIndex, QSettings, Qt,
-                          QThreadPool, pyqtSlot)
+from PyQt6.QtCore import (QItemSelection, QItemSelectionModel, QModelIndex,
+                          QPoint, QSettings, Qt, pyqtSlot)
 from PyQt6.QtGui import QAction, QCloseEvent
-from PyQt6.QtWidgets import (QFileDialog, QLabel, QLineEdit, QMainWindow,
-                             QTableView, QTabWidget)
-
-from data_visualizer.data_importer import ImporterSettings, ImporterType
+from PyQt6.QtWidgets import (QAbstractItemView, QFileDialog, QHeaderView,
+                             QInputDialog, QLabel, QLineEdit, QMainWindow,
+                             QMenu, QPushButton, QTableView, QTabWidget)
+
+from data_visualizer.data_importer import ImporterSettings
+from data_visualizer.import_cache import ImportCache
+from data_visualizer.import_pipeline import (create_import_cache,
+                                             get_optimize_memory,
+                                             get_out_of_core_size,
+                                             get_parse_processes, import_data)
+from data_visualizer.job_scheduler import JobScheduler
+from data_visualizer.models.column_stats import build_column_stats
+from data_visualizer.models.data_info import get_data_info
 from data_visualizer.models.pandas_model import PandasModel
-from data_visualizer.qt_job import Job
+from data_visualizer.profiling import (StageTiming, get_job_profile_path,
+                                       measure_stage)
+from data_visualizer.pyramid import load_or_build_pyramid
+from data_visualizer.qt_job import ContextJob, Job, JobContext
+from data_visualizer.tail_follower import TailFollower
+from data_visualizer.tail_reader import drop_unfinished_row
 from data_visualizer.ui.csv_import_window import CSVImportWindow
 from data_visualizer.ui.error_window import ErrorWindow
 from data_visualizer.ui.graph_window import GraphToolWindow
 from data_visualizer.ui.settings_window import SettingsWindow
 from data_visualizer.ui.status_bar import StatusBar, StatusBarStatus
+from data_visualizer.ui.widgets.diagnostics_dock_widget import \
+    DiagnosticsDockWidget
+from data_visualizer.ui.widgets.jobs_dock_widget import JobsDockWidget
 
 _UI_FILEPATH = './assets/uis/main_window.ui'
 _SETTINGS_STATE_NAME = 'state_main_window'
 _SETTINGS_GEOMETRY_NAME = 'geometry_main_window'
+# pixels added to the font height for the height of table rows
+_TABLE_ROW_PADDING = 6
 
 # TODO SEPARATION OF CONCERNS!!! (move logic from the ui)
 
@@ -30,16 +48,25 @@ class MainWindow(QMainWindow):
     def __init__(self, settings: QSettings) -> None:
         super().__init__()
 
-        self.thread_pool = QThreadPool(self)
+        self.job_scheduler = JobScheduler(self)
         self.settings = settings
+        self.import_jobs = list[Job]()
+        # last (processed bytes, total bytes, processed rows) reported by each running import
+        self.import_progress = dict[Job, tuple[int, int, int]]()
+        self.tail_followers = dict[PandasModel, TailFollower]()
 
         self.cur_value_edit: QLineEdit
+        self.filter_edit: QLineEdit
+        self.search_edit: QLineEdit
+        self.search_previous_button: QPushButton
+        self.search_next_button: QPushButton
         self.opened_editors: QTabWidget
         self.status_bar: StatusBar
 
         # info
         self.size_unit: QLabel
         self.size_label: QLabel
+        self.memory_saved_label: QLabel
         self.current_col_name: QLabel
         self.current_columns: QLabel
         self.current_rows: QLabel
@@ -55,16 +82,36 @@ class MainWindow(QMainWindow):
         self.action_open: QAction
         self.action_exit: QAction
         self.action_generate_graph: QAction
+        self.action_follow_file: QAction
         self.action_settings: QAction
+        self.menu_tools: QMenu
 
         uic.load_ui.loadUi(_UI_FILEPATH, self)
 
+        self.diagnostics_dock = DiagnosticsDockWidget(self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.diagnostics_dock)
+        self.diagnostics_dock.hide()
+        self.menu_tools.addAction(self.diagnostics_dock.toggleViewAction())
+
+        self.jobs_dock = JobsDockWidget(self.job_scheduler, self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+        self.menu_tools.addAction(self.jobs_dock.toggleViewAction())
+
+        self.job_scheduler.job_submitted.connect(self._instrument_job)
+
         self.action_exit.triggered.connect(self._exit_action_callback)
         self.action_open.triggered.connect(self._open_action_callback)
         self.action_generate_graph.triggered.connect(self._open_graph_window)
+        self.action_follow_file.triggered.connect(self._follow_file_cb)
         self.action_settings.triggered.connect(self._settings_action_callback)
 
+        self.filter_edit.editingFinished.connect(self._filter_edited_cb)
+        self.search_edit.returnPressed.connect(self._search_next_cb)
+        self.search_next_button.clicked.connect(self._search_next_cb)
+        self.search_previous_button.clicked.connect(self._search_previous_cb)
         self.opened_editors.currentChanged.connect(self._editor_selection_changed)
+        self.status_bar.cancel_requested.connect(self._cancel_imports_cb)
 
         self._restore_geometry()
 
@@ -83,37 +130,69 @@ class MainWindow(QMainWindow):
         if (state := self.settings.value(_SETTINGS_STATE_NAME)) is not None:
             self.restoreState(state)
 
-    def _import_data(self, settings: ImporterSettings) -> PandasModel:
-        data: pd.DataFrame
-        match settings:
-            case ImporterSettings(ImporterType.CSV, filepath, config):
-                dtype = None
-                names = None
-                if config.column_settings is not None:
-                    dtype = {k: v for k, v in config.column_settings}
-                    names = [x[0] for x in config.column_settings]
-
-                data = pd.read_csv(
-                    filepath,
-                    low_memory=False,
-                    parse_dates=True,
-                    index_col=config.index_column,
-                    sep=config.separator,
-                    names=names,
-                    dtype=dtype,
-                    date_format=config.datetime_format)
-
-        dummy = pd.DataFrame(
-            np.nan,
-            index=pd.date_range(
-                data.index.min(),
-                data.index.max(),
-                freq='min'),
-            columns=data.columns)
-        dummy.index.name = data.index.name
-        result = dummy.combine_first(data)
-
-        return PandasModel(result, filepath)
+    def _import_data(self,
+                     context: JobContext,
+                     settings: ImporterSettings,
+                     cache: ImportCache | None,
+                     out_of_core_size: int,
+                     parse_processes: int,
+                     should_optimize_memory: bool) -> PandasModel:
+        # rows written to the file from now on are read by `TailFollower`
+        source_size = os.path.getsize(settings.filepath)
+        imported = import_data(settings, cache, out_of_core_size, context, parse_processes, should_optimize_memory)
+        if os.path.getsize(settings.filepath) != source_size:
+            with context.stage('unfinished_row'):
+                imported = drop_unfinished_row(imported, settings, source_size)
+
+        with context.stage('table_model'):
+            model = PandasModel(
+                imported.data,
+                settings.filepath,
+                imported.grid,
+                imported.grid_positions,
+                imported.missing_ranges)
+            model.memory_saved = imported.memory_saved
+            model.importer_settings = settings
+            model.source_size = source_size
+
+        with context.stage('pyramid'):
+            model.pyramid = load_or_build_pyramid(settings, imported.data, imported.grid, imported.grid_positions)
+
+        with context.stage('column_stats'):
+            model.column_stats = build_column_stats(imported.data)
+
+        return model
+
+    # Reports measurements of the job to the diagnostics panel and profiles it when enabled.
+    @pyqtSlot(Job)
+    def _instrument_job(self, job: Job) -> None:
+        job.profile_path = get_job_profile_path(self.settings, job.name)
+        job.stage_finished.connect(self.diagnostics_dock.add_timing)
+        job.timed.connect(self._job_timed_cb)
+
+    # Forgets finished imports, the status bar keeps showing the progress of the running ones.
+    def _remove_done_import_jobs(self) -> None:
+        self.import_jobs = [x for x in self.import_jobs if not x.is_done]
+        self.import_progress = {k: v for k, v in self.import_progress.items() if k in self.import_jobs}
+
+        if len(self.import_jobs) == 0:
+            self.status_bar.clear_message()
+            return
+
+        self.status_bar.set_message(
+            'Importing data...' if len(self.import_jobs) == 1 else f'Importing data from {len(self.import_jobs)} files...',
+            StatusBarStatus.PROCESSING)
+        self._show_import_progress()
+
+    def _show_import_progress(self) -> None:
+        if len(self.import_progress) == 0:
+            return
+
+        processed_bytes, total_bytes, processed_rows = (sum(x) for x in zip(*self.import_progress.values()))
+        self.status_bar.set_progress(
+            processed_bytes,
+            total_bytes,
+            f'({processed_rows} rows)')
 
     def _get_current_data_model(self) -> PandasModel:
         current_tab = self.opened_editors.currentWidget()
@@ -137,6 +216,8 @@ class MainWindow(QMainWindow):
 
         model = self._get_current_data_model()
         self._update_info_tab(model)
+        self.action_follow_file.setChecked(model in self.tail_followers)
+        self.filter_edit.setText('' if model.row_filter is None else model.row_filter.expression)
 
         selection: QItemSelection = self.opened_editors.currentWidget().selectionModel().selection() # type: ignore[union-attr]
         if selection.count() == 0:
@@ -148,37 +229,195 @@ class MainWindow(QMainWindow):
 
     @pyqtSlot()
     def _open_graph_window(self) -> None:
-        window = GraphToolWindow(
-            self._get_current_data_model(),
-            self.settings,
-            self)
+        with measure_stage('graph_window', self._job_timed_cb):
+            window = GraphToolWindow(
+                self._get_current_data_model(),
+                self.settings,
+                self,
+                self.job_scheduler)
+
+        window.stage_finished.connect(self.diagnostics_dock.add_timing)
         window.setWindowModality(Qt.WindowModality.ApplicationModal)
         window.show()
 
+    @pyqtSlot()
+    def _filter_edited_cb(self) -> None:
+        if self.opened_editors.currentIndex() == -1:
+            return
+
+        model = self._get_current_data_model()
+        expression = self.filter_edit.text()
+        if expression == ('' if model.row_filter is None else model.row_filter.expression):
+            return
+
+        try:
+            model.set_filter(expression)
+        except ValueError as e:
+            ErrorWindow.open_blocking(self, e)
+
+    @pyqtSlot()
+    def _search_next_cb(self) -> None:
+        self._search(False)
+
+    @pyqtSlot()
+    def _search_previous_cb(self) -> None:
+        self._search(True)
+
+    # Selects the row of a time typed in the search field, or the next (previous) row matching
+    # a condition typed in it, searched from the current row.
+    def _search(self, backward: bool) -> None:
+        text = self.search_edit.text().strip()
+        if self.opened_editors.currentIndex() == -1 or len(text) == 0:
+            return
+
+        model = self._get_current_data_model()
+        tableview = self.opened_editors.currentWidget()
+        assert isinstance(tableview, QTableView)
+
+        current = tableview.currentIndex()
+        try:
+            timestamp = pd.Timestamp(text)
+        except ValueError:
+            timestamp = None
+
+        try:
+            if timestamp is not None and not pd.isna(timestamp):
+                row = model.find_timestamp_row(timestamp)
+            else:
+                from_row = current.row() if current.isValid() else (len(model.grid) if backward else -1)
+                row = model.find_row(text, from_row, backward)
+        except ValueError as e:
+            ErrorWindow.open_blocking(self, e)
+            return
+
+        if row is None:
+            self.status_bar.set_message(f'No row found for "{text}".', StatusBarStatus.FAILURE)
+            return
+
+        self.status_bar.clear_message()
+
+        # the row might not have been fetched by the table yet
+        model.fetch_to(row)
+        index = model.index(row, max(current.column(), 0))
+        selection_model = tableview.selectionModel()
+        assert selection_model is not None
+
+        selection_model.setCurrentIndex(
+            index,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows)
+        tableview.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    @pyqtSlot(bool)
+    def _follow_file_cb(self, is_checked: bool) -> None:
+        model = self._get_current_data_model()
+        if not is_checked:
+            if (follower := self.tail_followers.pop(model, None)) is not None:
+                follower.stop()
+                follower.deleteLater()
+
+            return
+
+        try:
+            follower = TailFollower(model, self)
+        except (OSError, ValueError) as e:
+            self.action_follow_file.setChecked(False)
+            ErrorWindow.open_blocking(self, e)
+            return
+
+        follower.rows_appended.connect(self._rows_appended_cb)
+        follower.error.connect(self._follow_error_cb)
+        self.tail_followers[model] = follower
+
+    @pyqtSlot(int)
+    def _rows_appended_cb(self, _: int) -> None:
+        if self.opened_editors.currentIndex() != -1:
+            self.current_rows.setText(str(len(self._get_current_data_model().grid)))
+
+    @pyqtSlot(Exception)
+    def _follow_error_cb(self, exc: Exception) -> None:
+        for model, follower in list(self.tail_followers.items()):
+            if not follower.is_following:
+                del self.tail_followers[model]
+                follower.deleteLater()
+
+        if self.opened_editors.currentIndex() != -1:
+            self.action_follow_file.setChecked(self._get_current_data_model() in self.tail_followers)
+
+        ErrorWindow.open_blocking(self, exc)
+
+    @pyqtSlot(object)
+    def _job_timed_cb(self, timing: StageTiming) -> None:
+        self.diagnostics_dock.add_timing(timing)
+        self.status_bar.set_timing(timing)
+
     @pyqtSlot(Exception)
     def _exception_cb(self, exc: Exception) -> None:
         ErrorWindow.open_blocking(self, exc)
 
+    @pyqtSlot(Exception)
+    def _import_error_cb(self, exc: Exception) -> None:
+        self._remove_done_import_jobs()
+
+        ErrorWindow.open_blocking(self, exc)
+
     @pyqtSlot(pd.DataFrame)
     def _loading_finished_cb(self, data: PandasModel) -> None:
+        self._remove_done_import_jobs()
+
         self.opened_editors.addTab(
             self._create_tableview_for_model(data),
             os.path.basename(data.filepath))
 
         self.action_generate_graph.setEnabled(True)
-        self.status_bar.clear_message()
+        self.action_follow_file.setEnabled(True)
+
+    @pyqtSlot()
+    def _import_cancelled_cb(self) -> None:
+        self._remove_done_import_jobs()
+        if len(self.import_jobs) == 0:
+            self.status_bar.set_message('Import cancelled.', StatusBarStatus.OK)
+
+    def _import_progress_cb(self, job: Job, processed_bytes: int, total_bytes: int, processed_rows: int) -> None:
+        if job not in self.import_jobs:
+            return
+
+        self.import_progress[job] = (processed_bytes, total_bytes, processed_rows)
+        self._show_import_progress()
+
+    @pyqtSlot()
+    def _cancel_imports_cb(self) -> None:
+        for job in self.import_jobs:
+            self.job_scheduler.cancel(job)
 
     @pyqtSlot(ImporterSettings)
     def _import_requested_cb(self, settings: ImporterSettings) -> None:
-        job = Job(self._import_data, settings)
-        job.error.connect(self._exception_cb)
+        job = ContextJob(
+            self._import_data,
+            settings,
+            create_import_cache(self.settings),
+            get_out_of_core_size(self.settings),
+            get_parse_processes(self.settings),
+            get_optimize_memory(self.settings))
+        job.error.connect(self._import_error_cb)
         job.finished.connect(self._loading_finished_cb)
+        job.progress.connect(functools.partial(self._import_progress_cb, job))
+        job.cancelled.connect(self._import_cancelled_cb)
 
-        self.thread_pool.start(job)
+        # the same file imported with the same settings is only parsed once
+        if self.job_scheduler.submit(job, f'Import "{os.path.basename(settings.filepath)}"', key=settings) is not job:
+            return
 
-        self.status_bar.set_message(
-            f'Importing data from "{settings.filepath}"...',
-            StatusBarStatus.PROCESSING)
+        self.import_jobs.append(job)
+
+        if len(self.import_jobs) == 1:
+            self.status_bar.set_message(
+                f'Importing data from "{settings.filepath}"...',
+                StatusBarStatus.PROCESSING)
+        else:
+            self.status_bar.set_message(
+                f'Importing data from {len(self.import_jobs)} files...',
+                StatusBarStatus.PROCESSING)
+            self._show_import_progress()
 
     @pyqtSlot()
     def _open_action_callback(self) -> None:
@@ -214,38 +453,72 @@ class MainWindow(QMainWindow):
         self.current_col_name.setText(column_name)
 
     def _update_info_tab(self, model: PandasModel) -> None:
-        dataframe = model.dataframe
-        filepath = model.filepath
+        info = get_data_info(model.filepath, model.dataframe, model.grid, model.missing_ranges, model.memory_saved)
 
-        self.size_label.setText(f'{(dataframe.memory_usage(index=True).sum() / 1_000):.2f}')
+        self.size_label.setText(f'{(info.size / 1_000):.2f}')
         self.size_unit.setText('kB')
-        self.current_rows.setText(f'{dataframe.shape[0]}')
-        self.current_columns.setText(f'{dataframe.shape[1]}')
-        self.current_filepath.setText(filepath)
+        self.memory_saved_label.setText(
+            f'{(info.memory_saved / 1_000):.2f} kB ({info.memory_saved / max(info.size + info.memory_saved, 1):.0%})')
+        self.current_rows.setText(f'{info.rows}')
+        self.current_columns.setText(f'{info.columns}')
+        self.current_filepath.setText(info.filepath)
+        self.current_last_edited.setText(info.last_modified.strftime('%d/%m/%Y, %H:%M:%S'))
+        self.missing_rows_label.setText(str(info.missing_rows))
+        self.longest_missing_period_label.setText(str(info.longest_missing_period))
+
+        if info.longest_missing_start is None or info.longest_missing_end is None:
+            self.longest_missing_start_label.clear()
+            self.longest_missing_end_label.clear()
+        else:
+            self.longest_missing_start_label.setText(info.longest_missing_start.strftime('%d/%m/%Y, %H:%M:%S'))
+            self.longest_missing_end_label.setText(info.longest_missing_end.strftime('%d/%m/%Y, %H:%M:%S'))
 
-        last_modified_time = datetime.datetime.fromtimestamp(os.path.getmtime(filepath))
-        self.current_last_edited.setText(last_modified_time.strftime('%d/%m/%Y, %H:%M:%S'))
+    def _create_tableview_for_model(self, model: PandasModel) -> QTableView:
+        model.set_default_formats(
+            self.settings.value('table_number_format', '', str) or None,
+            self.settings.value('table_datetime_format', '', str) or None)
 
-        longest_start, longest_end, longest_length = _get_longest_missing_data_period(model.missing_ranges)
-        missing_rows_count = _get_missing_data_rows_count(model.missing_ranges)
-        self.missing_rows_label.setText(str(missing_rows_count))
-        self.longest_missing_period_label.setText(str(longest_length))
-        self.longest_missing_start_label.setText(longest_start.strftime('%d/%m/%Y, %H:%M:%S'))
-        self.longest_missing_end_label.setText(longest_end.strftime('%d/%m/%Y, %H:%M:%S'))
+        model.error.connect(self._exception_cb)
 
-    def _create_tableview_for_model(self, model: PandasModel) -> QTableView:
         data_tableview = QTableView()
         data_tableview.setModel(model)
-        data_tableview.horizontalHeader().setStretchLastSection(True) # type: ignore[union-attr]
         data_tableview.selectionModel().selectionChanged.connect(self._table_selection_changed) # type: ignore[union-attr]
 
-        return data_tableview
+        header = data_tableview.horizontalHeader()
+        assert header is not None
+
+        header.setStretchLastSection(True)
+        # sorted on header clicks, the third click restores the time order
+        header.setSortIndicatorClearable(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        data_tableview.setSortingEnabled(True)
+        header.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        header.customContextMenuRequested.connect(self._table_header_context_menu_cb)
+
+        # rows of the same fixed height are laid out without measuring their contents
+        vertical_header = data_tableview.verticalHeader()
+        assert vertical_header is not None
+
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(data_tableview.fontMetrics().height() + _TABLE_ROW_PADDING)
 
-def _get_missing_data_rows_count(ranges: dict[str, pd.DataFrame]) -> int:
-    return int(next(iter(ranges.values())).length.sum())
+        # sorted or filtered rows are fetched anew, a view scrolled past them lays out every header section
+        model.modelAboutToBeReset.connect(data_tableview.scrollToTop)
 
-def _get_longest_missing_data_period(ranges: dict[str, pd.DataFrame]) -> tuple[datetime.datetime, datetime.datetime, int]:
-    checked_ranges = next(iter(ranges.values()))
-    start, end, length = checked_ranges.iloc[checked_ranges.length.argmax()]
-    return (start.to_pydatetime(), end.to_pydatetime(), int(length))
+        return data_tableview
 
+    @pyqtSlot(QPoint)
+    def _table_header_context_menu_cb(self, pos: QPoint) -> None:
+        model = self._get_current_data_model()
+        header = self.opened_editors.currentWidget().horizontalHeader() # type: ignore[union-attr]
+        column = header.logicalIndexAt(pos)
+        if column == -1:
+            return
+
+        fmt, ok = QInputDialog.getText(
+            self,
+            'Column format',
+            f'Format of column "{model.headerData(column, Qt.Orientation.Horizontal)}" (empty for default):',
+            text=model.get_column_format(column) or '')
+        if ok:
+            model.set_column_format(column, fmt or None)
@@ -1,12 +1,22 @@
 from PyQt6 import uic
 from PyQt6.QtCore import QSettings, pyqtSlot
-from PyQt6.QtWidgets import (QComboBox, QDoubleSpinBox, QMainWindow,
-                             QPushButton, QSpinBox, QWidget)
+from PyQt6.QtWidgets import (QCheckBox, QComboBox, QDoubleSpinBox,
+                             QLineEdit, QMainWindow, QPushButton, QSpinBox,
+                             QWidget)
+
+from data_visualizer.import_cache import (DEFAULT_IMPORT_CACHE_SIZE_MB,
+                                          DEFAULT_OUT_OF_CORE_SIZE_MB,
+                                          ImportCache)
+from data_visualizer.import_pipeline import (get_import_cache_directory,
+                                             get_optimize_memory,
+                                             get_parse_processes)
+from data_visualizer.profiling import get_profile_directory
 
 _UI_FILEPATH = './assets/uis/settings_window.ui'
 _DEFAULT_GRID_OPACITY = 0.5
 _DEFAULT_VERTICAL_MARGIN = 15
 _DEFAULT_GRAPH_THEME = 'light'
+_DEFAULT_GRAPH_LAYOUT_MODE = 'combined'
 
 class SettingsWindow(QMainWindow):
     def __init__(self,
@@ -17,15 +27,26 @@ class SettingsWindow(QMainWindow):
         self.settings = settings
 
         self.reset_geometry: QPushButton
+        self.import_cache_size: QSpinBox
+        self.out_of_core_size: QSpinBox
+        self.parse_processes: QSpinBox
+        self.optimize_memory: QCheckBox
+        self.clear_import_cache: QPushButton
+        self.profile_jobs: QCheckBox
         self.graph_grid_opacity: QDoubleSpinBox
         self.graph_theme: QComboBox
+        self.graph_layout_mode: QComboBox
         self.graph_vertical_margin: QSpinBox
+        self.table_number_format: QLineEdit
+        self.table_datetime_format: QLineEdit
         self.apply: QPushButton
 
         uic.load_ui.loadUi(_UI_FILEPATH, self)
 
         self.reset_geometry.clicked.connect(self._reset_geometry_cb)
+        self.clear_import_cache.clicked.connect(self._clear_import_cache_cb)
         self.apply.clicked.connect(self._apply_cb)
+        self.profile_jobs.setToolTip(f'Profiles are written to "{get_profile_directory()}".')
 
         self._load_current_settings()
 
@@ -33,6 +54,14 @@ class SettingsWindow(QMainWindow):
         self.graph_grid_opacity.setValue(self.settings.value('graph_grid_opacity', _DEFAULT_GRID_OPACITY, float))
         self.graph_theme.setCurrentText(self.settings.value('graph_theme', _DEFAULT_GRAPH_THEME, str))
         self.graph_vertical_margin.setValue(self.settings.value('graph_vertical_margin', _DEFAULT_VERTICAL_MARGIN, int))
+        self.graph_layout_mode.setCurrentText(self.settings.value('graph_layout_mode', _DEFAULT_GRAPH_LAYOUT_MODE, str))
+        self.table_number_format.setText(self.settings.value('table_number_format', '', str))
+        self.table_datetime_format.setText(self.settings.value('table_datetime_format', '', str))
+        self.import_cache_size.setValue(self.settings.value('import_cache_size', DEFAULT_IMPORT_CACHE_SIZE_MB, int))
+        self.out_of_core_size.setValue(self.settings.value('out_of_core_size', DEFAULT_OUT_OF_CORE_SIZE_MB, int))
+        self.parse_processes.setValue(get_parse_processes(self.settings))
+        self.optimize_memory.setChecked(get_optimize_memory(self.settings))
+        self.profile_jobs.setChecked(self.settings.value('profile_jobs', False, bool))
 
     @pyqtSlot()
     def _reset_geometry_cb(self) -> None:
@@ -40,8 +69,20 @@ class SettingsWindow(QMainWindow):
             if key.startswith(('state_', 'geometry_')):
                 self.settings.setValue(key, None)
 
+    @pyqtSlot()
+    def _clear_import_cache_cb(self) -> None:
+        ImportCache(get_import_cache_directory()).clear()
+
     @pyqtSlot()
     def _apply_cb(self) -> None:
         self.settings.setValue('graph_grid_opacity', self.graph_grid_opacity.value())
         self.settings.setValue('graph_theme', self.graph_theme.currentText())
         self.settings.setValue('graph_vertical_margin', self.graph_vertical_margin.value())
+        self.settings.setValue('graph_layout_mode', self.graph_layout_mode.currentText())
+        self.settings.setValue('table_number_format', self.table_number_format.text())
+        self.settings.setValue('table_datetime_format', self.table_datetime_format.text())
+        self.settings.setValue('import_cache_size', self.import_cache_size.value())
+        self.settings.setValue('out_of_core_size', self.out_of_core_size.value())
+        self.settings.setValue('parse_processes', self.parse_processes.value())
+        self.settings.setValue('optimize_memory', self.optimize_memory.isChecked())
+        self.settings.setValue('profile_jobs', self.profile_jobs.isChecked())
@@ -1,9 +1,14 @@
 import dataclasses
 import enum
 
-from PyQt6.QtCore import QSize
+from PyQt6.QtCore import QSize, pyqtSignal
 from PyQt6.QtGui import QMovie, QPixmap
-from PyQt6.QtWidgets import QLabel, QStatusBar, QWidget
+from PyQt6.QtWidgets import (QLabel, QProgressBar, QStatusBar, QToolButton,
+                             QWidget)
+
+from data_visualizer.profiling import StageTiming, format_timing
+
+_PROGRESS_RESOLUTION = 1000
 
 
 @dataclasses.dataclass
@@ -19,6 +24,8 @@ class StatusBarStatus(enum.Enum):
 Icon = QPixmap | QMovie
 
 class StatusBar(QStatusBar):
+    cancel_requested = pyqtSignal()
+
     _STATUS_ICON_DEFS = {
         StatusBarStatus.OK: _IconDef('./assets/icons/status_ok_icon.png'),
         StatusBarStatus.FAILURE: _IconDef('./assets/icons/status_failure_icon.png'),
@@ -31,11 +38,23 @@ class StatusBar(QStatusBar):
         self._status_icons = dict[StatusBarStatus, Icon]() # self._load_status_icons(self._STATUS_ICON_DEFS, None)
         self._status_label = QLabel(self)
         self._msg_label = QLabel(self)
+        self._progress_bar = QProgressBar(self)
+        self._progress_bar.setRange(0, _PROGRESS_RESOLUTION)
+        self._progress_bar.setMaximumWidth(250)
+        self._cancel_button = QToolButton(self)
+        self._cancel_button.setText('Cancel')
+        self._cancel_button.clicked.connect(self.cancel_requested)
+        # measurements of the last finished job
+        self._timing_label = QLabel(self)
 
         # self.addWidget(self._status_label)
         self.addWidget(self._msg_label)
+        self.addPermanentWidget(self._progress_bar)
+        self.addPermanentWidget(self._cancel_button)
+        self.addPermanentWidget(self._timing_label)
 
         self.set_status(StatusBarStatus.OK)
+        self.clear_progress()
 
     def set_status(self, status: StatusBarStatus) -> None:
         return
@@ -57,6 +76,21 @@ class StatusBar(QStatusBar):
     def clear_message(self) -> None:
         self._msg_label.clear()
         self.set_status(StatusBarStatus.OK)
+        self.clear_progress()
+
+    def set_progress(self, processed: int, total: int, text: str = '', is_cancellable: bool = True) -> None:
+        self._progress_bar.setValue(int(_PROGRESS_RESOLUTION * processed / total) if total > 0 else 0)
+        self._progress_bar.setFormat(f'%p% {text}' if text else '%p%')
+        self._progress_bar.setVisible(True)
+        self._cancel_button.setVisible(is_cancellable)
+
+    def set_timing(self, timing: StageTiming) -> None:
+        self._timing_label.setText(format_timing(timing))
+
+    def clear_progress(self) -> None:
+        self._progress_bar.reset()
+        self._progress_bar.setVisible(False)
+        self._cancel_button.setVisible(False)
 
     def _load_status_icons(self, defs: dict[StatusBarStatus, _IconDef], target_size: QSize | None = None) -> dict[StatusBarStatus, Icon]:
         return {k: self._load_status_icon(v, target_size) for k, v in defs.items()}
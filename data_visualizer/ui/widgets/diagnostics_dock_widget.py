@@ -0,0 +1,61 @@
+from PyQt6.QtCore import Qt, pyqtSlot
+from PyQt6.QtWidgets import (QAbstractItemView, QDockWidget, QHeaderView,
+                             QPushButton, QTableWidget, QTableWidgetItem,
+                             QVBoxLayout, QWidget)
+
+from data_visualizer.profiling import (StageTiming, format_duration,
+                                       format_memory_delta)
+
+_COLUMNS = ['Finished', 'Stage', 'Wall time', 'CPU time', 'Peak memory']
+# oldest measurements are dropped past this many rows
+_MAX_ROWS = 1000
+
+class DiagnosticsDockWidget(QDockWidget):
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__('Diagnostics', parent)
+
+        self.setObjectName('DiagnosticsDockWidget')
+
+        self._table = QTableWidget(0, len(_COLUMNS), self)
+        self._table.setHorizontalHeaderLabels(_COLUMNS)
+        self._table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self._table.verticalHeader().setVisible(False) # type: ignore[union-attr]
+        self._table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch) # type: ignore[union-attr]
+
+        clear_button = QPushButton('Clear', self)
+        clear_button.clicked.connect(self._clear_cb)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._table)
+        layout.addWidget(clear_button)
+
+        contents = QWidget(self)
+        contents.setLayout(layout)
+        self.setWidget(contents)
+
+    @pyqtSlot(object)
+    def add_timing(self, timing: StageTiming) -> None:
+        if self._table.rowCount() >= _MAX_ROWS:
+            self._table.removeRow(0)
+
+        row = self._table.rowCount()
+        self._table.insertRow(row)
+        for column, text in enumerate((
+            timing.finished_at.strftime('%H:%M:%S'),
+            timing.name,
+            format_duration(timing.wall_time),
+            format_duration(timing.cpu_time),
+            format_memory_delta(timing.peak_memory_delta))):
+            item = QTableWidgetItem(text)
+            if column > 1:
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+            self._table.setItem(row, column, item)
+
+        self._table.scrollToBottom()
+
+    @pyqtSlot()
+    def _clear_cb(self) -> None:
+        self._table.setRowCount(0)
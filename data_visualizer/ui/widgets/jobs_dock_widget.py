@@ -0,0 +1,79 @@
+from PyQt6.QtCore import pyqtSlot
+from PyQt6.QtWidgets import (QAbstractItemView, QDockWidget, QHBoxLayout,
+                             QHeaderView, QPushButton, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout, QWidget)
+
+from data_visualizer.job_scheduler import JobScheduler, ScheduledJob
+
+_COLUMNS = ['Job', 'Priority', 'State']
+
+class JobsDockWidget(QDockWidget):
+    def __init__(self, scheduler: JobScheduler, parent: QWidget | None = None) -> None:
+        super().__init__('Jobs', parent)
+
+        self.setObjectName('JobsDockWidget')
+
+        self._scheduler = scheduler
+        self._shown_jobs = list[ScheduledJob]()
+
+        self._table = QTableWidget(0, len(_COLUMNS), self)
+        self._table.setHorizontalHeaderLabels(_COLUMNS)
+        self._table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self._table.verticalHeader().setVisible(False) # type: ignore[union-attr]
+        self._table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch) # type: ignore[union-attr]
+
+        self._cancel_button = QPushButton('Cancel', self)
+        self._cancel_button.clicked.connect(self._cancel_cb)
+        self._cancel_all_button = QPushButton('Cancel all', self)
+        self._cancel_all_button.clicked.connect(self._cancel_all_cb)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self._cancel_button)
+        buttons_layout.addWidget(self._cancel_all_button)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._table)
+        layout.addLayout(buttons_layout)
+
+        contents = QWidget(self)
+        contents.setLayout(layout)
+        self.setWidget(contents)
+
+        scheduler.jobs_changed.connect(self._update_jobs)
+        self._update_jobs()
+
+    @pyqtSlot()
+    def _update_jobs(self) -> None:
+        self._shown_jobs = self._scheduler.jobs
+        self._table.setRowCount(len(self._shown_jobs))
+
+        for row, scheduled in enumerate(self._shown_jobs):
+            if scheduled.job.context.is_cancelled:
+                state = 'Cancelling'
+            elif not scheduled.is_running:
+                state = 'Queued'
+            elif scheduled.progress is None:
+                state = 'Running'
+            else:
+                state = f'Running ({scheduled.progress:.0%})'
+
+            for column, text in enumerate((scheduled.title, scheduled.priority.name.capitalize(), state)):
+                self._table.setItem(row, column, QTableWidgetItem(text))
+
+        self._cancel_button.setEnabled(len(self._shown_jobs) > 0)
+        self._cancel_all_button.setEnabled(len(self._shown_jobs) > 0)
+
+    @pyqtSlot()
+    def _cancel_cb(self) -> None:
+        rows = {x.row() for x in self._table.selectedIndexes()}
+        for row in sorted(rows):
+            self._scheduler.cancel(self._shown_jobs[row].job)
+
+        self._update_jobs()
+
+    @pyqtSlot()
+    def _cancel_all_cb(self) -> None:
+        self._scheduler.cancel_all()
+        self._update_jobs()
@@ -0,0 +1,76 @@
+import numpy as np
+import pyqtgraph  # type: ignore[import-untyped]
+from PyQt6.QtCore import QLineF, QRectF, Qt
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPen
+
+_MISSING_RANGE_PEN: QPen = pyqtgraph.mkPen(color=QColor(255, 0, 0, 255), style=Qt.PenStyle.DotLine)
+_MISSING_RANGE_BRUSH: QBrush = QBrush(QColor(194, 194, 194, 128), Qt.BrushStyle.BDiagPattern)
+
+# Draws all missing ranges of a series as full-height regions in a single paint call. Only ranges
+# inside the visible x range are drawn and ranges closer than a pixel to each other are merged.
+class MissingRangesItem(pyqtgraph.GraphicsObject):
+    def __init__(self, starts: np.ndarray, ends: np.ndarray) -> None:
+        super().__init__()
+
+        self.setZValue(-10)
+
+        self._starts = starts
+        self._ends = ends
+
+    def set_ranges(self, starts: np.ndarray, ends: np.ndarray) -> None:
+        self._starts = starts
+        self._ends = ends
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        view_rect = self.viewRect()
+        if view_rect is None or len(self._starts) == 0:
+            return QRectF()
+
+        return QRectF(
+            max(view_rect.left(), float(self._starts[0])),
+            view_rect.top(),
+            min(view_rect.right(), float(self._ends[-1])) - max(view_rect.left(), float(self._starts[0])),
+            view_rect.height()).normalized()
+
+    def viewRangeChanged(self) -> None:
+        self.prepareGeometryChange()
+        super().viewRangeChanged()
+
+    def paint(self, p: QPainter, *args) -> None:
+        view_rect = self.viewRect()
+        pixel_width = self.pixelWidth()
+        if view_rect is None or pixel_width == 0:
+            return
+
+        starts, ends = _merge_ranges(self._starts, self._ends, view_rect.left(), view_rect.right(), pixel_width)
+        if len(starts) == 0:
+            return
+
+        top, bottom = view_rect.top(), view_rect.bottom()
+        # make sure even a single missing row stays visible at any zoom level
+        ends = np.maximum(ends, starts + pixel_width)
+
+        p.setPen(Qt.PenStyle.NoPen)
+        p.setBrush(_MISSING_RANGE_BRUSH)
+        p.drawRects([QRectF(start, top, end - start, bottom - top) for start, end in zip(starts.tolist(), ends.tolist())])
+
+        p.setPen(_MISSING_RANGE_PEN)
+        p.drawLines([QLineF(x, top, x, bottom) for x in np.concatenate((starts, ends)).tolist()])
+
+def _merge_ranges(starts: np.ndarray,
+                  ends: np.ndarray,
+                  x_min: float,
+                  x_max: float,
+                  min_distance: float) -> tuple[np.ndarray, np.ndarray]:
+    first = int(np.searchsorted(ends, x_min, side='left'))
+    last = int(np.searchsorted(starts, x_max, side='right'))
+    starts, ends = starts[first:last], ends[first:last]
+    if len(starts) < 2:
+        return starts, ends
+
+    is_separate = (starts[1:] - ends[:-1]) > min_distance
+    group_starts = np.concatenate(([0], np.flatnonzero(is_separate) + 1))
+    group_ends = np.concatenate((group_starts[1:] - 1, [len(starts) - 1]))
+
+    return starts[group_starts], ends[group_ends]
@@ -0,0 +1,75 @@
+import datetime
+
+import pyqtgraph  # type: ignore[import-untyped]
+from PyQt6.QtCore import QSettings, Qt
+from PyQt6.QtWidgets import QScrollArea, QWidget
+
+from data_visualizer.ui.widgets.series_plot_item import SeriesPlotItem
+
+_PLOT_HEIGHT = 200
+
+# Displays plots stacked in a single scene, with x axes linked to the topmost plot.
+class PlotStackWidget(QScrollArea):
+    def __init__(self,
+                 settings: QSettings,
+                 series_order: list[str],
+                 parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+
+        self.setWidgetResizable(True)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+        self._series_order = {k: i for i, k in enumerate(series_order)}
+        self._plots = list[SeriesPlotItem]()
+
+        self._layout_widget = pyqtgraph.GraphicsLayoutWidget()
+        if settings.value('graph_theme', 'light', str) == 'light':
+            self._layout_widget.setBackground('white')
+
+        self.setWidget(self._layout_widget)
+
+    @property
+    def plots(self) -> list[SeriesPlotItem]:
+        return self._plots
+
+    def add_plot(self, plot: SeriesPlotItem) -> None:
+        if plot in self._plots:
+            return
+
+        self._plots.append(plot)
+        self._plots.sort(key=lambda x: self._series_order[x.series_name])
+        self._update_layout()
+
+    def remove_plot(self, plot: SeriesPlotItem) -> None:
+        if plot not in self._plots:
+            return
+
+        self._plots.remove(plot)
+        plot.setXLink(None)
+        self._update_layout()
+
+    def set_x_range(self,
+                    x_min: datetime.datetime | datetime.date,
+                    x_max: datetime.datetime | datetime.date) -> None:
+        # other plots follow through the x axis link
+        if len(self._plots) > 0:
+            self._plots[0].set_x_range(x_min, x_max)
+
+    def _update_layout(self) -> None:
+        layout = self._layout_widget.ci
+        layout.clear()
+
+        if len(self._plots) == 0:
+            self._layout_widget.setMinimumHeight(0)
+            return
+
+        master = self._plots[0]
+        for i, plot in enumerate(self._plots):
+            layout.addItem(plot, row=i, col=0)
+            plot.setXLink(None if plot is master else master)
+
+        max_left_axis_width = max(x.get_left_axis_width() for x in self._plots)
+        for plot in self._plots:
+            plot.set_left_axis_width(max_left_axis_width)
+
+        self._layout_widget.setMinimumHeight(len(self._plots) * _PLOT_HEIGHT)
@@ -22,6 +22,9 @@ class SeriesConfigWidget(QWidget, _SeriesConfigWidgetClass):
         self.setupUi(self)
 
         self.series_name = series_name
+        # limits of the plot, the spin boxes only show them rounded to their decimals
+        self._y_min = y_min
+        self._y_max = y_max
 
         self.expand_button: QToolButton
         self.name_label: QLabel
@@ -32,9 +35,8 @@ class SeriesConfigWidget(QWidget, _SeriesConfigWidgetClass):
 
         self.name_label.setText(series_name)
 
-        self.max_spinbox.setValue(y_max)
+        self._show_limits()
         self.max_spinbox.valueChanged.connect(self._max_changed_cb)
-        self.min_spinbox.setValue(y_min)
         self.min_spinbox.valueChanged.connect(self._min_changed_cb)
 
         self.show_checkbox.clicked.connect(self._show_checked_cb)
@@ -49,6 +51,27 @@ class SeriesConfigWidget(QWidget, _SeriesConfigWidgetClass):
         self.expand_button.setCheckable(True)
         self.expand_button.clicked.connect(self._expand_cb)
 
+    @property
+    def y_min(self) -> float:
+        return self._y_min
+
+    @property
+    def y_max(self) -> float:
+        return self._y_max
+
+    # Sets limits computed from the data, plots showing the series are updated by the caller.
+    def set_limits(self, y_min: float, y_max: float) -> None:
+        self._y_min, self._y_max = y_min, y_max
+        self._show_limits()
+
+    # Shows the limits without emitting changes, the ranges of the spin boxes are extended to fit them.
+    def _show_limits(self) -> None:
+        for spinbox, value in ((self.min_spinbox, self._y_min), (self.max_spinbox, self._y_max)):
+            spinbox.blockSignals(True)
+            spinbox.setRange(min(spinbox.minimum(), value), max(spinbox.maximum(), value))
+            spinbox.setValue(value)
+            spinbox.blockSignals(False)
+
     @pyqtSlot()
     def _expand_cb(self) -> None:
         is_checked = self.expand_button.isChecked()
@@ -64,10 +87,12 @@ class SeriesConfigWidget(QWidget, _SeriesConfigWidgetClass):
 
     @pyqtSlot(float)
     def _max_changed_cb(self, value: float) -> None:
+        self._y_max = value
         self.max_value_changed.emit(self.series_name, value)
 
     @pyqtSlot(float)
     def _min_changed_cb(self, value: float) -> None:
+        self._y_min = value
         self.min_value_changed.emit(self.series_name, value)
 
     @pyqtSlot()
@@ -0,0 +1,203 @@
+import dataclasses
+import datetime
+import random
+import time
+
+import numpy as np
+import pandas as pd
+import pyqtgraph  # type: ignore[import-untyped]
+from PyQt6.QtCore import QSettings, Qt
+from PyQt6.QtGui import QColor, QPen
+
+from data_visualizer.decimation import get_lod_data
+from data_visualizer.models.pandas_model import PandasModel
+from data_visualizer.ui.widgets.missing_ranges_item import MissingRangesItem
+
+_MIN_PEN_COLOR = 128
+_MAX_PEN_COLOR = 255
+# decimation width used before the plot gets its final size
+_MIN_LOD_WIDTH = 256
+# data is prepared for this fraction of the visible width on both sides, panning within it reuses the data
+_LOD_MARGIN = 0.5
+# relative change of seconds per pixel still considered the same zoom level (panning rounds the range)
+_LOD_SCALE_TOLERANCE = 1e-6
+
+# Everything a plot needs which doesn't touch Qt, so it can be prepared in a worker thread
+@dataclasses.dataclass(frozen=True)
+class SeriesPlotData:
+    series_name: str
+    column_idx: int
+    y_axis_values: np.ndarray | pd.arrays.ArrowExtensionArray
+    missing_starts: np.ndarray
+    missing_ends: np.ndarray
+
+def create_series_plot_data(model: PandasModel, series_name: str) -> SeriesPlotData:
+    series = model.dataframe[series_name]
+    missing_ranges = model.missing_ranges[series_name]
+
+    # numeric columns are kept as they are (possibly memory-mapped or Arrow-backed), visible rows are
+    # converted on demand
+    y_axis_values: np.ndarray | pd.arrays.ArrowExtensionArray
+    if isinstance(series.array, pd.arrays.ArrowExtensionArray) and pd.api.types.is_numeric_dtype(series.dtype):
+        y_axis_values = series.array
+    else:
+        y_axis_values = series.to_numpy()
+        if y_axis_values.dtype.kind not in 'biuf':
+            y_axis_values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return SeriesPlotData(
+        series_name,
+        model.dataframe.columns.get_loc(series_name),
+        y_axis_values,
+        model.grid.get_unix_timestamps(missing_ranges.starts),
+        model.grid.get_unix_timestamps(missing_ranges.ends))
+
+class SeriesPlotItem(pyqtgraph.PlotItem):
+    def __init__(self,
+                 settings: QSettings,
+                 model: PandasModel,
+                 data: SeriesPlotData,
+                 x_min: datetime.datetime | datetime.date,
+                 x_max: datetime.datetime | datetime.date,
+                 y_min: float,
+                 y_max: float) -> None:
+        super().__init__(axisItems={'bottom': pyqtgraph.DateAxisItem(orientation='bottom')})
+
+        self.series_name = data.series_name
+
+        self.showGrid(True, True, settings.value('graph_grid_opacity', 0.5, float))
+        self.addLegend()
+
+        theme = settings.value('graph_theme', 'light', str)
+
+        self._grid = model.grid
+        self._grid_positions = model.grid_positions
+        self._pyramid = model.pyramid
+        self._column_idx = data.column_idx
+        self._y_axis_values = data.y_axis_values
+        # x range and seconds per pixel of the data given to the series
+        self._lod_range: tuple[float, float] | None = None
+        self._lod_scale = 0.0
+
+        # data is set by _update_lod_data whenever the visible range changes
+        self._series = self.plot(
+                connect='finite',
+                pen=_create_random_color_pen(theme == 'light'),
+                name=data.series_name)
+
+        view_box = self.getViewBox()
+        view_box.sigXRangeChanged.connect(self._update_lod_data)
+        view_box.sigResized.connect(self._update_lod_data)
+
+        self._missing_ranges_item = MissingRangesItem(data.missing_starts, data.missing_ends)
+        self.addItem(self._missing_ranges_item)
+
+        margins = self.getContentsMargins()
+        self.setContentsMargins(
+            margins[0],
+            margins[1],
+            settings.value('graph_vertical_margin', 15, int),
+            margins[3])
+
+        self.set_x_range(x_min, x_max)
+        self.set_y_range(y_min, y_max)
+
+    def set_x_range(self,
+                    x_min: datetime.datetime | datetime.date,
+                    x_max: datetime.datetime | datetime.date,) -> None:
+        self.setXRange(
+            _datetime_to_unix_timestamp(x_min),
+            _datetime_to_unix_timestamp(x_max),
+            padding=0.0)
+
+    def set_y_range(self, y_min: float, y_max: float) -> None:
+        self.setYRange(y_min, y_max, padding=0.0)
+
+    def set_y_min(self, value: float) -> None:
+        self.setYRange(
+            value,
+            self._get_y_axis_range()[1],
+            padding=0.0)
+
+    def set_y_max(self, value: float) -> None:
+        self.setYRange(
+            self._get_y_axis_range()[0],
+            value,
+            padding=0.0)
+
+    # Takes over data of the model after rows were appended to it. Nothing is rebuilt, the plot is
+    # only redrawn if it shows the end of the data.
+    def set_data(self, model: PandasModel, data: SeriesPlotData) -> None:
+        old_end = self._grid.end.value / 1e9
+
+        self._grid = model.grid
+        self._grid_positions = model.grid_positions
+        self._pyramid = model.pyramid
+        self._y_axis_values = data.y_axis_values
+        self._missing_ranges_item.set_ranges(data.missing_starts, data.missing_ends)
+
+        # the data given to the series (margins included) might reach the appended rows
+        if self._lod_range is not None and self._lod_range[1] >= old_end:
+            self._lod_range = None
+            self._update_lod_data()
+
+    def get_left_axis_width(self) -> float:
+        return self.getAxis('left').width()
+
+    def set_left_axis_width(self, width: float) -> None:
+        self.getAxis('left').setWidth(width)
+
+    # Only the visible part of the series plus `_LOD_MARGIN` on both sides is given to pyqtgraph, sliced
+    # by binary searches of grid positions (or pyramid buckets) and decimated. Pans staying within the
+    # margin at the same zoom level reuse it, so narrow periods of huge files pan without any work.
+    def _update_lod_data(self) -> None:
+        view_box = self.getViewBox()
+        x_min, x_max = view_box.viewRange()[0]
+        width_px = max(int(view_box.width()), _MIN_LOD_WIDTH)
+        scale = (x_max - x_min) / width_px
+
+        if (self._lod_range is not None
+            and self._lod_range[0] <= x_min
+            and x_max <= self._lod_range[1]
+            and abs(scale - self._lod_scale) <= self._lod_scale * _LOD_SCALE_TOLERANCE):
+            return
+
+        margin = (x_max - x_min) * _LOD_MARGIN
+        x_min, x_max = x_min - margin, x_max + margin
+        width_px = int(width_px * (1 + 2 * _LOD_MARGIN))
+
+        # zoomed out views are answered from the pyramid without touching raw rows
+        level = None
+        if self._pyramid is not None:
+            level = self._pyramid.get_level(scale)
+
+        if level is not None and level.bucket > self._grid.freq:
+            x, y = level.get_lod_data(self._column_idx, x_min, x_max, width_px)
+        else:
+            x, y = get_lod_data(self._grid, self._grid_positions, self._y_axis_values, x_min, x_max, width_px)
+
+        self._series.setData(x, y, connect='finite')
+        self._lod_range = (x_min, x_max)
+        self._lod_scale = scale
+
+    def _get_y_axis_range(self) -> tuple[float, float]:
+        return self.getAxis('left').range
+
+def _get_random_qt_color(_min: int, _max: int) -> QColor:
+    return QColor(
+        int(random.uniform(_min, _max)),
+        int(random.uniform(_min, _max)),
+        int(random.uniform(_min, _max)))
+
+def _create_random_color_pen(use_dark_colors: bool) -> QPen:
+    if use_dark_colors:
+        color = _get_random_qt_color(0, 180)
+    else:
+        color = _get_random_qt_color(128, 255)
+
+    return pyqtgraph.mkPen(
+        color=color,
+        style=Qt.PenStyle.SolidLine)
+
+def _datetime_to_unix_timestamp(value: datetime.datetime | datetime.date) -> float:
+    return time.mktime(value.timetuple())